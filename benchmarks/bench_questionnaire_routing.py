@@ -0,0 +1,101 @@
+"""Benchmark do roteamento de respostas do questionário.
+
+Compara o `bot.wait_for('message', check=...)` por pergunta (o discord.py roda
+o `check` de todas as esperas pendentes para cada mensagem) com o
+`QuestionnaireSessionManager` (uma busca por canal). São 200 sessões
+simultâneas respondendo 20 perguntas cada, no meio de um chat geral intenso
+(50 mensagens de outros canais para cada resposta). Nada é enviado ao Discord:
+as mensagens são despachadas direto no cliente, como faria o gateway.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_questionnaire_routing
+"""
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+import discord
+
+from handlers.questionnaire_sessions import QuestionnaireSessionManager
+
+SESSIONS = 200
+QUESTIONS = 20
+NOISE_PER_ANSWER = 50
+GENERAL_CHANNELS = 30
+
+
+def fake_message(channel_id: int, author_id: int):
+    return SimpleNamespace(channel=SimpleNamespace(id=channel_id), author=SimpleNamespace(id=author_id))
+
+
+def build_traffic():
+    """Sequência de mensagens: cada resposta de sessão cercada de ruído do chat geral."""
+    rng = random.Random(42)
+    answers = [(1_000 + s, 5_000 + s) for s in range(SESSIONS) for _ in range(QUESTIONS)]
+    rng.shuffle(answers)
+    traffic = []
+    for channel_id, author_id in answers:
+        for _ in range(NOISE_PER_ANSWER):
+            traffic.append(fake_message(rng.randrange(GENERAL_CHANNELS), rng.randrange(10**6)))
+        traffic.append(fake_message(channel_id, author_id))
+    return traffic
+
+
+async def run_wait_for(traffic) -> dict:
+    client = discord.Client(intents=discord.Intents.none())
+    checks = 0
+
+    async def session(channel_id: int, author_id: int):
+        def check(m):
+            nonlocal checks
+            checks += 1
+            return m.author.id == author_id and m.channel.id == channel_id
+
+        for _ in range(QUESTIONS):
+            await client.wait_for("message", check=check, timeout=60)
+
+    async with client:  # Vincula o loop, como o login faria (sem conectar)
+        tasks = [asyncio.create_task(session(1_000 + s, 5_000 + s)) for s in range(SESSIONS)]
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        for message in traffic:
+            client.dispatch("message", message)
+            await asyncio.sleep(0)  # Deixa a sessão registrar a próxima espera
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "check_calls": checks}
+
+
+async def run_manager(traffic) -> dict:
+    manager = QuestionnaireSessionManager()
+
+    async def session(channel_id: int, author_id: int):
+        with manager.open(SimpleNamespace(id=channel_id), SimpleNamespace(id=author_id)) as s:
+            for _ in range(QUESTIONS):
+                await s.wait_answer(60)
+
+    tasks = [asyncio.create_task(session(1_000 + s, 5_000 + s)) for s in range(SESSIONS)]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for message in traffic:
+        manager.route(message)
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "routed": manager.routed}
+
+
+async def main():
+    traffic = build_traffic()
+    print(f"{SESSIONS} sessões x {QUESTIONS} perguntas, {len(traffic)} mensagens no total")
+    wait_for = await run_wait_for(traffic)
+    print(f"wait_for por pergunta: {wait_for}")
+    manager = await run_manager(traffic)
+    print(f"gerenciador de sessões: {manager}")
+    if manager["seconds"]:
+        print(f"Ganho: {wait_for['seconds'] / manager['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Benchmark da transcrição dos tickets (arquivo único em memória).
+
+Gera históricos falsos de 100, 10k e 50k mensagens (entregues em páginas de
+100, como o `channel.history` do discord.py) e mede, para cada formato (texto
+e HTML, com e sem gzip), o tempo de renderização, o tamanho do arquivo final e
+o pico de memória. O envio é sempre uma única mensagem, independente do tamanho.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_transcript
+"""
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from handlers.transcript import render_transcript
+
+SIZES = (100, 10_000, 50_000)
+VARIANTS = (("text", False), ("text", True), ("html", False), ("html", True))
+PAGE_SIZE = 100
+
+
+class FakeAuthor(SimpleNamespace):
+    def __str__(self):
+        return self.name
+
+
+async def fake_history(total: int):
+    """Simula o histórico paginado: cada página custa um 'round-trip' e é descartada depois."""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    authors = [FakeAuthor(id=1000 + n, name=f"usuario_{n}") for n in range(5)]
+    for page_start in range(0, total, PAGE_SIZE):
+        await asyncio.sleep(0)  # Ponto de troca, como uma requisição HTTP
+        page = [
+            SimpleNamespace(
+                created_at=start + timedelta(seconds=i),
+                author=authors[i % len(authors)],
+                clean_content=f"Mensagem número {i} com um pouco de texto para simular uma conversa real.",
+                attachments=[],
+                embeds=[],
+            )
+            for i in range(page_start, min(page_start + PAGE_SIZE, total))
+        ]
+        for msg in page:
+            yield msg
+
+
+async def run_once(total: int, fmt: str, compress: bool) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    buffer, _, summary = await render_transcript(fake_history(total), "#ticket-bench", fmt, compress)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "messages": summary.messages,
+        "seconds": round(elapsed, 4),
+        "peak_kib": round(peak / 1024, 1),
+        "file_kib": round(buffer.getbuffer().nbytes / 1024, 1) if buffer else 0,
+    }
+
+
+def main():
+    for total in SIZES:
+        for fmt, compress in VARIANTS:
+            result = asyncio.run(run_once(total, fmt, compress))
+            label = f"{fmt}{'+gz' if compress else ''}"
+            print(f"{total:>6} msgs [{label:<7}]: {result['seconds']:.3f}s, "
+                  f"arquivo {result['file_kib']} KiB, pico {result['peak_kib']} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+"""Objetos falsos do Discord para os benchmarks (sem rede, sem token).
+
+Guild, Member, TextChannel, Message e Interaction mínimos, com o que os cogs
+e handlers realmente usam. Toda chamada que seria uma requisição à API passa
+por um `ApiRecorder`, que conta as chamadas por rota e pode simular latência.
+`Member`, `TextChannel` e `CategoryChannel` herdam das classes do discord.py
+(sem chamar o `__init__` delas) para passar nos `isinstance` do código real.
+
+`make_bot()` monta um bot falso com os serviços reais do `CustomBot`
+(dispatcher de saída, sessões de questionário, resolver, pipeline de membros,
+banco SQLite temporário...), para medir o caminho de ponta a ponta.
+"""
+import asyncio
+import contextlib
+import itertools
+import os
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import discord
+
+# --- IDs do Servidor Falso ---
+# Exportados como variáveis de ambiente por `bench_env()` antes de ler o BotConfig
+GUILD_ID = 900_000_000_000_000_001
+BOT_USER_ID = 900_000_000_000_000_002
+MOD_ROLE_ID = 900_000_000_000_001_001
+ANALISE_ROLE_ID = 900_000_000_000_001_002
+VISITANTE_ROLE_ID = 900_000_000_000_001_003
+TURISTA_ROLE_ID = 900_000_000_000_001_004
+LOGS_CHANNEL_ID = 900_000_000_000_002_001
+BOAS_VINDAS_CHANNEL_ID = 900_000_000_000_002_002
+CLOSED_TICKET_LOG_CHANNEL_ID = 900_000_000_000_002_003
+TICKET_CATEGORY_ID = 900_000_000_000_002_004
+
+PAGE_SIZE = 100  # Mensagens por página do histórico, como a API
+_ids = itertools.count(910_000_000_000_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+def bench_env() -> Dict[str, str]:
+    """Variáveis de ambiente do servidor falso (log só no console, nível WARNING)."""
+    return {
+        "DISCORD_GUILD_ID": str(GUILD_ID),
+        "ALLOWED_MOD_ROLE_IDS": str(MOD_ROLE_ID),
+        "ANALISE_ID": str(ANALISE_ROLE_ID),
+        "VISITANTE_ID": str(VISITANTE_ROLE_ID),
+        "TURISTA_ID": str(TURISTA_ROLE_ID),
+        "LOGS_DISCORD": str(LOGS_CHANNEL_ID),
+        "BOAS_VINDAS_ID": str(BOAS_VINDAS_CHANNEL_ID),
+        "TICKET_CATEGORY_ID": str(TICKET_CATEGORY_ID),
+        "CLOSED_TICKET_LOG_CHANNEL_ID": str(CLOSED_TICKET_LOG_CHANNEL_ID),
+        "WHITELIST_ID": "1", "VERIFICAR_ID": "1", "COMUNICADOS_ID": "1",
+        "SESSION_BACKEND": "channel", "WHITELIST_MODE": "channel",
+        "CHANNEL_POOL_SIZE": "0", "WHITELIST_MAX_SESSIONS": "0", "METRICS_PORT": "0",
+        "INTERACTION_ACK_BUDGET": "0",
+        "LOG_FILE": "", "LOG_LEVEL": "WARNING",
+    }
+
+
+class ApiRecorder:
+    """Conta as chamadas à API (por rota) e simula a latência de cada uma."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.skipped_delay = 0.0  # Pausas fixas (asyncio.sleep) puladas por skip_fixed_delays
+
+    async def call(self, route: str):
+        self.calls[route] += 1
+        # Sempre cede o loop, como uma requisição de verdade
+        await asyncio.sleep(self.latency)
+
+    def reset(self):
+        self.calls.clear()
+        self.skipped_delay = 0.0
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(sorted(self.calls.items()))
+
+
+# --- Início: Objetos do Servidor ---
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", role_id: int, name: str, position: int = 1):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+        self.position = position
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    def __repr__(self):
+        return f"<FakeRole {self.name}>"
+
+
+class FakeMember(discord.Member):
+    """Membro falso; os atributos do usuário vêm de `_fake` (o `_user` real não existe)."""
+
+    def __init__(self, guild: "FakeGuild", member_id: int, name: str, bot: bool = False,
+                 role_ids: Optional[List[int]] = None):
+        now = discord.utils.utcnow()
+        self.guild = guild
+        self._roles = list(role_ids or ())
+        self.nick = None
+        self.joined_at = now
+        self._fake = SimpleNamespace(id=member_id, name=name, bot=bot, created_at=now - timedelta(days=30),
+                                     display_avatar=SimpleNamespace(url=f"https://cdn.invalid/avatars/{member_id}.png"))
+
+    id = property(lambda self: self._fake.id)
+    name = property(lambda self: self._fake.name)
+    bot = property(lambda self: self._fake.bot)
+    created_at = property(lambda self: self._fake.created_at)
+    display_avatar = property(lambda self: self._fake.display_avatar)
+    display_name = property(lambda self: self.nick or self._fake.name)
+    mention = property(lambda self: f"<@{self._fake.id}>")
+
+    @property
+    def roles(self) -> List[FakeRole]:
+        return [role for role in map(self.guild.get_role, self._roles) if role is not None]
+
+    async def add_roles(self, *roles, reason=None, atomic=True):
+        await self.guild.api.call("PUT /guilds/:id/members/:id/roles/:id")
+        self._roles.extend(role.id for role in roles if role.id not in self._roles)
+
+    async def remove_roles(self, *roles, reason=None, atomic=True):
+        await self.guild.api.call("DELETE /guilds/:id/members/:id/roles/:id")
+        removed = {role.id for role in roles}
+        self._roles = [role_id for role_id in self._roles if role_id not in removed]
+
+    def __str__(self):
+        return self._fake.name
+
+    def __repr__(self):
+        return f"<FakeMember {self._fake.name}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeMember) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self._fake.id)
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeTextChannel", author, content: str = "", embeds=None,
+                 created_at: Optional[datetime] = None):
+        self.id = next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.clean_content = content
+        self.embeds = list(embeds or ())
+        self.attachments: list = []
+        self.file = None
+        self.created_at = created_at or discord.utils.utcnow()
+
+    async def delete(self, *, delay: Optional[float] = None):
+        await self.guild.api.call("DELETE /channels/:id/messages/:id")
+
+    async def edit(self, **kwargs):
+        await self.guild.api.call("PATCH /channels/:id/messages/:id")
+        self.content = kwargs.get("content", self.content)
+        return self
+
+
+class FakeTextChannel(discord.TextChannel):
+    """Canal de texto falso; o histórico é lido em páginas de 100 (uma chamada por página)."""
+
+    def __init__(self, guild: "FakeGuild", name: str, category: Optional["FakeCategory"] = None,
+                 topic: Optional[str] = None, overwrites: Optional[Dict] = None):
+        self.guild = guild
+        self.id = next_id()
+        self.name = name
+        self.topic = topic
+        self.category_id = category.id if category else None
+        self.position = len(guild.channels)
+        self.messages: List[FakeMessage] = []
+        self.last_sent: Optional[FakeMessage] = None  # Última mensagem enviada pelo bot
+        self.fake_overwrites: Dict = dict(overwrites or {})
+        # Chamado a cada mensagem enviada pelo bot (ex.: candidato respondendo a pergunta)
+        self.on_send: Optional[Callable[[FakeMessage], None]] = None
+
+    @property
+    def overwrites(self) -> Dict:
+        return dict(self.fake_overwrites)
+
+    def permissions_for(self, obj, /) -> discord.Permissions:
+        return discord.Permissions.all()
+
+    async def send(self, content: Optional[str] = None, *, embed=None, embeds=None, file=None,
+                   delete_after: Optional[float] = None, **kwargs) -> FakeMessage:
+        await self.guild.api.call("POST /channels/:id/messages")
+        message = FakeMessage(self, self.guild.me, content or "", embeds or ([embed] if embed else []))
+        message.file = file
+        self.last_sent = message
+        if self.on_send:
+            self.on_send(message)
+        return message
+
+    async def history(self, *, limit: Optional[int] = 100, oldest_first: Optional[bool] = None, **kwargs):
+        messages = self.messages if oldest_first else list(reversed(self.messages))
+        if limit is not None:
+            messages = messages[:limit]
+        for start in range(0, len(messages), PAGE_SIZE):
+            await self.guild.api.call("GET /channels/:id/messages")
+            for message in messages[start:start + PAGE_SIZE]:
+                yield message
+
+    async def set_permissions(self, target, *, overwrite=None, reason=None, **permissions):
+        await self.guild.api.call("PUT /channels/:id/permissions/:id")
+        if overwrite is None and not permissions:
+            self.fake_overwrites.pop(target, None)
+        else:
+            self.fake_overwrites[target] = overwrite
+
+    async def purge(self, *, limit: Optional[int] = 100, **kwargs) -> list:
+        await self.guild.api.call("POST /channels/:id/messages/bulk-delete")
+        purged, self.messages = self.messages, []
+        return purged
+
+    async def delete(self, *, reason: Optional[str] = None):
+        await self.guild.api.call("DELETE /channels/:id")
+        self.guild.remove_channel(self)
+
+    def __repr__(self):
+        return f"<FakeTextChannel {self.name}>"
+
+
+class FakeCategory(discord.CategoryChannel):
+    def __init__(self, guild: "FakeGuild", name: str, category_id: Optional[int] = None):
+        self.guild = guild
+        self.id = category_id or next_id()
+        self.name = name
+        self.category_id = None
+        self.position = len(guild.channels)
+
+    @property
+    def text_channels(self) -> List[FakeTextChannel]:
+        return [c for c in self.guild.channels if isinstance(c, FakeTextChannel) and c.category_id == self.id]
+
+    def __repr__(self):
+        return f"<FakeCategory {self.name}>"
+
+
+class FakeGuild:
+    """Servidor falso com os canais e cargos que a configuração de benchmark espera."""
+
+    def __init__(self, api: Optional[ApiRecorder] = None, filler_channels: int = 0):
+        self.api = api or ApiRecorder()
+        self.id = GUILD_ID
+        self.name = "Servidor de Benchmark"
+        self.filesize_limit = 10 * 1024 * 1024
+        self.channels: list = []
+        self._channels: Dict[int, object] = {}
+        self._roles: Dict[int, FakeRole] = {}
+        self._members: Dict[int, FakeMember] = {}
+        self.default_role = self._add_role(self.id, "@everyone", position=0)
+        for role_id, name in ((MOD_ROLE_ID, "Staff"), (ANALISE_ROLE_ID, "Análise"),
+                              (VISITANTE_ROLE_ID, "Visitante"), (TURISTA_ROLE_ID, "Turista")):
+            self._add_role(role_id, name)
+        self.me = self.add_member("bot-benchmark", member_id=BOT_USER_ID, bot=True)
+        self.whitelist_category = self.add_channel(FakeCategory(self, "WHITELIST"))
+        self.ticket_category = self.add_channel(FakeCategory(self, "TICKETS", TICKET_CATEGORY_ID))
+        for channel_id, name in ((LOGS_CHANNEL_ID, "logs"), (BOAS_VINDAS_CHANNEL_ID, "boas-vindas"),
+                                 (CLOSED_TICKET_LOG_CHANNEL_ID, "tickets-fechados")):
+            channel = FakeTextChannel(self, name)
+            channel.id = channel_id
+            self.add_channel(channel)
+        self.add_channel(FakeTextChannel(self, "respostas-whitelist"))
+        # Canais comuns (chat, voz, anúncios...) que as buscas por nome percorrem
+        for n in range(max(filler_channels - len(self.channels), 0)):
+            self.add_channel(FakeTextChannel(self, f"canal-geral-{n:03d}"))
+
+    @property
+    def member_count(self) -> int:
+        return len(self._members)
+
+    def _add_role(self, role_id: int, name: str, position: int = 1) -> FakeRole:
+        role = self._roles[role_id] = FakeRole(self, role_id, name, position)
+        return role
+
+    def add_channel(self, channel):
+        self.channels.append(channel)
+        self._channels[channel.id] = channel
+        return channel
+
+    def remove_channel(self, channel):
+        if self._channels.pop(channel.id, None) is not None:
+            self.channels.remove(channel)
+
+    def add_member(self, name: str, member_id: Optional[int] = None, bot: bool = False,
+                   role_ids: Optional[List[int]] = None) -> FakeMember:
+        member = FakeMember(self, member_id or next_id(), name, bot, role_ids)
+        self._members[member.id] = member
+        return member
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    get_channel_or_thread = get_channel
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self._roles.get(role_id)
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members.get(member_id)
+
+    async def create_text_channel(self, name: str, *, category=None, overwrites=None, topic=None,
+                                  reason=None, **kwargs) -> FakeTextChannel:
+        await self.api.call("POST /guilds/:id/channels")
+        return self.add_channel(FakeTextChannel(self, name, category, topic, overwrites))
+# --- Fim: Objetos do Servidor ---
+
+
+# --- Início: Interações ---
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _ack(self, route: str = "POST /interactions/:id/:token/callback"):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+        self._done = True
+        self._interaction.acked_at = asyncio.get_running_loop().time()
+        await self._interaction.guild.api.call(route)
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        await self._ack()
+
+    async def send_message(self, content=None, **kwargs):
+        await self._ack()
+        self._interaction.sent.append(content)
+
+    async def edit_message(self, **kwargs):
+        await self._ack()
+
+    async def send_modal(self, modal, /):
+        await self._ack()
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, wait: bool = False, **kwargs):
+        await self._interaction.guild.api.call("POST /webhooks/:id/:token")
+        self._interaction.sent.append(content)
+        return FakeMessage(self._interaction.channel, self._interaction.guild.me, content or "")
+
+
+class FakeInteraction:
+    """Interação de componente/comando; guarda o texto de cada resposta em `sent`."""
+
+    def __init__(self, client, guild: FakeGuild, user: FakeMember, channel=None, custom_id: str = ""):
+        self.id = next_id()
+        self.type = discord.InteractionType.component
+        self.client = client
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.data = {"custom_id": custom_id}
+        self.extras: dict = {}
+        self.created_at = discord.utils.utcnow()
+        self.acked_at: Optional[float] = None
+        self.sent: List[Optional[str]] = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def edit_original_response(self, **kwargs):
+        await self.guild.api.call("PATCH /webhooks/:id/:token/messages/@original")
+        self.sent.append(kwargs.get("content"))
+# --- Fim: Interações ---
+
+
+# --- Início: Bot Falso ---
+class FakeBot:
+    """Os atributos do `CustomBot` que os handlers usam, com os serviços reais."""
+
+    def __init__(self, guild: FakeGuild, data_dir: str):
+        # Importados aqui: o BotConfig precisa ler o ambiente de `bench_env()` antes
+        from database.attempt_ids import AttemptIdAllocator
+        from database.database import Database
+        from handlers.admission import AdmissionController
+        from handlers.answer_writer import AnswerWriteBehind
+        from handlers.channel_pool import ChannelPool
+        from handlers.member_pipeline import MemberPipeline
+        from handlers.questionnaire import BRASILIA_TZ
+        from handlers.questionnaire_sessions import QuestionnaireSessionManager
+        from utils.dispatcher import OutboundDispatcher
+        from utils.log_sink import DiscordLogSink
+        from utils.metrics import MetricsRegistry
+        from utils.resolver import GuildResolver
+
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = guild.me
+        self.outbound = OutboundDispatcher()
+        self.db = Database(os.path.join(data_dir, "bench.db"))
+        self.attempt_ids = AttemptIdAllocator(self.db)
+        self.answer_writer = AnswerWriteBehind(self.db, os.path.join(data_dir, "respostas.csv"), BRASILIA_TZ)
+        self.log_sink = DiscordLogSink(self, LOGS_CHANNEL_ID)
+        self.member_pipeline = MemberPipeline()
+        self.questionnaire_sessions = QuestionnaireSessionManager()
+        self.questionnaire_tasks = set()
+        self.channel_pools = {"whitelist": ChannelPool("wl", 0), "ticket": ChannelPool("ticket", 0)}
+        self.whitelist_admission = AdmissionController()
+        self.resolver = GuildResolver()
+        self.metrics = MetricsRegistry()
+        self.cogs: Dict[str, object] = {}
+
+    def get_guild(self, guild_id: int):
+        return self.guild if guild_id == self.guild.id else None
+
+    def get_channel(self, channel_id: int):
+        return self.guild.get_channel(channel_id)
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    async def start(self):
+        await self.db.connect()
+        await self.attempt_ids.load(legacy_file="")
+        self.answer_writer.start()
+        self.outbound.start()
+        self.log_sink.start()
+        await self.log_sink.resolve()
+        self.member_pipeline.start()
+
+    async def close(self):
+        await self.questionnaire_sessions.suspend_all()
+        for task in list(self.questionnaire_tasks):
+            task.cancel()
+        await asyncio.gather(*self.questionnaire_tasks, return_exceptions=True)
+        await self.member_pipeline.stop()
+        await self.log_sink.stop()
+        await self.outbound.stop()
+        await self.answer_writer.stop()
+        await self.db.close()
+
+
+@contextlib.asynccontextmanager
+async def make_bot(guild: FakeGuild):
+    """Bot falso iniciado, com banco e CSV em um diretório temporário."""
+    with tempfile.TemporaryDirectory(prefix="bench-") as data_dir:
+        bot = FakeBot(guild, data_dir)
+        await bot.start()
+        try:
+            yield bot
+        finally:
+            await bot.close()
+# --- Fim: Bot Falso ---
+
+
+class _SkippedDelays:
+    """`asyncio` de um módulo, com `sleep` que só cede o loop e soma a pausa pulada."""
+
+    def __init__(self, api: ApiRecorder):
+        self._api = api
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    async def sleep(self, delay, result=None):
+        self._api.skipped_delay += delay
+        return await asyncio.sleep(0, result)
+
+
+@contextlib.contextmanager
+def skip_fixed_delays(api: ApiRecorder, *modules):
+    """Pula as pausas fixas (`asyncio.sleep(5)` antes de apagar um canal etc.) dos módulos.
+
+    Elas não dependem do código e dominariam o tempo medido; o total pulado fica
+    em `api.skipped_delay`.
+    """
+    originals = [module.asyncio for module in modules]
+    for module in modules:
+        module.asyncio = _SkippedDelays(api)
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.asyncio = original
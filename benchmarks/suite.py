@@ -0,0 +1,334 @@
+"""Suíte de benchmarks dos caminhos quentes do bot, sem Discord (ver `benchmarks/fakes.py`).
+
+Cenários (o código medido é o real; só o Discord é falso):
+
+- `questionnaire`: `start_questionnaire` de ponta a ponta com 20 perguntas
+  (mensagens, roteamento das respostas, checkpoints, conclusão e canal encerrado).
+- `close_ticket_<n>`: botão "Fechar Ticket" com transcrição de 1k/10k/50k mensagens.
+- `start_whitelist_<n>_channels`: botão "Quero fazer whitelist" em servidores
+  com 50/500 canais (resolver, índice de canais, cargo e criação do canal);
+  o questionário em si fica de fora (medido no primeiro cenário).
+- `sanitize_channel_name`: nomes por segundo.
+- `member_join_burst`: 1.000 entradas seguidas por `on_member_join` até o
+  pipeline de membros esvaziar (cargo Visitante, log e boas-vindas).
+
+As pausas fixas do código (`asyncio.sleep(5)` antes de apagar um canal etc.)
+são puladas e somadas em `skipped_delay_s`. O resultado vai para um JSON
+(`benchmarks/results/<commit>.json` por padrão); com `--compare` a execução é
+comparada com um JSON anterior, para achar regressões entre commits.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.suite
+    python -m benchmarks.suite --only questionnaire,sanitize_channel_name --repeat 3
+    python -m benchmarks.suite --latency 50 --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from benchmarks.fakes import (MOD_ROLE_ID, ApiRecorder, FakeGuild, FakeInteraction, FakeMessage, FakeTextChannel,
+                              bench_env, make_bot, skip_fixed_delays)
+
+# O BotConfig é lido na primeira importação dos módulos do bot: o ambiente vem antes
+os.environ.update(bench_env())
+
+from utils.logger import setup_logging  # noqa: E402
+
+QUESTIONS = 20
+TICKET_SIZES = (1_000, 10_000, 50_000)
+GUILD_SIZES = (50, 500)
+CLICKS_PER_RUN = 100
+SANITIZE_NAMES = 10_000
+JOIN_BURST = 1_000
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+def summarize(samples) -> dict:
+    return {
+        "runs": len(samples),
+        "median_s": round(statistics.median(samples), 6),
+        "min_s": round(min(samples), 6),
+        "max_s": round(max(samples), 6),
+    }
+
+
+# --- Início: Cenários ---
+async def bench_questionnaire(api: ApiRecorder, repeat: int) -> dict:
+    from handlers import questionnaire
+
+    async def deliver(bot, message):
+        # O candidato responde assim que a sessão estiver esperando (como o on_message do bot)
+        for _ in range(1_000):
+            if bot.questionnaire_sessions.route(message):
+                return
+            await asyncio.sleep(0)
+
+    def answer_questions(bot, member):
+        def on_send(message):
+            if message.content.startswith("**Pergunta"):
+                answer = FakeMessage(message.channel, member, "Resposta de benchmark com algumas palavras.")
+                asyncio.create_task(deliver(bot, answer))
+        return on_send
+
+    original_questions = questionnaire.questions
+    benchmark_questions = (original_questions * 2)[:QUESTIONS]
+    guild = FakeGuild(api)
+    samples = []
+    async with make_bot(guild) as bot:
+        questionnaire.questions = benchmark_questions
+        try:
+            with skip_fixed_delays(api, questionnaire):
+                for run in range(repeat):
+                    member = guild.add_member(f"candidato-{run}")
+                    channel = guild.add_channel(FakeTextChannel(
+                        guild, f"wl-candidato-{run}", guild.whitelist_category))
+                    channel.on_send = answer_questions(bot, member)
+                    api.reset()
+                    started = time.perf_counter()
+                    await questionnaire.start_questionnaire(member, channel, bot)
+                    samples.append(time.perf_counter() - started)
+                    if guild.get_channel(channel.id):
+                        raise RuntimeError("Questionário de benchmark não terminou (canal não foi encerrado).")
+        finally:
+            questionnaire.questions = original_questions
+    return {"questions": QUESTIONS, **summarize(samples), "api_calls": api.snapshot(),
+            "skipped_delay_s": api.skipped_delay}
+
+
+async def bench_close_ticket(api: ApiRecorder, repeat: int, size: int) -> dict:
+    from cogs import ticket_system
+
+    guild = FakeGuild(api)
+    staff = guild.add_member("moderador", role_ids=[MOD_ROLE_ID])
+    creator = guild.add_member("jogador")
+    history_channel = FakeTextChannel(guild, "historico")
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    authors = (creator, staff)
+    messages = [FakeMessage(history_channel, authors[i % 2],
+                            f"Mensagem número {i} com um pouco de texto para simular uma conversa real.",
+                            created_at=start + timedelta(seconds=i))
+                for i in range(size)]
+    samples = []
+    async with make_bot(guild) as bot:
+        cog = ticket_system.TicketSystemCog(bot)
+        bot.cogs["TicketSystemCog"] = cog
+        log_channel = bot.resolver.get("closed_ticket_log", guild)
+        with skip_fixed_delays(api, ticket_system):
+            for run in range(repeat):
+                channel = guild.add_channel(FakeTextChannel(
+                    guild, f"ticket-jogador-{run}", guild.ticket_category, topic=f"Ticket de {creator.id}"))
+                channel.messages = messages
+                view = ticket_system.TicketControlView(cog)
+                interaction = FakeInteraction(bot, guild, staff, channel, "close_ticket_button")
+                api.reset()
+                started = time.perf_counter()
+                await view.close_ticket.callback(interaction)
+                samples.append(time.perf_counter() - started)
+                if guild.get_channel(channel.id):
+                    raise RuntimeError(f"Ticket de benchmark não foi fechado: {interaction.sent}")
+    # Embed de fechamento + arquivo da transcrição, em uma única mensagem
+    transcript_kib = 0.0
+    log_message = log_channel.last_sent
+    if log_message is not None and log_message.file is not None:
+        transcript_kib = round(log_message.file.fp.getbuffer().nbytes / 1024, 1)
+    return {"messages": size, **summarize(samples), "api_calls": api.snapshot(),
+            "transcript_kib": transcript_kib, "skipped_delay_s": api.skipped_delay}
+
+
+async def bench_start_whitelist(api: ApiRecorder, repeat: int, channels: int) -> dict:
+    from handlers.whitelist_channels import whitelist_channels
+    from views import whitelist_view
+
+    started_questionnaires = []
+
+    async def skip_questionnaire(member, channel, bot):
+        # O questionário tem cenário próprio; aqui só libera a vaga, como ele faria ao final
+        started_questionnaires.append(channel.id)
+        bot.whitelist_admission.release(member.id)
+
+    guild = FakeGuild(api, filler_channels=channels)
+    panel = guild.add_channel(FakeTextChannel(guild, "whitelist"))
+    first_click = None
+    samples = []
+    ack_samples = []
+    original = whitelist_view.start_admitted_questionnaire
+    whitelist_view.start_admitted_questionnaire = skip_questionnaire
+    try:
+        async with make_bot(guild) as bot:
+            view = whitelist_view.WhitelistView()
+            api.reset()
+            for run in range(repeat):
+                for click in range(CLICKS_PER_RUN):
+                    member = guild.add_member(f"Candidato Número {run}-{click} ✨")
+                    interaction = FakeInteraction(bot, guild, member, panel, "start_whitelist")
+                    loop = asyncio.get_running_loop()
+                    received = loop.time()
+                    started = time.perf_counter()
+                    await view.start_whitelist_button.callback(interaction)
+                    elapsed = time.perf_counter() - started
+                    await asyncio.sleep(0)  # Deixa a task do questionário (falsa) rodar
+                    if first_click is None:
+                        first_click = elapsed
+                    samples.append(elapsed)
+                    ack_samples.append(interaction.acked_at - received)
+                    # Mantém o servidor com o mesmo número de canais entre os cliques
+                    created = whitelist_channels.get(member.id)
+                    if created is None or not (interaction.sent[-1] or "").startswith("✅"):
+                        raise RuntimeError(f"Canal de whitelist não criado: {interaction.sent}")
+                    guild.remove_channel(guild.get_channel(created))
+                    whitelist_channels.discard_user(member.id)
+    finally:
+        whitelist_view.start_admitted_questionnaire = original
+    clicks = repeat * CLICKS_PER_RUN
+    return {"channels": channels, "clicks": clicks, "first_click_s": round(first_click, 6), **summarize(samples),
+            "ack_median_s": round(statistics.median(ack_samples), 6),
+            "questionnaires_started": len(started_questionnaires),
+            "api_calls_per_click": {route: round(count / clicks, 2) for route, count in api.snapshot().items()},
+            "resolver": bot.resolver.stats()}
+
+
+def bench_sanitize(repeat: int) -> dict:
+    from views.whitelist_view import sanitize_channel_name
+
+    rng = random.Random(42)
+    pieces = ("João", "Silva", "ジョン", "xX_Sniper_Xx", "Dr. Ana", "🔥Fogo🔥", "  espaços  ", "MAIÚSCULO",
+              "nome.com.pontos", "---", "Ñandú", "a" * 40)
+    names = [" ".join(rng.choice(pieces) for _ in range(rng.randint(1, 4))) for _ in range(SANITIZE_NAMES)]
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for name in names:
+            sanitize_channel_name(name)
+        samples.append(time.perf_counter() - started)
+    result = {"names": SANITIZE_NAMES, **summarize(samples)}
+    result["names_per_s"] = round(SANITIZE_NAMES / result["median_s"])
+    return result
+
+
+async def bench_member_join(api: ApiRecorder, repeat: int) -> dict:
+    import main
+    from cogs.verificacao import VerificacaoCog
+    from handlers.member_pipeline import MemberStage
+
+    samples = []
+    stats = {}
+    original_bot = main.bot
+    try:
+        for _ in range(repeat):
+            guild = FakeGuild(api)
+            members = [guild.add_member(f"raid-{n}") for n in range(JOIN_BURST)]
+            async with make_bot(guild) as bot:
+                # As mesmas etapas do CustomBot e do cog de verificação
+                main.bot = bot
+                bot.member_pipeline.register(MemberStage("cargo Visitante", main.grant_visitante_role))
+                bot.member_pipeline.register(MemberStage("log", lambda member: main.send_member_log(member, "join")))
+                await VerificacaoCog(bot).cog_load()
+                api.reset()
+                started = time.perf_counter()
+                for member in members:
+                    await main.on_member_join(member)
+                while bot.member_pipeline.processed < JOIN_BURST:
+                    await asyncio.sleep(0.001)
+                samples.append(time.perf_counter() - started)
+                stats = bot.member_pipeline.stats()
+                calls = api.snapshot()
+                stats["log_backlog"] = bot.log_sink.backlog
+    finally:
+        main.bot = original_bot
+    result = {"joins": JOIN_BURST, **summarize(samples)}
+    result["joins_per_s"] = round(JOIN_BURST / result["median_s"])
+    return {**result, "pipeline": stats, "api_calls": calls}
+# --- Fim: Cenários ---
+
+
+def scenarios(api: ApiRecorder, repeat: int):
+    """(nome, fábrica da corrotina ou função) na ordem de execução."""
+    yield "questionnaire", lambda: bench_questionnaire(api, repeat)
+    for size in TICKET_SIZES:
+        yield f"close_ticket_{size // 1000}k", lambda size=size: bench_close_ticket(api, repeat, size)
+    for channels in GUILD_SIZES:
+        yield f"start_whitelist_{channels}_channels", lambda channels=channels: bench_start_whitelist(api, repeat, channels)
+    yield "sanitize_channel_name", lambda: bench_sanitize(max(repeat, 5))
+    yield "member_join_burst", lambda: bench_member_join(api, repeat)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sem-git"
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparação com {baseline_path} (commit {baseline.get('commit', '?')}):")
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("median_s"):
+            print(f"  {name:<32} (sem referência)")
+            continue
+        ratio = result["median_s"] / old["median_s"]
+        flag = "  <-- mais lento" if ratio > 1.10 else ""
+        print(f"  {name:<32} {old['median_s']:.4f}s -> {result['median_s']:.4f}s ({ratio:.2f}x){flag}")
+
+
+async def run(names, repeat: int, latency: float) -> dict:
+    api = ApiRecorder(latency)
+    results = {}
+    for name, factory in scenarios(api, repeat):
+        if names and name not in names:
+            continue
+        outcome = factory()
+        if asyncio.iscoroutine(outcome):
+            outcome = await outcome
+        results[name] = outcome
+        print(f"{name:<32} mediana {outcome['median_s']:.4f}s ({outcome['runs']} execução(ões))")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline dos caminhos quentes do bot.")
+    parser.add_argument("--repeat", type=int, default=5, help="Execuções por cenário (padrão: 5)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência simulada por chamada à API, em ms")
+    parser.add_argument("--only", default="", help="Cenários separados por vírgula (padrão: todos)")
+    parser.add_argument("--output", default=None, help="Arquivo JSON (padrão: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    setup_logging()
+    names = {name.strip() for name in args.only.split(",") if name.strip()}
+    commit = git_commit()
+    results = asyncio.run(run(names, max(args.repeat, 1), args.latency / 1000))
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "discord_py": discord.__version__,
+        "platform": sys.platform,
+        "repeat": args.repeat,
+        "latency_ms": args.latency,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
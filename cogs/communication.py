@@ -3,63 +3,25 @@ from discord.ext import commands
 from discord import app_commands
 import os
 import logging
+import asyncio
 from datetime import datetime
 import traceback
-from typing import List, Set
+from typing import List
 
-# --- Início: Variáveis Globais e Carregamento de Configurações ---
-MESSAGE_ID_FILE = "data/comunicados_message_id.txt"
-COMUNICADOS_CHANNEL_ID = None
-AVISOS_CHANNEL_ID = None  # Novo canal de avisos
-ALLOWED_ROLE_IDS: Set[int] = set()
-
-try:
-    _channel_id_str = os.getenv("COMUNICADOS_ID")
-    if _channel_id_str:
-        COMUNICADOS_CHANNEL_ID = int(_channel_id_str)
-    else:
-        logging.error(
-            "COMUNICADOS_ID não definido no .env! O comando /comunicados pode não funcionar.")
-except (TypeError, ValueError):
-    logging.error("COMUNICADOS_ID inválido no .env! Deve ser um número.")
-    COMUNICADOS_CHANNEL_ID = None
+from utils.config import get_config
+from utils.interaction_ack import defer_response
 
-# Novo: carregar o ID do canal AVISOS
-try:
-    _avisos_id_str = os.getenv("AVISOS_ID")
-    if _avisos_id_str:
-        AVISOS_CHANNEL_ID = int(_avisos_id_str)
-    else:
-        logging.warning("AVISOS_ID não definido no .env! O comando /comunicados não funcionará no canal de avisos.")
-except (TypeError, ValueError):
-    logging.error("AVISOS_ID inválido no .env! Deve ser um número.")
-    AVISOS_CHANNEL_ID = None
-
-_allowed_roles_str = os.getenv("ALLOWED_MOD_ROLE_IDS", "")
-if _allowed_roles_str:
-    try:
-        ALLOWED_ROLE_IDS = {int(role_id.strip()) for role_id in _allowed_roles_str.split(
-            ',') if role_id.strip()}
-        if not ALLOWED_ROLE_IDS:
-            logging.warning(
-                "ALLOWED_MOD_ROLE_IDS está definido mas vazio ou contém apenas espaços/vírgulas.")
-        else:
-            logging.info(
-                f"Carregados IDs de cargos permitidos para /comunicados: {ALLOWED_ROLE_IDS}")
-    except ValueError:
-        logging.error(
-            "Erro ao converter ALLOWED_MOD_ROLE_IDS. Certifique-se de que são IDs numéricos separados por vírgula.")
-        ALLOWED_ROLE_IDS = set()
-else:
-    logging.warning(
-        "ALLOWED_MOD_ROLE_IDS não definido no .env. O comando /comunicados não terá restrição de cargo específica.")
+# --- Início: Variáveis Globais e Carregamento de Configurações ---
+MESSAGE_ID_FILE = "data/comunicados_message_id.txt"  # Legado: migrado para o banco
+MESSAGE_ID_STATE_KEY = "comunicados_message_id"
 # --- Fim: Variáveis Globais e Carregamento de Configurações ---
 
 
 # --- Início: Função de Verificação de Permissão (check_if_user_has_allowed_role) ---
 async def check_if_user_has_allowed_role(interaction: discord.Interaction) -> bool:
     """Verifica se o usuário possui algum dos cargos permitidos."""
-    if not ALLOWED_ROLE_IDS:
+    config = get_config()
+    if not config.mod_role_ids:
         logging.error(
             f"Tentativa de uso de /comunicados por {interaction.user}, mas nenhum cargo permitido foi configurado ou carregado (ALLOWED_MOD_ROLE_IDS).")
         return False
@@ -69,11 +31,9 @@ async def check_if_user_has_allowed_role(interaction: discord.Interaction) -> bo
             f"Tentativa de uso de /comunicados por usuário fora de um servidor? User: {interaction.user}")
         return False
 
-    user_role_ids = {role.id for role in interaction.user.roles}
-
-    if user_role_ids.isdisjoint(ALLOWED_ROLE_IDS):
+    if not config.is_moderator(interaction.user):
         logging.warning(
-            f"Usuário {interaction.user} (ID: {interaction.user.id}) tentou usar /comunicados sem um cargo permitido. Cargos: {user_role_ids}")
+            f"Usuário {interaction.user} (ID: {interaction.user.id}) tentou usar /comunicados sem um cargo permitido.")
         return False
     else:
         return True
@@ -86,74 +46,70 @@ class CommunicationCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.logger = logging.getLogger(f"{__name__}")
-        self.message_id = self._load_message_id()
+        self.message_id = None
+
+    async def cog_load(self):
+        self.message_id = await self._load_message_id()
         self.logger.info(
             f"Cog Communication carregado. ID da mensagem: {self.message_id}.")
     # --- Fim: Método Construtor __init__ ---
 
-    # --- Início: Métodos Auxiliares (_ensure_data_dir, _load_message_id, _save_message_id, _get_comunicados_channel) ---
-    def _ensure_data_dir(self):
-        if not os.path.exists("data"):
-            try:
-                os.makedirs("data")
-                self.logger.info("Diretório 'data' criado.")
-            except OSError as e:
-                self.logger.error(
-                    f"Não foi possível criar o diretório 'data': {e}")
-                return False
-        return True
-
-    def _load_message_id(self):
-        if not self._ensure_data_dir():
-            return None
+    # --- Início: Métodos Auxiliares (_load_message_id, _read_legacy_message_id, _save_message_id, _get_comunicados_channel) ---
+    async def _load_message_id(self):
         try:
-            if os.path.exists(MESSAGE_ID_FILE):
-                with open(MESSAGE_ID_FILE, "r") as f:
-                    content = f.read().strip()
-                    if content.isdigit():
-                        return int(content)
-                    else:
-                        self.logger.warning(
-                            f"Conteúdo inválido em {MESSAGE_ID_FILE}: '{content}'. Ignorando.")
-                        self._save_message_id(None)
-                        return None
+            stored = await self.bot.db.get_state(MESSAGE_ID_STATE_KEY)
+            if stored is None:
+                # Migração única do antigo arquivo texto para o banco
+                stored = await asyncio.to_thread(self._read_legacy_message_id)
+                if stored:
+                    await self._save_message_id(int(stored))
+                    self.logger.info(
+                        f"ID da mensagem migrado de {MESSAGE_ID_FILE} para o banco.")
+            if stored and stored.isdigit():
+                return int(stored)
+            if stored:
+                self.logger.warning(
+                    f"Conteúdo inválido salvo para o comunicado: '{stored}'. Ignorando.")
+                await self._save_message_id(None)
             return None
         except Exception as e:
             self.logger.error(
-                f"Erro ao carregar ID da mensagem de {MESSAGE_ID_FILE}: {e}")
+                f"Erro ao carregar ID da mensagem do banco: {e}")
             return None
 
-    def _save_message_id(self, message_id: int | None):
-        if not self._ensure_data_dir():
-            return
+    def _read_legacy_message_id(self) -> str | None:
+        if not os.path.exists(MESSAGE_ID_FILE):
+            return None
+        with open(MESSAGE_ID_FILE, "r") as f:
+            content = f.read().strip()
+        return content if content.isdigit() else None
+
+    async def _save_message_id(self, message_id: int | None):
         try:
-            with open(MESSAGE_ID_FILE, "w") as f:
-                if message_id:
-                    f.write(str(message_id))
-                    self.message_id = message_id
-                    self.logger.info(
-                        f"ID da mensagem {message_id} salvo em {MESSAGE_ID_FILE}.")
-                else:
-                    f.write("")
-                    self.message_id = None
-                    self.logger.info(
-                        f"ID da mensagem removido de {MESSAGE_ID_FILE}.")
+            await self.bot.db.set_state(MESSAGE_ID_STATE_KEY, message_id)
+            self.message_id = message_id
+            if message_id:
+                self.logger.info(
+                    f"ID da mensagem {message_id} salvo no banco.")
+            else:
+                self.logger.info("ID da mensagem removido do banco.")
         except Exception as e:
             self.logger.error(
-                f"Erro ao salvar ID da mensagem em {MESSAGE_ID_FILE}: {e}")
+                f"Erro ao salvar ID da mensagem no banco: {e}")
 
     async def _get_comunicados_channel(self) -> discord.TextChannel | None:
-        if not COMUNICADOS_CHANNEL_ID:
+        channel_id = get_config().comunicados_channel_id
+        if not channel_id:
             self.logger.error(
                 "ID do canal de comunicados não está configurado.")
             return None
-        channel = self.bot.get_channel(COMUNICADOS_CHANNEL_ID)
+        channel = self.bot.get_channel(channel_id)
         if not channel:
             try:
-                channel = await self.bot.fetch_channel(COMUNICADOS_CHANNEL_ID)
+                channel = await self.bot.fetch_channel(channel_id)
             except (discord.NotFound, discord.Forbidden) as e:
                 self.logger.error(
-                    f"Não foi possível encontrar ou acessar o canal de comunicados (ID: {COMUNICADOS_CHANNEL_ID}): {e}")
+                    f"Não foi possível encontrar ou acessar o canal de comunicados (ID: {channel_id}): {e}")
                 return None
             except Exception as e:
                 self.logger.error(
@@ -161,7 +117,7 @@ class CommunicationCog(commands.Cog):
                 return None
         if not isinstance(channel, discord.TextChannel):
             self.logger.error(
-                f"O ID {COMUNICADOS_CHANNEL_ID} não pertence a um canal de texto.")
+                f"O ID {channel_id} não pertence a um canal de texto.")
             return None
         return channel
     # --- Fim: Métodos Auxiliares ---
@@ -172,14 +128,11 @@ class CommunicationCog(commands.Cog):
     @app_commands.check(check_if_user_has_allowed_role)
     async def set_comunicado(self, interaction: discord.Interaction, texto: str):
         """Comando para definir ou atualizar a mensagem de comunicado."""
-        await interaction.response.defer(ephemeral=True, thinking=True)
+        await defer_response(interaction, ephemeral=True, thinking=True)
 
         # Permitir uso apenas nos canais COMUNICADOS ou AVISOS
-        canais_permitidos = set()
-        if COMUNICADOS_CHANNEL_ID:
-            canais_permitidos.add(COMUNICADOS_CHANNEL_ID)
-        if AVISOS_CHANNEL_ID:
-            canais_permitidos.add(AVISOS_CHANNEL_ID)
+        config = get_config()
+        canais_permitidos = config.comunicados_channel_ids
 
         if not canais_permitidos:
             await interaction.followup.send("❌ Nenhum canal permitido está configurado no bot.", ephemeral=True)
@@ -191,9 +144,9 @@ class CommunicationCog(commands.Cog):
             return
 
         # Determinar o canal alvo
-        if interaction.channel_id == COMUNICADOS_CHANNEL_ID:
+        if interaction.channel_id == config.comunicados_channel_id:
             target_channel = await self._get_comunicados_channel()
-        elif interaction.channel_id == AVISOS_CHANNEL_ID:
+        elif interaction.channel_id == config.avisos_channel_id:
             target_channel = interaction.channel  # Já está no canal correto
         else:
             target_channel = None
@@ -212,7 +165,7 @@ class CommunicationCog(commands.Cog):
             text=f"Atualizado por: {interaction.user.display_name}")
 
         # Se for no canal de comunicados, tenta editar a mensagem antiga
-        if interaction.channel_id == COMUNICADOS_CHANNEL_ID:
+        if interaction.channel_id == config.comunicados_channel_id:
             message_to_edit = None
             if self.message_id:
                 try:
@@ -222,8 +175,7 @@ class CommunicationCog(commands.Cog):
                 except discord.NotFound:
                     self.logger.warning(
                         f"Mensagem de comunicado {self.message_id} não encontrada. Enviando nova.")
-                    self._save_message_id(None)
-                    self.message_id = None
+                    await self._save_message_id(None)
                 except discord.Forbidden:
                     self.logger.error(
                         f"Sem permissão para buscar a mensagem {self.message_id} no canal {target_channel.name}.")
@@ -237,13 +189,13 @@ class CommunicationCog(commands.Cog):
 
             try:
                 if message_to_edit:
-                    await message_to_edit.edit(embed=embed)
+                    await self.bot.outbound.edit_message(message_to_edit, embed=embed)
                     self.logger.info(
                         f"Mensagem de comunicado {self.message_id} atualizada por {interaction.user}.")
                     await interaction.followup.send("✅ Comunicado atualizado com sucesso!", ephemeral=True)
                 else:
-                    new_message = await target_channel.send(embed=embed)
-                    self._save_message_id(new_message.id)
+                    new_message = await self.bot.outbound.send(target_channel, embed=embed)
+                    await self._save_message_id(new_message.id)
                     self.logger.info(
                         f"Nova mensagem de comunicado {self.message_id} enviada por {interaction.user}.")
                     await interaction.followup.send("✅ Comunicado enviado com sucesso!", ephemeral=True)
@@ -261,9 +213,9 @@ class CommunicationCog(commands.Cog):
                     f"Erro inesperado ao enviar/editar comunicado: {e}\n{traceback.format_exc()}")
                 await interaction.followup.send("❌ Ocorreu um erro inesperado.", ephemeral=True)
         # Se for no canal AVISOS, apenas envia a embed
-        elif interaction.channel_id == AVISOS_CHANNEL_ID:
+        elif interaction.channel_id == config.avisos_channel_id:
             try:
-                await target_channel.send(embed=embed)
+                await self.bot.outbound.send(target_channel, embed=embed)
                 await interaction.followup.send("✅ Comunicado enviado com sucesso no canal de avisos!", ephemeral=True)
             except discord.Forbidden:
                 self.logger.error(
@@ -283,7 +235,7 @@ class CommunicationCog(commands.Cog):
     @set_comunicado.error
     async def on_comunicado_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         if isinstance(error, app_commands.CheckFailure):
-            if not ALLOWED_ROLE_IDS:
+            if not get_config().mod_role_ids:
                 await interaction.response.send_message("❌ Erro de configuração: Nenhum cargo permitido foi definido para este comando. Contate um administrador.", ephemeral=True)
             else:
                 await interaction.response.send_message("❌ Você não possui um dos cargos necessários para usar este comando.", ephemeral=True)
@@ -308,12 +260,13 @@ class CommunicationCog(commands.Cog):
 
 # --- Início: Função setup (Carregamento do Cog) ---
 async def setup(bot: commands.Bot):
-    if COMUNICADOS_CHANNEL_ID is None:
+    config = get_config()
+    if config.comunicados_channel_id is None:
         logging.warning(
             "Cog Communication não será carregado pois COMUNICADOS_ID está ausente ou inválido.")
         return
 
-    if not ALLOWED_ROLE_IDS:
+    if not config.mod_role_ids:
         logging.warning(
             "ALLOWED_MOD_ROLE_IDS está vazio ou ausente no .env. O comando /comunicados ficará inacessível até que seja configurado.")
 
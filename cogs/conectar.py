@@ -4,6 +4,8 @@ from discord.ext import commands
 from datetime import datetime, timezone
 import logging
 
+from utils.interaction_ack import respond
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,7 +23,7 @@ class ConnectCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    @app_commands.command(name="connect", description="Mostra as informações de conexão ao servidor.")
+    @app_commands.command(name="connect", description="Mostra as informações de conexão ao servidor.", extras={"defer_ephemeral": False})
     async def connect(self, interaction: Interaction):
         try:
             embed = discord.Embed(
@@ -43,7 +45,7 @@ class ConnectCog(commands.Cog):
             embed.set_footer(text="Halion RP • Conexão Rápida")
 
             view = ConnectView()
-            await interaction.response.send_message(embed=embed, view=view)
+            await respond(interaction, embed=embed, view=view)
 
             logger.info(
                 f"/connect usado por {interaction.user} ({interaction.user.id})")
@@ -3,21 +3,16 @@ from discord import app_commands
 from discord.ext import commands
 import logging
 from typing import List
-import os
 
-# --- Início: Carregamento de Configurações ---
-ALLOWED_MOD_ROLE_IDS = list(
-    map(int, os.getenv("ALLOWED_MOD_ROLE_IDS", "").split(",")))
-# --- Fim: Carregamento de Configurações ---
+from utils.config import check_user_has_mod_role, reload_config
+from utils.interaction_ack import defer_response, respond
+from utils.log_sink import HIGH
 
 
 # --- Início: Função de Verificação de Cargo (check_allowed_roles) ---
 def check_allowed_roles():
-    async def predicate(interaction: discord.Interaction) -> bool:
-        if not interaction.user or not hasattr(interaction.user, "roles"):
-            return False
-        return any(role.id in ALLOWED_MOD_ROLE_IDS for role in interaction.user.roles)
-    return app_commands.check(predicate)
+    # Interseção com o snapshot atual (utils.config); acompanha /recarregar_config
+    return app_commands.check(check_user_has_mod_role)
 # --- Fim: Função de Verificação de Cargo ---
 
 
@@ -36,7 +31,7 @@ class ModeracaoCog(commands.Cog):
     @app_commands.checks.bot_has_permissions(manage_messages=True)
     @check_allowed_roles()
     async def excluir(self, interaction: discord.Interaction, quantidade: app_commands.Range[int, 1, 100]):
-        await interaction.response.defer(ephemeral=True, thinking=True)
+        await defer_response(interaction, ephemeral=True, thinking=True)
         channel = interaction.channel
 
         try:
@@ -47,29 +42,17 @@ class ModeracaoCog(commands.Cog):
             self.logger.info(
                 f"{interaction.user} ({interaction.user.id}) usou /excluir para apagar {num_deleted} mensagens em #{channel.name} ({channel.id})")
 
-            # Bloco para envio de log
-            logs_channel_id_str = os.getenv("LOGS_DISCORD")
-            if logs_channel_id_str:
-                try:
-                    logs_channel_id = int(logs_channel_id_str)
-                    log_channel = self.bot.get_channel(logs_channel_id)
-                    if log_channel:
-                        embed_log = discord.Embed(
-                            title="🗑️ Mensagens Excluídas",
-                            description=f"**{num_deleted}** mensagens foram excluídas em {channel.mention}.",
-                            color=discord.Color.orange(),
-                            timestamp=discord.utils.utcnow()
-                        )
-                        embed_log.add_field(
-                            name="Moderador", value=f"{interaction.user.mention} (`{interaction.user.id}`)", inline=False)
-                        embed_log.set_footer(text="Comando /excluir")
-                        await log_channel.send(embed=embed_log)
-                except ValueError:
-                    self.logger.error(
-                        f"LOGS_DISCORD ('{logs_channel_id_str}') é inválido no .env para log de moderação.")
-                except Exception as e_log:
-                    self.logger.error(
-                        f"Erro ao enviar log de exclusão para Discord: {e_log}", exc_info=True)
+            # Bloco para envio de log (agrupado pelo sink; canal resolvido no on_ready)
+            embed_log = discord.Embed(
+                title="🗑️ Mensagens Excluídas",
+                description=f"**{num_deleted}** mensagens foram excluídas em {channel.mention}.",
+                color=discord.Color.orange(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed_log.add_field(
+                name="Moderador", value=f"{interaction.user.mention} (`{interaction.user.id}`)", inline=False)
+            embed_log.set_footer(text="Comando /excluir")
+            self.bot.log_sink.log(embed_log, priority=HIGH, kind="exclusão de mensagens")
             # Fim do bloco para envio de log
 
         except discord.Forbidden:
@@ -119,6 +102,56 @@ class ModeracaoCog(commands.Cog):
                     pass
     # --- Fim: Tratador de Erros para /excluir ---
 
+    # --- Início: Comando de Aplicação /recarregar_config ---
+    @app_commands.command(name="recarregar_config", description="Relê o .env e aplica a nova configuração sem reiniciar o bot.")
+    @check_allowed_roles()
+    async def recarregar_config(self, interaction: discord.Interaction):
+        config, changed = reload_config()
+        # IDs de canais/cargos podem ter mudado
+        self.bot.resolver.invalidate()
+        # O canal de logs é o único serviço que guarda um canal resolvido
+        self.bot.log_sink.set_channel(config.logs_channel_id)
+        await self.bot.log_sink.resolve()
+        # Um limite maior de whitelists simultâneas libera a fila na hora
+        self.bot.whitelist_admission.rebalance()
+
+        embed = discord.Embed(
+            title="🔄 Configuração recarregada",
+            description="\n".join(f"• `{name}`" for name in changed) or "Nenhum valor alterado.",
+            color=discord.Color.orange() if config.problems else discord.Color.green(),
+            timestamp=discord.utils.utcnow()
+        )
+        if config.problems:
+            embed.add_field(
+                name="⚠️ Problemas", value="\n".join(f"• {p}" for p in config.problems)[:1024], inline=False)
+        await respond(interaction, embed=embed, ephemeral=True)
+        self.logger.info(
+            f"{interaction.user} ({interaction.user.id}) recarregou a configuração. Alterados: {', '.join(changed) or 'nenhum'}")
+
+        if changed:
+            embed_log = discord.Embed(
+                title="🔄 Configuração recarregada",
+                description=f"Campos alterados: {', '.join(changed)}"[:4000],
+                color=discord.Color.orange(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed_log.add_field(
+                name="Moderador", value=f"{interaction.user.mention} (`{interaction.user.id}`)", inline=False)
+            self.bot.log_sink.log(embed_log, priority=HIGH, kind="recarga de configuração")
+
+    @recarregar_config.error
+    async def recarregar_config_error_handler(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CheckFailure):
+            self.logger.warning(
+                f"Usuário {interaction.user} tentou usar /recarregar_config sem cargo permitido.")
+            await interaction.response.send_message("🚫 Você não tem permissão para usar este comando (cargo não autorizado).", ephemeral=True)
+        else:
+            self.logger.error(
+                f"Erro não tratado no handler de /recarregar_config: {error}", exc_info=True)
+            if not interaction.response.is_done():
+                await interaction.response.send_message("❌ Ocorreu um erro inesperado.", ephemeral=True)
+    # --- Fim: Comando de Aplicação /recarregar_config ---
+
 # --- Fim: Definição da Classe Cog 'ModeracaoCog' ---
 
 
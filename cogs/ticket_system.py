@@ -1,81 +1,91 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
 import logging
 from datetime import datetime, timezone
 import asyncio
 # import csv # Removido
 import io
 
+from database.models import Ticket
+from handlers.session_backend import end_session, session_backend
+from handlers.ticket_registry import TicketRegistry, parse_ticket_creator
+from handlers.transcript import render_transcript
+from utils.config import get_config
+from utils.interaction_ack import TrackedView, defer_response, respond
+from utils.metrics import timed_handler
+
 # --- Funções Auxiliares ---
 
 
-def has_allowed_role(user: discord.Member, allowed_ids: list[int]) -> bool:
-    if not allowed_ids:
-        return False
-    user_role_ids = {role.id for role in user.roles}
-    return any(role_id in user_role_ids for role_id in allowed_ids)
+def add_transcript_summary(embed: discord.Embed, summary) -> None:
+    """Adiciona ao embed de fechamento o resumo da transcrição."""
+    embed.add_field(name="Mensagens", value=str(summary.messages), inline=True)
+    embed.add_field(name="Anexos", value=str(summary.attachments), inline=True)
+    if summary.first_at and summary.last_at:
+        embed.add_field(
+            name="Período", value=f"<t:{int(summary.first_at.timestamp())}:f> → <t:{int(summary.last_at.timestamp())}:f>", inline=False)
+    if summary.participants:
+        top = summary.participants.most_common(10)
+        lines = [f"<@{uid}> — {count}" if uid else f"{name} — {count}" for (uid, name), count in top]
+        if len(summary.participants) > len(top):
+            lines.append(f"(+{len(summary.participants) - len(top)})")
+        embed.add_field(
+            name=f"Participantes ({len(summary.participants)})", value="\n".join(lines), inline=False)
+
+def ticket_overwrites(guild: discord.Guild, mod_roles, user: discord.Member = None) -> dict:
+    """Permissões do canal de ticket; sem `user`, a base (staff e bot) usada pelo pool."""
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False),
+        guild.me: discord.PermissionOverwrite(
+            read_messages=True, send_messages=True, manage_channels=True, manage_messages=True, read_message_history=True, attach_files=True)
+    }
+    if user:
+        overwrites[user] = discord.PermissionOverwrite(
+            read_messages=True, send_messages=True, attach_files=True, embed_links=True, read_message_history=True)
+    for mod_role in mod_roles:
+        overwrites[mod_role] = discord.PermissionOverwrite(
+            read_messages=True, send_messages=True, manage_messages=True, attach_files=True, embed_links=True, read_message_history=True, manage_channels=False)
+    return overwrites
 
-# REMOVIDA: Função generate_transcript_csv
 
 # --- Views Persistentes ---
 
 
-class TicketControlView(discord.ui.View):
+class TicketControlView(TrackedView):
     def __init__(self, cog_instance):
         super().__init__(timeout=None)
         self.cog = cog_instance
 
     @discord.ui.button(label="Fechar Ticket", style=discord.ButtonStyle.danger, custom_id="close_ticket_button")
+    @timed_handler("close_ticket_button")
     async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         guild = interaction.guild
         channel = interaction.channel
         user = interaction.user
 
-        if not isinstance(user, discord.Member) or not isinstance(channel, discord.TextChannel):
+        if not isinstance(user, discord.Member) or not isinstance(channel, (discord.TextChannel, discord.Thread)):
             try:
-                await interaction.response.send_message("Ocorreu um erro.", ephemeral=True)
+                await respond(interaction, "Ocorreu um erro.", ephemeral=True)
             except discord.HTTPException:
                 pass
             return
 
-        if not has_allowed_role(user, self.cog.allowed_mod_role_ids):
-            await interaction.response.send_message("Apenas membros da equipe staff podem fechar este ticket.", ephemeral=True)
+        if not get_config().is_moderator(user):
+            await respond(interaction, "Apenas membros da equipe staff podem fechar este ticket.", ephemeral=True)
             return
 
         if not self.cog.ticket_category_id or not self.cog.allowed_mod_role_ids:
-            await interaction.response.send_message("Erro crítico na configuração do bot.", ephemeral=True)
+            await respond(interaction, "Erro crítico na configuração do bot.", ephemeral=True)
             return
 
         # Defer inicial
-        await interaction.response.defer(ephemeral=True, thinking=True)
-
-        # --- Buscar Histórico para Transcript ---
-        messages = []
-        try:
-            async for message in channel.history(limit=None, oldest_first=True):
-                messages.append(message)
-            logging.info(
-                f"Histórico de {len(messages)} mensagens obtido para {channel.name}.")
-        except discord.Forbidden:
-            logging.error(
-                f"Sem permissão para ler histórico do canal {channel.id} para transcript.")
-            messages = None  # Indica que não foi possível obter o histórico
-        except discord.HTTPException as e:
-            logging.error(
-                f"Erro HTTP ao buscar histórico do canal {channel.id}: {e}")
-            messages = None
-        except Exception as e:
-            logging.exception(
-                f"Erro inesperado ao buscar histórico do canal {channel.id}:")
-            messages = None
+        await defer_response(interaction, ephemeral=True, thinking=True)
 
         # --- Enviar Embed Inicial de Fechamento ---
         closed_log_channel = None
         if self.cog.closed_ticket_log_channel_id:
-            closed_log_channel = guild.get_channel(
-                self.cog.closed_ticket_log_channel_id)
+            closed_log_channel = self.cog.bot.resolver.get("closed_ticket_log", guild)
             # Validações do canal de log
             if not closed_log_channel or not isinstance(closed_log_channel, discord.TextChannel):
                 logging.warning(
@@ -95,17 +105,17 @@ class TicketControlView(discord.ui.View):
         )
         embed_log_closed.add_field(
             name="Fechado por", value=user.mention, inline=True)
-        # Lógica para buscar criador
+        # Criador vem do registro (sem chamada à API); nome do canal é só fallback
         creator_mention = "Não identificado"
         creator_id = "N/A"
-        if channel.name.startswith("ticket-"):
-            try:
-                creator_id = channel.name.split('-')[-1]
-                user_id_int = int(creator_id)
-                ticket_creator = await guild.fetch_member(user_id_int)
-                creator_mention = ticket_creator.mention if ticket_creator else f"ID: {creator_id} (Não enc.)"
-            except Exception:
-                pass
+        ticket = self.cog.registry.get(channel.id)
+        creator_id_int = ticket.creator_id if ticket else parse_ticket_creator(channel)
+        if creator_id_int:
+            creator_id = str(creator_id_int)
+            creator_mention = f"<@{creator_id_int}>"
+        if ticket:
+            embed_log_closed.add_field(
+                name="Aberto em", value=f"<t:{int(ticket.opened_at.timestamp())}:F>", inline=True)
         embed_log_closed.add_field(
             name="Criado por", value=creator_mention, inline=True)
         embed_log_closed.add_field(
@@ -114,120 +124,70 @@ class TicketControlView(discord.ui.View):
             name="ID do Canal", value=f"`{channel.id}`", inline=False)
         embed_log_closed.set_footer(text="Horário do Fechamento (UTC)")
 
-        # Envia o Embed inicial (se o canal de log for válido)
-        embed_sent_ok = False
+        # --- Gerar Transcript (arquivo único em memória) ---
+        # O histórico é lido em streaming e escrito direto no buffer; o envio é
+        # uma única mensagem (embed + anexo), independente do tamanho do ticket.
+        transcript_file = None
+        transcript_error = None
         if closed_log_channel:
             try:
-                await closed_log_channel.send(embed=embed_log_closed)
+                buffer, filename, summary = await render_transcript(
+                    channel.history(limit=None, oldest_first=True),
+                    title=f"#{channel.name}",
+                    fmt=self.cog.transcript_format,
+                    compress=self.cog.transcript_gzip)
+                add_transcript_summary(embed_log_closed, summary)
+                if buffer is None:
+                    embed_log_closed.add_field(
+                        name="Transcrição", value="*Nenhuma mensagem encontrada no ticket.*", inline=False)
+                elif buffer.getbuffer().nbytes > guild.filesize_limit:
+                    transcript_error = f"⚠️ Transcrição ({buffer.getbuffer().nbytes // 1024} KiB) excede o limite de upload do servidor."
+                else:
+                    transcript_file = discord.File(buffer, filename=filename)
                 logging.info(
-                    f"Embed de fechamento do ticket {channel.name} enviado para {closed_log_channel.name}.")
-                embed_sent_ok = True
+                    f"Transcrição de {channel.name} gerada: {summary.messages} mensagens, {len(summary.participants)} participantes.")
             except discord.Forbidden:
                 logging.error(
-                    f"Sem permissão para enviar embed de fechamento para {closed_log_channel.name}.")
+                    f"Sem permissão para ler histórico do canal {channel.id} para transcript.")
+                transcript_error = "⚠️ Não foi possível gerar a transcrição (sem permissão para ler o histórico)."
             except discord.HTTPException as e:
                 logging.error(
-                    f"Erro HTTP ao enviar embed de fechamento para {closed_log_channel.name}: {e}")
-            except Exception as e:
+                    f"Erro HTTP ao buscar histórico do canal {channel.id}: {e}")
+                transcript_error = f"⚠️ Erro ({e.status}) ao ler o histórico do ticket."
+            except Exception:
                 logging.exception(
-                    f"Erro inesperado ao enviar embed de fechamento para {closed_log_channel.name}:")
+                    f"Erro inesperado ao gerar a transcript do canal {channel.id}:")
+                transcript_error = "⚠️ Erro inesperado ao gerar a transcrição."
+            if transcript_error:
+                embed_log_closed.add_field(
+                    name="Transcrição", value=transcript_error, inline=False)
 
-        # --- MODIFICADO: Enviar Transcript como Mensagens ---
+        # Envia Embed + Transcript em uma única mensagem (se o canal de log for válido)
         transcript_sent_ok = False
-        # Só envia transcript se o embed foi ok e o histórico foi pego
-        if closed_log_channel and messages is not None and embed_sent_ok:
-            if not messages:
-                try:
-                    await closed_log_channel.send("*Nenhuma mensagem encontrada no ticket para transcrever.*")
-                    transcript_sent_ok = True  # Considera sucesso se não havia nada a enviar
-                except Exception as e:
-                    logging.error(
-                        f"Erro ao enviar msg 'Nenhuma mensagem' para {closed_log_channel.name}: {e}")
-            else:
-                transcript_chunks = []
-                current_chunk = "```\n--- Transcrição do Ticket ---\n\n"  # Inicia bloco de código
-                char_limit = 1950  # Limite seguro por chunk
-
-                for msg in messages:
-                    # Formata a linha da mensagem
-                    aware_dt = msg.created_at.astimezone(timezone.utc)
-                    timestamp = aware_dt.strftime("%d/%m/%Y %H:%M:%S UTC")
-                    author = str(msg.author)
-                    # Evita quebrar o bloco de código com ``` dentro da msg
-                    content = msg.clean_content.replace(
-                        '`', '\\`') if msg.clean_content else "(mensagem vazia)"
-                    attachments_str = ""
-                    if msg.attachments:
-                        # Lista apenas nomes de anexos
-                        attachments_list = [
-                            f"[Anexo: {att.filename}]" for att in msg.attachments]
-                        attachments_str = "\n  " + \
-                            "\n  ".join(attachments_list)
-
-                    # Simplifica embeds para texto
-                    embeds_str = ""
-                    if msg.embeds:
-                        embeds_str = f"\n  [Embed: {msg.embeds[0].title if msg.embeds[0].title else '(sem título)'}]"
-
-                    formatted_line = f"[{timestamp}] {author}:\n  {content}{attachments_str}{embeds_str}\n\n"
-
-                    # Verifica tamanho do chunk
-                    if len(current_chunk) + len(formatted_line) > char_limit:
-                        # Fecha chunk atual e inicia novo
-                        current_chunk += "```"
-                        transcript_chunks.append(current_chunk)
-                        current_chunk = "```\n"  # Começa novo bloco
-
-                    current_chunk += formatted_line
-
-                # Adiciona último chunk
-                current_chunk += "--- Fim da Transcrição ---\n```"
-                transcript_chunks.append(current_chunk)
-
-                # Envia os chunks
-                logging.info(
-                    f"Enviando transcrição de {channel.name} em {len(transcript_chunks)} chunks para {closed_log_channel.name}...")
-                all_chunks_sent = True
-                try:
-                    for i, chunk in enumerate(transcript_chunks):
-                        await closed_log_channel.send(chunk)
-                        logging.debug(
-                            f"Chunk {i+1}/{len(transcript_chunks)} enviado para {closed_log_channel.name}.")
-                        # Delay entre mensagens para evitar rate limit
-                        await asyncio.sleep(0.7)
-                    transcript_sent_ok = True
-                    logging.info(
-                        f"Transcrição completa de {channel.name} enviada com sucesso.")
-                except discord.Forbidden:
-                    logging.error(
-                        f"Sem permissão para enviar chunks da transcript para {closed_log_channel.name}.")
-                    all_chunks_sent = False
-                    await closed_log_channel.send("⚠️ *Não foi possível enviar a transcrição completa (sem permissão).*")
-                except discord.HTTPException as e:
-                    logging.error(
-                        f"Erro HTTP ao enviar chunks da transcript para {closed_log_channel.name}: {e}")
-                    all_chunks_sent = False
-                    await closed_log_channel.send(f"⚠️ *Erro ({e.status}) ao enviar a transcrição completa.*")
-                except Exception as e:
-                    logging.exception(
-                        f"Erro inesperado ao enviar chunks da transcript para {closed_log_channel.name}:")
-                    all_chunks_sent = False
-                    try:
-                        await closed_log_channel.send("⚠️ *Erro inesperado ao enviar a transcrição completa.*")
-                    except Exception:
-                        pass  # Ignora se não conseguir nem enviar o erro
-
-        elif messages is None and closed_log_channel:  # Se houve erro ao buscar histórico
+        if closed_log_channel:
             try:
-                await closed_log_channel.send("⚠️ *Não foi possível gerar a transcrição (erro ao ler histórico do ticket).*")
+                if transcript_file:
+                    await self.cog.bot.outbound.send(closed_log_channel, embed=embed_log_closed, file=transcript_file)
+                else:
+                    await self.cog.bot.outbound.send(closed_log_channel, embed=embed_log_closed)
+                transcript_sent_ok = transcript_error is None
+                logging.info(
+                    f"Embed de fechamento do ticket {channel.name} enviado para {closed_log_channel.name}.")
+            except discord.Forbidden:
+                logging.error(
+                    f"Sem permissão para enviar embed/transcript de fechamento para {closed_log_channel.name}.")
+            except discord.HTTPException as e:
+                logging.error(
+                    f"Erro HTTP ao enviar embed/transcript de fechamento para {closed_log_channel.name}: {e}")
             except Exception:
-                pass
+                logging.exception(
+                    f"Erro inesperado ao enviar embed/transcript de fechamento para {closed_log_channel.name}:")
 
         # --- Mensagem de Aviso e Deleção do Canal ---
         closing_embed = discord.Embed(
             title="🚨 Fechando Ticket", description=f"Este ticket será **excluído** em 5 segundos por {user.mention}.\nUma transcrição foi salva (se aplicável).", color=discord.Color.orange())
         try:
-            await channel.send(embed=closing_embed)
+            await self.cog.bot.outbound.send(channel, embed=closing_embed)
         except discord.HTTPException:
             pass
         await asyncio.sleep(5)
@@ -236,18 +196,19 @@ class TicketControlView(discord.ui.View):
         delete_reason = f"Ticket fechado por {user.name} ({user.id})"
         followup_message = "Ticket fechado e transcrição enviada (se aplicável)." if transcript_sent_ok else "Ticket fechado (falha ao enviar transcrição)."
         try:
-            await channel.delete(reason=delete_reason)
+            # Canal do pool volta para ele (limpo); os demais são apagados
+            await end_session(self.cog.bot, channel, self.cog.bot.channel_pools["ticket"], reason=delete_reason)
+            self.cog.registry.close(channel.id)
             logging.info(
                 f"Canal de ticket excluído: {channel.name} ({channel.id})")
             # Log Simples
             if self.cog.ticket_log_channel_id and self.cog.ticket_log_channel_id != self.cog.closed_ticket_log_channel_id:
-                log_channel_simple = guild.get_channel(
-                    self.cog.ticket_log_channel_id)
+                log_channel_simple = self.cog.bot.resolver.get("ticket_log", guild)
                 if log_channel_simple and isinstance(log_channel_simple, discord.TextChannel):
                     embed_simple = discord.Embed(description=f"🎫 Ticket `#{channel.name}` fechado por {user.mention}.", color=discord.Color.red(
                     ), timestamp=datetime.now(timezone.utc))
                     try:
-                        await log_channel_simple.send(embed=embed_simple)
+                        await self.cog.bot.outbound.send(log_channel_simple, embed=embed_simple)
                     except Exception:
                         pass
         except discord.Forbidden:
@@ -267,19 +228,20 @@ class TicketControlView(discord.ui.View):
             pass
 
 
-class CreateTicketView(discord.ui.View):
+class CreateTicketView(TrackedView):
     def __init__(self, cog_instance):
         super().__init__(timeout=None)
         self.cog = cog_instance
 
     @discord.ui.button(label="Abrir Ticket", style=discord.ButtonStyle.primary, custom_id="create_ticket_button", emoji="🎫")
+    @timed_handler("create_ticket_button")
     async def create_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         guild = interaction.guild
         user = interaction.user
 
         if not isinstance(user, discord.Member):
             return  # Deve ser membro
-        await interaction.response.defer(ephemeral=True, thinking=True)
+        await defer_response(interaction, ephemeral=True, thinking=True)
 
         # Validação de config
         if not self.cog.ticket_category_id or not self.cog.allowed_mod_role_ids:
@@ -287,7 +249,7 @@ class CreateTicketView(discord.ui.View):
                 f"Criação ticket falhou (user: {user.id}): Config ausente no Cog.")
             await interaction.followup.send("Erro: Sistema de tickets não configurado.", ephemeral=True)
             return
-        category = guild.get_channel(self.cog.ticket_category_id)
+        category = self.cog.bot.resolver.get("ticket_category", guild)
         allowed_mod_roles = [guild.get_role(r_id)
                              for r_id in self.cog.allowed_mod_role_ids]
         # Filtra roles não encontrados
@@ -298,32 +260,36 @@ class CreateTicketView(discord.ui.View):
             await interaction.followup.send("Erro: Configuração de categoria/cargos inválida.", ephemeral=True)
             return
 
-        # Verifica ticket existente
+        # Verifica ticket existente (registro em memória, O(1))
         ticket_channel_name = f"ticket-{user.id}"
-        existing_channel = discord.utils.get(
-            guild.text_channels, name=ticket_channel_name, category=category)
-        if existing_channel:
-            await interaction.followup.send(f"Você já tem um ticket aberto: {existing_channel.mention if existing_channel else '#' + ticket_channel_name}", ephemeral=True)
+        existing_ticket = self.cog.registry.get_by_creator(user.id)
+        if existing_ticket:
+            existing_channel = guild.get_channel_or_thread(existing_ticket.channel_id)
+            if existing_channel:
+                await interaction.followup.send(f"Você já tem um ticket aberto: {existing_channel.mention}", ephemeral=True)
+                return
+            # Canal sumiu sem o evento de remoção: corrige o registro
+            self.cog.registry.close(existing_ticket.channel_id)
+        if not self.cog.registry.reserve(user.id):
+            await interaction.followup.send("⏳ Seu ticket já está sendo criado. Aguarde alguns segundos.", ephemeral=True)
             return
 
         # Permissões
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            user: discord.PermissionOverwrite(read_messages=True, send_messages=True, attach_files=True, embed_links=True, read_message_history=True),
-            guild.me: discord.PermissionOverwrite(
-                read_messages=True, send_messages=True, manage_channels=True, manage_messages=True, read_message_history=True, attach_files=True)
-        }
-        for mod_role in allowed_mod_roles:
-            overwrites[mod_role] = discord.PermissionOverwrite(
-                read_messages=True, send_messages=True, manage_messages=True, attach_files=True, embed_links=True, read_message_history=True, manage_channels=False)
+        overwrites = ticket_overwrites(guild, allowed_mod_roles, user)
 
         # Criação do Canal
         try:
             topic = f"Ticket de {user.name} ({user.id}) | Criado em: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}"
-            channel = await guild.create_text_channel(
-                name=ticket_channel_name, category=category, overwrites=overwrites,
+            # Canal na categoria ou thread privada no canal pai, conforme SESSION_BACKEND
+            backend = session_backend(guild, category, get_config().ticket_thread_parent_id,
+                                      self.cog.bot.channel_pools["ticket"])
+            channel = await backend.create(
+                guild, ticket_channel_name, user, overwrites=overwrites,
                 topic=topic, reason=f"Ticket criado por {user.name}"
             )
+            container_id = channel.parent_id if isinstance(channel, discord.Thread) else category.id
+            self.cog.registry.open(
+                Ticket(channel.id, user.id, datetime.now(timezone.utc), container_id))
             logging.info(
                 f"Ticket criado: {channel.name} ({channel.id}) por {user.name}")
 
@@ -339,7 +305,8 @@ class CreateTicketView(discord.ui.View):
                 [r.mention for r in allowed_mod_roles]) if allowed_mod_roles else "a equipe"
             # Passa o cog para a view de controle
             control_view = TicketControlView(self.cog)
-            await channel.send(
+            await self.cog.bot.outbound.send(
+                channel,
                 content=f"{user.mention}, seu ticket foi criado!",
                 embed=embed_ticket, view=control_view
             )
@@ -347,7 +314,7 @@ class CreateTicketView(discord.ui.View):
 
             # Log Simples Opcional
             if self.cog.ticket_log_channel_id:
-                log_channel = guild.get_channel(self.cog.ticket_log_channel_id)
+                log_channel = self.cog.bot.resolver.get("ticket_log", guild)
                 if log_channel and isinstance(log_channel, discord.TextChannel):
                     embed_log = discord.Embed(
                         title="🎫 Novo Ticket Aberto", description=f"{user.mention} em {channel.mention}",
@@ -358,7 +325,7 @@ class CreateTicketView(discord.ui.View):
                     embed_log.add_field(
                         name="Chan ID", value=f"`{channel.id}`", inline=True)
                     try:
-                        await log_channel.send(embed=embed_log)
+                        await self.cog.bot.outbound.send(log_channel, embed=embed_log)
                     except Exception:
                         pass  # Ignora erro no log simples
 
@@ -368,56 +335,48 @@ class CreateTicketView(discord.ui.View):
                 await interaction.followup.send("Erro inesperado ao criar o ticket.", ephemeral=True)
             except discord.HTTPException:
                 pass  # Ignora se interação expirar
+        finally:
+            self.cog.registry.release_reservation(user.id)
 
 
 # --- Cog Principal ---
 class TicketSystemCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.ticket_category_id = None
-        self.allowed_mod_role_ids = []
-        self.closed_ticket_log_channel_id = None
-        self.ticket_log_channel_id = None
-        self.load_config()  # Carrega config na inicialização
-
-    def load_config(self):
-        """Carrega a configuração do .env para atributos da instância."""
-        try:
-            # Essenciais
-            cat_id_str = os.getenv("TICKET_CATEGORY_ID")
-            if not cat_id_str:
-                raise ValueError("TICKET_CATEGORY_ID não definido no .env")
-            self.ticket_category_id = int(cat_id_str)
-
-            allowed_ids_str = os.getenv("ALLOWED_MOD_ROLE_IDS")
-            if not allowed_ids_str:
-                raise ValueError("ALLOWED_MOD_ROLE_IDS não definido no .env")
-            self.allowed_mod_role_ids = [
-                int(r.strip()) for r in allowed_ids_str.split(',') if r.strip()]
-            if not self.allowed_mod_role_ids:
-                raise ValueError("ALLOWED_MOD_ROLE_IDS vazio ou mal formatado")
-
-            # Opcionais
-            cl_id = os.getenv("CLOSED_TICKET_LOG_CHANNEL_ID")
-            self.closed_ticket_log_channel_id = int(cl_id) if cl_id else None
-            tl_id = os.getenv("TICKET_LOG_CHANNEL_ID")
-            self.ticket_log_channel_id = int(tl_id) if tl_id else None
-
-            logging.info("Configuração do TicketSystem carregada com sucesso.")
-
-        except (ValueError, TypeError) as e:  # Pega erros de conversão e ausência
-            logging.critical(
-                f"!!! TicketSystem: Erro CRÍTICO ao carregar configuração: {e}")
-            # Garante que os valores essenciais sejam resetados em caso de erro
-            self.ticket_category_id = None
-            self.allowed_mod_role_ids = []
-            self.closed_ticket_log_channel_id = None
-            self.ticket_log_channel_id = None
+        self.registry = TicketRegistry(bot.db)
+
+    async def cog_load(self):
+        await self.registry.load()
+
+    # --- Configuração (lida do snapshot atual; acompanha /recarregar_config) ---
+    @property
+    def ticket_category_id(self):
+        return get_config().ticket_category_id
+
+    @property
+    def allowed_mod_role_ids(self):
+        return get_config().mod_role_ids
+
+    @property
+    def closed_ticket_log_channel_id(self):
+        return get_config().closed_ticket_log_channel_id
+
+    @property
+    def ticket_log_channel_id(self):
+        return get_config().ticket_log_channel_id
+
+    @property
+    def transcript_format(self):
+        return get_config().transcript_format
+
+    @property
+    def transcript_gzip(self):
+        return get_config().transcript_gzip
 
     @commands.Cog.listener()
     async def on_ready(self):
-        # Valida se a configuração essencial foi carregada com sucesso no __init__
-        if not self.ticket_category_id or not self.allowed_mod_role_ids:
+        # Valida se a configuração essencial foi carregada com sucesso
+        if not get_config().tickets_enabled:
             logging.error(
                 "!!! TicketSystem INATIVO: Falha ao carregar configuração essencial do .env.")
         else:
@@ -431,6 +390,13 @@ class TicketSystemCog(commands.Cog):
             else:
                 log_status += " (SEM log geral)"
             logging.info(f"Cog TicketSystem carregado e {log_status}.")
+            # Corrige divergências do registro (tickets criados/apagados com o bot fora do ar)
+            guild = self.bot.get_guild(self.bot.guild_id)
+            if guild:
+                self.registry.reconcile(guild, self.ticket_category_id, get_config().ticket_thread_parent_id)
+                mod_roles = [r for r in map(guild.get_role, self.allowed_mod_role_ids) if r]
+                self.bot.channel_pools["ticket"].load(
+                    self.bot.resolver.get("ticket_category", guild), ticket_overwrites(guild, mod_roles))
             # Registra as views aqui, somente se a config estiver OK
             try:
                 self.bot.add_view(CreateTicketView(self))
@@ -440,6 +406,18 @@ class TicketSystemCog(commands.Cog):
             except Exception as e:
                 logging.exception("Erro ao registrar views do TicketSystem:")
 
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        # Ticket apagado manualmente (fora do botão de fechar)
+        if self.registry.close(channel.id):
+            logging.info(f"Ticket {channel.name} ({channel.id}) removido do registro após exclusão do canal.")
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        # Backend de threads: a thread pode não estar no cache, basta o ID
+        if self.registry.close(payload.thread_id):
+            logging.info(f"Ticket (thread {payload.thread_id}) removido do registro após exclusão da thread.")
+
     @commands.hybrid_command(name="setup_ticket", description="Configura a mensagem para abrir tickets em um canal.")
     @app_commands.describe(canal="O canal onde a mensagem de criação de ticket será enviada.")
     @commands.has_permissions(administrator=True)
@@ -1,64 +1,72 @@
 import discord
 from discord import Interaction, app_commands, Forbidden, NotFound
 from discord.ext import commands
-from views.whitelist_view import WhitelistView
-import os
+from views.whitelist_view import WhitelistView, whitelist_overwrites
+from views.whitelist_modal import load_modal_drafts
+from views.whitelist_history_view import WhitelistHistoryView, build_history_embed, fetch_attempt_page
+from database.models import WhitelistAttempt
+from handlers.questionnaire import resume_questionnaires
+from handlers.whitelist_channels import whitelist_channels
+from utils.config import check_user_has_mod_role, get_config
+from utils.interaction_ack import defer_response, respond
 import logging
 
-# --- Início: Carregamento de Configurações e Verificações Iniciais ---
-
-WHITELIST_CHANNEL_ID = None
-try:
-    _whitelist_id_str = os.getenv("WHITELIST_ID")
-    if _whitelist_id_str:
-        WHITELIST_CHANNEL_ID = int(_whitelist_id_str)
-        logging.info(
-            f"ID do canal de Whitelist carregado: {WHITELIST_CHANNEL_ID}")
-    else:
-        logging.error(
-            "WHITELIST_ID não definido no .env! O comando /whitelist não funcionará.")
-except (TypeError, ValueError):
-    logging.error("WHITELIST_ID inválido no .env! Deve ser um número inteiro.")
-    WHITELIST_CHANNEL_ID = None
-
-
-try:
-    from cogs.verificacao import check_user_has_mod_role
-    logging.info(
-        "Função check_user_has_mod_role importada de cogs.verificacao.")
-except ImportError:
-    logging.critical(
-        "Falha ao importar 'check_user_has_mod_role' de cogs.verificacao. Verifique a estrutura de pastas e o arquivo.")
-    # --- Início: Função Fallback de Verificação de Cargo ---
-
-    async def check_user_has_mod_role(interaction: Interaction) -> bool:
-        logging.error(
-            "Função check_user_has_mod_role (fallback) ativada devido a erro de importação!")
-        if not interaction.response.is_done():
-            try:
-                await interaction.response.send_message("❌ Erro crítico de configuração do bot (verificação de permissão). Contate um administrador.", ephemeral=True)
-            except Exception:
-                pass
-        return False
-    # --- Fim: Função Fallback de Verificação de Cargo ---
-
 logger = logging.getLogger(__name__)
 
-# --- Fim: Carregamento de Configurações e Verificações Iniciais ---
-
 
 # --- Início: Definição da Classe Cog 'Whitelist' ---
 class Whitelist(commands.Cog):
     # --- Início: Método Construtor __init__ ---
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.whitelist_channel_id = WHITELIST_CHANNEL_ID
+        self._resumed = False  # on_ready se repete a cada reconexão; a retomada é única
         logger.info(
             f"Whitelist Cog iniciado. Canal alvo ID: {self.whitelist_channel_id or 'NÃO CONFIGURADO!'}")
     # --- Fim: Método Construtor __init__ ---
 
+    async def cog_load(self):
+        # Rascunhos do modo modal sobrevivem ao reinício (o banco já está aberto aqui)
+        await load_modal_drafts(self.bot.db)
+
+    @property
+    def whitelist_channel_id(self):
+        return get_config().whitelist_channel_id
+
+    # --- Início: Listeners do Índice de Canais de Whitelist ---
+    @commands.Cog.listener()
+    async def on_ready(self):
+        guild = self.bot.get_guild(self.bot.guild_id)
+        if guild:
+            whitelist_channels.rebuild(guild)
+            if not self._resumed:
+                self._resumed = True
+                self.bot.channel_pools["whitelist"].load(
+                    self.bot.resolver.get("whitelist_category", guild), whitelist_overwrites(guild))
+                await resume_questionnaires(self.bot, guild, whitelist_channels.open_channels())
+        else:
+            logger.warning(
+                "Servidor principal não encontrado no cache; índice de canais de whitelist não foi montado.")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        whitelist_channels.on_channel_create(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        whitelist_channels.on_channel_update(before, after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        whitelist_channels.on_channel_delete(channel)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        # Backend de threads: a thread pode não estar no cache, basta o ID
+        whitelist_channels.on_channel_delete(discord.Object(id=payload.thread_id))
+    # --- Fim: Listeners do Índice de Canais de Whitelist ---
+
     # --- Início: Comando de Aplicação /whitelist ---
-    @app_commands.command(name="whitelist", description="Envia a mensagem de whitelist para o canal correto.")
+    @app_commands.command(name="whitelist", description="Envia a mensagem de whitelist para o canal correto.", extras={"defer_ephemeral": False})
     @app_commands.check(check_user_has_mod_role)
     async def whitelist(self, interaction: discord.Interaction):
         """Envia o painel de whitelist com botão"""
@@ -66,22 +74,22 @@ class Whitelist(commands.Cog):
         if self.whitelist_channel_id is None:
             logger.error(
                 f"Usuário {interaction.user} tentou usar /whitelist, mas WHITELIST_ID não está configurado ou é inválido.")
-            if not interaction.response.is_done():
-                await interaction.response.send_message(
-                    "❌ **Erro de Configuração:** O canal para o comando whitelist não foi definido corretamente no bot. Avise um administrador.",
-                    ephemeral=True
-                )
+            await respond(
+                interaction,
+                "❌ **Erro de Configuração:** O canal para o comando whitelist não foi definido corretamente no bot. Avise um administrador.",
+                ephemeral=True
+            )
             return
 
         if interaction.channel_id != self.whitelist_channel_id:
             correct_channel_mention = f"<#{self.whitelist_channel_id}>"
             logger.warning(
                 f"Usuário {interaction.user} tentou usar /whitelist no canal errado ({interaction.channel.name}/{interaction.channel_id}). Canal correto: {self.whitelist_channel_id}")
-            if not interaction.response.is_done():
-                await interaction.response.send_message(
-                    f"⚠️ **Canal Incorreto!** Este comando só pode ser utilizado no canal {correct_channel_mention}.",
-                    ephemeral=True
-                )
+            await respond(
+                interaction,
+                f"⚠️ **Canal Incorreto!** Este comando só pode ser utilizado no canal {correct_channel_mention}.",
+                ephemeral=True
+            )
             return
 
         try:
@@ -105,7 +113,7 @@ class Whitelist(commands.Cog):
                 ),
                 color=discord.Color.blue()
             )
-            await interaction.response.send_message(embed=embed, view=WhitelistView())
+            await respond(interaction, embed=embed, view=WhitelistView())
             logger.info(
                 f"Comando /whitelist executado com sucesso por {interaction.user} no canal {interaction.channel.name}")
 
@@ -144,6 +152,46 @@ class Whitelist(commands.Cog):
                     f"Erro ao tentar enviar mensagem de erro genérico (whitelist): {resp_e}")
     # --- Fim: Comando de Aplicação /whitelist ---
 
+    # --- Início: Comando de Aplicação /whitelist_historico ---
+    @app_commands.command(name="whitelist_historico", description="Mostra as tentativas de whitelist anteriores de um usuário.")
+    @app_commands.describe(usuario="Usuário cujo histórico de whitelist será exibido.")
+    @app_commands.check(check_user_has_mod_role)
+    async def whitelist_historico(self, interaction: discord.Interaction, usuario: discord.User):
+        """Exibe o histórico de whitelist paginado (uma tentativa por página)."""
+        await defer_response(interaction, ephemeral=True, thinking=True)
+
+        total_row = await self.bot.db.fetchone(WhitelistAttempt.COUNT_BY_USER, (usuario.id,))
+        total = total_row["total"] if total_row else 0
+        if not total:
+            await interaction.followup.send(f"ℹ️ {usuario.mention} não possui tentativas de whitelist registradas.", ephemeral=True)
+            return
+
+        attempt, answers = await fetch_attempt_page(self.bot.db, usuario.id)
+        embed = build_history_embed(usuario, attempt, answers, 1, total)
+        view = WhitelistHistoryView(self.bot.db, interaction.user.id, usuario, attempt, total)
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+        logger.info(
+            f"{interaction.user} consultou o histórico de whitelist de {usuario} ({usuario.id}): {total} tentativa(s).")
+    # --- Fim: Comando de Aplicação /whitelist_historico ---
+
+    # --- Início: Comando de Aplicação /whitelist_fila ---
+    @app_commands.command(name="whitelist_fila", description="Mostra as sessões de whitelist ativas e a fila de espera.")
+    @app_commands.check(check_user_has_mod_role)
+    async def whitelist_fila(self, interaction: discord.Interaction):
+        """Métricas do controle de admissão (WHITELIST_MAX_SESSIONS)."""
+        stats = self.bot.whitelist_admission.stats()
+        embed = discord.Embed(title="📊 Fila da Whitelist", color=discord.Color.blurple(),
+                              timestamp=discord.utils.utcnow())
+        embed.add_field(name="Sessões ativas",
+                        value=f"{stats['active']} / {stats['limit'] or '∞'}", inline=True)
+        embed.add_field(name="Na fila", value=f"{stats['queued']} (pico: {stats['max_queue']})", inline=True)
+        embed.add_field(name="Espera", value=f"média {stats['wait_avg']:.0f}s | máx. {stats['wait_max']:.0f}s", inline=True)
+        embed.add_field(name="Admitidos", value=str(stats["admitted"]), inline=True)
+        embed.add_field(name="Enfileirados", value=str(stats["queued_total"]), inline=True)
+        embed.add_field(name="Desistências (tempo)", value=str(stats["timeouts"]), inline=True)
+        await respond(interaction, embed=embed, ephemeral=True)
+    # --- Fim: Comando de Aplicação /whitelist_fila ---
+
     # --- Início: Tratador de Erros do Cog (cog_app_command_error) ---
     async def cog_app_command_error(self, interaction: Interaction, error: app_commands.AppCommandError):
         """Trata erros para os comandos de aplicativo neste Cog, principalmente CheckFailure."""
@@ -190,18 +238,13 @@ class Whitelist(commands.Cog):
 
 # --- Início: Função setup (Carregamento do Cog) ---
 async def setup(bot: commands.Bot):
-    if WHITELIST_CHANNEL_ID is None:
+    if get_config().whitelist_channel_id is None:
         logging.error("*"*50)
         logging.error(
             "Cog Whitelist NÃO será carregado porque WHITELIST_ID está ausente ou inválido no .env.")
         logging.error("*"*50)
         return
 
-    if 'check_user_has_mod_role' not in globals() or not callable(check_user_has_mod_role):
-        logging.warning("*"*50)
-        logging.warning("Cog Whitelist será carregado, mas a função de verificação de cargo 'check_user_has_mod_role' não foi importada corretamente (usando fallback). A permissão pode não funcionar como esperado.")
-        logging.warning("*"*50)
-
     await bot.add_cog(Whitelist(bot))
     logger.info("Cog Whitelist carregado com sucesso.")
 # --- Fim: Função setup (Carregamento do Cog) ---
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from database.database import Database
+
+# --- Configurações ---
+ATTEMPT_ID_STATE_KEY = "whitelist_attempt_id_hwm"
+ATTEMPT_ID_BLOCK_SIZE = 50
+LEGACY_ATTEMPT_ID_FILE = "whitelist_last_attempt_id.txt"  # Legado: migrado para o banco
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptIdAllocator:
+    """Distribui IDs de tentativa de whitelist sem ler/escrever arquivo a cada conclusão.
+
+    O contador fica em memória. Como o event loop é single-thread, a leitura e o
+    incremento em `allocate()` acontecem sem nenhum `await` entre eles, então
+    tasks concorrentes nunca recebem o mesmo ID. Para ser seguro contra quedas,
+    o bot só entrega IDs até uma marca d'água (high-water mark) já gravada no
+    banco; os IDs são reservados em blocos e a próxima reserva é feita em
+    segundo plano antes que o bloco atual acabe. Após um restart, a contagem
+    recomeça acima da última marca gravada (IDs não usados do bloco são pulados).
+    """
+
+    def __init__(self, db: Database, block_size: int = ATTEMPT_ID_BLOCK_SIZE):
+        self.db = db
+        self.block_size = block_size
+        self._next = 1
+        self._limit = 0  # Último ID já garantido no banco (inclusivo)
+        self._reserve_task: Optional[asyncio.Task] = None
+
+    async def load(self, legacy_file: str = LEGACY_ATTEMPT_ID_FILE):
+        """Define o ponto de partida a partir do banco e do arquivo legado."""
+        stored = await self.db.get_state(ATTEMPT_ID_STATE_KEY)
+        row = await self.db.fetchone("SELECT MAX(attempt_id) AS last_id FROM whitelist_attempts")
+        legacy = await asyncio.to_thread(self._read_legacy_file, legacy_file)
+        last_used = max(int(stored or 0), (row["last_id"] if row else None) or 0, legacy)
+        self._next = last_used + 1
+        self._limit = last_used
+        logger.info(f"Alocador de IDs de tentativa iniciado. Próximo ID: {self._next}")
+
+    @staticmethod
+    def _read_legacy_file(path: str) -> int:
+        try:
+            if path and os.path.exists(path):
+                with open(path, "r") as f:
+                    content = f.read().strip()
+                    return int(content) if content else 0
+        except (IOError, ValueError) as e:
+            logger.error(f"Erro ao ler o arquivo legado de ID de tentativa ({path}): {e}")
+        return 0
+
+    @property
+    def reserved_remaining(self) -> int:
+        return max(self._limit - self._next + 1, 0)
+
+    async def allocate(self) -> int:
+        """Retorna um novo ID de tentativa, único mesmo entre tasks concorrentes."""
+        while self._next > self._limit:
+            await self._reserve_block()
+        attempt_id = self._next
+        self._next += 1
+        # Reserva o próximo bloco antes de esgotar o atual, fora do caminho crítico
+        if self.reserved_remaining < self.block_size // 4 and self._reserve_task is None:
+            self._start_reserve()
+        return attempt_id
+
+    def _start_reserve(self) -> asyncio.Task:
+        self._reserve_task = asyncio.create_task(self._persist_block())
+        self._reserve_task.add_done_callback(self._reserve_done)
+        return self._reserve_task
+
+    def _reserve_done(self, task: asyncio.Task):
+        # Roda antes de quem aguarda a reserva: a próxima alocação já tenta de novo
+        if self._reserve_task is task:
+            self._reserve_task = None
+        if not task.cancelled() and task.exception():
+            logger.error(f"Falha ao reservar bloco de IDs de tentativa: {task.exception()}. "
+                         "Nova tentativa na próxima alocação.")
+
+    async def _reserve_block(self):
+        # Todas as tasks que esgotaram o bloco aguardam a mesma reserva
+        task = self._reserve_task or self._start_reserve()
+        await asyncio.shield(task)
+
+    async def _persist_block(self):
+        new_limit = max(self._limit, self._next - 1) + self.block_size
+        await self.db.set_state(ATTEMPT_ID_STATE_KEY, str(new_limit))
+        self._limit = new_limit
+        logger.debug(f"Bloco de IDs de tentativa reservado até {new_limit}.")
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from database.models import SCHEMA, BotState
+
+# --- Configurações ---
+DB_PATH = os.path.join("data", "halion.db")
+WRITE_BATCH_MAX = 256  # Máximo de operações agrupadas em um único COMMIT
+STATEMENT_CACHE_SIZE = 256  # Statements preparados mantidos por conexão
+
+logger = logging.getLogger(__name__)
+
+
+class Database:
+    """Armazenamento SQLite assíncrono.
+
+    Nenhuma operação de disco roda no event loop: as leituras usam uma conexão
+    própria em uma thread dedicada e todas as escritas passam por uma fila
+    consumida por uma única task escritora, que agrupa as operações pendentes
+    em uma só transação (group commit) executada na thread de escrita.
+    O banco roda em modo WAL, então leituras não bloqueiam a escrita.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
+        # Uma thread por conexão: o sqlite3 não deve compartilhar conexões entre threads.
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-reader")
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    # --- Início: Ciclo de Vida ---
+    async def connect(self):
+        """Abre as conexões, aplica o esquema e inicia a task escritora."""
+        loop = asyncio.get_running_loop()
+        self._write_conn = await loop.run_in_executor(self._write_executor, self._open, True)
+        self._read_conn = await loop.run_in_executor(self._read_executor, self._open, False)
+        self._writer_task = asyncio.create_task(self._writer_loop(), name="db-writer")
+        logger.info(f"Banco de dados aberto em {self.path} (WAL).")
+
+    def _open(self, writer: bool) -> sqlite3.Connection:
+        if writer:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA foreign_keys = ON")
+        if writer:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+        return conn
+
+    async def close(self):
+        """Processa as escritas pendentes e fecha as conexões."""
+        if self._closing:
+            return
+        self._closing = True
+        if self._writer_task:
+            await self._queue.put(None)  # Sentinela: encerra a task após drenar a fila
+            await self._writer_task
+        loop = asyncio.get_running_loop()
+        if self._write_conn:
+            await loop.run_in_executor(self._write_executor, self._write_conn.close)
+        if self._read_conn:
+            await loop.run_in_executor(self._read_executor, self._read_conn.close)
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+        logger.info("Banco de dados fechado.")
+    # --- Fim: Ciclo de Vida ---
+
+    # --- Início: Escrita (fila + task única) ---
+    @property
+    def pending_writes(self) -> int:
+        return self._queue.qsize()
+
+    def _submit(self, ops: List[Tuple[str, Any, bool]]) -> asyncio.Future:
+        if self._closing or self._writer_task is None:
+            raise RuntimeError("Banco de dados não está aberto para escrita.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((ops, future))
+        return future
+
+    def execute_nowait(self, sql: str, params: Sequence = ()) -> asyncio.Future:
+        """Enfileira uma escrita sem aguardar o COMMIT (fire-and-forget).
+        Erros são apenas registrados no log."""
+        future = self._submit([(sql, params, False)])
+        future.add_done_callback(self._log_nowait_error)
+        return future
+
+    @staticmethod
+    def _log_nowait_error(future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            logger.error(f"Erro em escrita assíncrona (nowait): {future.exception()}")
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Enfileira uma escrita e aguarda o COMMIT. Retorna o lastrowid."""
+        return await self._submit([(sql, params, False)])
+
+    async def executemany(self, sql: str, seq_of_params: Iterable[Sequence]) -> int:
+        """Enfileira uma escrita em lote e aguarda o COMMIT."""
+        return await self._submit([(sql, list(seq_of_params), True)])
+
+    async def transaction(self, ops: Iterable[Tuple[str, Any]]) -> int:
+        """Executa várias escritas de forma atômica. Cada item é (sql, params);
+        params pode ser uma lista de tuplas para usar executemany."""
+        batch = [(sql, params, isinstance(params, list)) for sql, params in ops]
+        return await self._submit(batch)
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        stop = False
+        while not stop:
+            item = await self._queue.get()
+            batch = []
+            if item is None:
+                stop = True
+            else:
+                batch.append(item)
+            # Agrupa tudo o que já estiver na fila em uma única transação.
+            while len(batch) < WRITE_BATCH_MAX and not self._queue.empty():
+                extra = self._queue.get_nowait()
+                if extra is None:
+                    stop = True
+                    continue
+                batch.append(extra)
+            if batch:
+                await self._flush(loop, batch)
+
+    async def _flush(self, loop, batch):
+        try:
+            results = await loop.run_in_executor(self._write_executor, self._run_batch, batch)
+        except Exception as e:
+            # Uma operação ruim não pode derrubar o lote inteiro: repete uma a uma.
+            logger.error(f"Erro no lote de escrita ({len(batch)} operações), repetindo individualmente: {e}")
+            for ops, future in batch:
+                try:
+                    result = await loop.run_in_executor(self._write_executor, self._run_batch, [(ops, future)])
+                    if not future.done():
+                        future.set_result(result[0])
+                except Exception as e_single:
+                    if not future.done():
+                        future.set_exception(e_single)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _run_batch(self, batch) -> List[int]:
+        conn = self._write_conn
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for ops, _ in batch:
+                cursor = None
+                for sql, params, many in ops:
+                    cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+                results.append(cursor.lastrowid if cursor else 0)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+    # --- Fim: Escrita ---
+
+    # --- Início: Leitura ---
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, lambda: self._read_conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, lambda: self._read_conn.execute(sql, params).fetchall())
+    # --- Fim: Leitura ---
+
+    # --- Início: Estado do Bot (chave/valor) ---
+    async def get_state(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = await self.fetchone(BotState.SELECT, (key,))
+        return BotState.from_row(row).value if row else default
+
+    async def set_state(self, key: str, value: Optional[str]):
+        if value is None:
+            await self.execute(BotState.DELETE, (key,))
+        else:
+            await self.execute(BotState.UPSERT, (key, str(value)))
+    # --- Fim: Estado do Bot ---
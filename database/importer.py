@@ -0,0 +1,182 @@
+"""Importação única do `whitelist_respostas.csv` legado para o banco.
+
+O arquivo é lido em streaming, em lotes de linhas, então a memória usada não
+depende do tamanho do CSV. Linhas já importadas (ou gravadas pelo write-behind)
+são ignoradas pelas chaves primárias, o que torna a importação idempotente.
+
+O contador legado de AttemptID (ler, somar e gravar um arquivo) podia repetir
+IDs. Uma tentativa cujo ID já pertence a outra (outro usuário ou outro horário)
+é renumerada com um ID novo em vez de ser mesclada à primeira, e o total de
+renumeradas vai para o log.
+
+Uso manual (na raiz do projeto):
+    python -m database.importer [caminho_do_csv]
+"""
+import asyncio
+import csv
+import logging
+import os
+import sys
+from datetime import datetime, tzinfo
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from database.database import Database
+from database.models import WhitelistAnswer, WhitelistAttempt, to_db_time
+
+# --- Configurações ---
+CSV_IMPORTED_STATE_KEY = "whitelist_csv_imported"
+IMPORT_BATCH_ROWS = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _read_batch(reader, size: int) -> List[list]:
+    batch = []
+    for row in reader:
+        batch.append(row)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+def _parse_local_time(value: str, local_tz: tzinfo) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=local_tz)
+
+
+class _AttemptRekeyer:
+    """Detecta AttemptIDs repetidos pelo contador legado e renumera as tentativas.
+
+    A dona de um ID é identificada por (usuário, horário de conclusão). Só os
+    IDs do lote são consultados no banco, e só as tentativas renumeradas
+    (raras) ficam em memória.
+    """
+
+    def __init__(self, db: Database, allocate: Optional[Callable[[], Awaitable[int]]]):
+        self.db = db
+        self.allocate = allocate
+        self.owners: Dict[int, Tuple[int, str]] = {}  # Donos dos IDs do lote atual
+        self.rekeyed: Dict[Tuple[int, int, str], int] = {}  # (id antigo, usuário, horário) -> id novo
+        self._next_free: Optional[int] = None
+        self._max_seen = 0
+
+    async def load_owners(self, attempt_ids: List[int]):
+        self.owners = {}
+        for start in range(0, len(attempt_ids), 500):  # Limite de parâmetros do SQLite
+            chunk = attempt_ids[start:start + 500]
+            rows = await self.db.fetchall(
+                f"SELECT attempt_id, user_id, completed_at FROM whitelist_attempts "
+                f"WHERE attempt_id IN ({', '.join('?' * len(chunk))})", chunk)
+            self.owners.update({row["attempt_id"]: (row["user_id"], row["completed_at"]) for row in rows})
+        if attempt_ids:
+            self._max_seen = max(self._max_seen, max(attempt_ids))
+
+    async def _fresh_id(self) -> int:
+        if self.allocate is not None:
+            return await self.allocate()
+        if self._next_free is None:
+            row = await self.db.fetchone("SELECT MAX(attempt_id) AS last_id FROM whitelist_attempts")
+            self._next_free = ((row["last_id"] if row else None) or 0) + 1
+        self._next_free = max(self._next_free, self._max_seen + 1)
+        attempt_id = self._next_free
+        self._next_free += 1
+        return attempt_id
+
+    async def resolve(self, attempt_id: int, user_id: int, completed_at: datetime) -> int:
+        """ID com que a tentativa deve ser gravada (o original, ou um novo se houver conflito)."""
+        identity = (user_id, to_db_time(completed_at))
+        owner = self.owners.setdefault(attempt_id, identity)
+        if owner == identity:
+            return attempt_id
+        key = (attempt_id, *identity)
+        if key not in self.rekeyed:
+            # Renumerada numa importação anterior (--force): reaproveita o mesmo ID
+            row = await self.db.fetchone(
+                "SELECT attempt_id FROM whitelist_attempts WHERE user_id = ? AND completed_at = ? AND attempt_id != ?",
+                (user_id, identity[1], attempt_id))
+            if row:
+                self.rekeyed[key] = self.owners[row["attempt_id"]] = row["attempt_id"]
+                return row["attempt_id"]
+            self.rekeyed[key] = new_id = await self._fresh_id()
+            self.owners[new_id] = identity
+            logger.warning(f"AttemptID {attempt_id} repetido (já pertence ao usuário {owner[0]}); "
+                           f"tentativa do usuário {user_id} renumerada para {new_id}.")
+        return self.rekeyed[key]
+
+
+async def import_whitelist_csv(db: Database, csv_path: str, local_tz: tzinfo,
+                               batch_rows: int = IMPORT_BATCH_ROWS, force: bool = False,
+                               allocate: Optional[Callable[[], Awaitable[int]]] = None) -> Optional[int]:
+    """Importa o CSV para o banco uma única vez. Retorna o número de linhas lidas,
+    ou None se a importação já tiver sido feita (ou o arquivo não existir).
+
+    `allocate` fornece IDs para as tentativas renumeradas (com o bot rodando, o
+    `AttemptIdAllocator`, para não colidir com IDs novos); sem ele, usa o
+    próximo ID acima do maior já visto.
+    """
+    if not force and await db.get_state(CSV_IMPORTED_STATE_KEY):
+        return None
+    if not os.path.exists(csv_path):
+        await db.set_state(CSV_IMPORTED_STATE_KEY, "1")
+        return None
+
+    logger.info(f"Importando histórico de whitelist de {csv_path}...")
+    total_rows = 0
+    skipped = 0
+    rekeyer = _AttemptRekeyer(db, allocate)
+    file = await asyncio.to_thread(open, csv_path, "r", newline="", encoding="utf-8")
+    try:
+        reader = csv.reader(file)
+        header = await asyncio.to_thread(next, reader, None)
+        if header is None:
+            await db.set_state(CSV_IMPORTED_STATE_KEY, "1")
+            return 0
+        while True:
+            rows = await asyncio.to_thread(_read_batch, reader, batch_rows)
+            if not rows:
+                break
+            parsed = []
+            for row in rows:
+                try:
+                    attempt_id, completed_local, user_id, username, number, question, answer = row
+                    parsed.append((int(attempt_id), _parse_local_time(completed_local, local_tz), int(user_id),
+                                   username, int(number), question, answer))
+                except ValueError:
+                    skipped += 1
+            await rekeyer.load_owners(sorted({row[0] for row in parsed}))
+            attempts = {}
+            answers = []
+            for attempt_id, completed_at, user_id, username, number, question, answer in parsed:
+                attempt_id = await rekeyer.resolve(attempt_id, user_id, completed_at)
+                if attempt_id not in attempts:
+                    attempts[attempt_id] = WhitelistAttempt(attempt_id, user_id, username, completed_at)
+                answers.append(WhitelistAnswer(attempt_id, number, question, answer))
+            await db.transaction([
+                (WhitelistAttempt.INSERT, [attempt.to_params() for attempt in attempts.values()]),
+                (WhitelistAnswer.INSERT, [answer.to_params() for answer in answers]),
+            ])
+            total_rows += len(rows)
+    finally:
+        await asyncio.to_thread(file.close)
+
+    await db.set_state(CSV_IMPORTED_STATE_KEY, "1")
+    logger.info(f"Importação concluída: {total_rows} linhas lidas, {skipped} ignoradas (formato inválido), "
+                f"{len(rekeyer.rekeyed)} tentativa(s) com AttemptID repetido renumerada(s).")
+    return total_rows
+
+
+async def _main(csv_path: str) -> int:
+    from handlers.questionnaire import BRASILIA_TZ
+
+    db = Database()
+    await db.connect()
+    try:
+        total = await import_whitelist_csv(db, csv_path, BRASILIA_TZ, force=True)
+        print(f"{total or 0} linhas processadas.")
+    finally:
+        await db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "whitelist_respostas.csv")))
@@ -0,0 +1,230 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+# --- Início: Esquema do Banco ---
+# Todas as tabelas usam IDs do Discord (snowflakes) como INTEGER e datas em
+# ISO-8601 UTC, para que a ordenação textual coincida com a cronológica.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS whitelist_attempts (
+    attempt_id      INTEGER PRIMARY KEY,
+    user_id         INTEGER NOT NULL,
+    username        TEXT    NOT NULL,
+    completed_at    TEXT    NOT NULL
+);
+
+-- Histórico por usuário: busca e paginação pelo índice, sem varrer a tabela
+CREATE INDEX IF NOT EXISTS idx_whitelist_attempts_user
+    ON whitelist_attempts (user_id, attempt_id);
+
+CREATE TABLE IF NOT EXISTS whitelist_answers (
+    attempt_id      INTEGER NOT NULL REFERENCES whitelist_attempts(attempt_id),
+    question_number INTEGER NOT NULL,
+    question_text   TEXT    NOT NULL,
+    answer_text     TEXT    NOT NULL,
+    PRIMARY KEY (attempt_id, question_number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tickets (
+    channel_id      INTEGER PRIMARY KEY,
+    creator_id      INTEGER NOT NULL,
+    opened_at       TEXT    NOT NULL,
+    category_id     INTEGER,
+    closed_at       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS whitelist_cooldowns (
+    user_id         INTEGER PRIMARY KEY,
+    expires_at      TEXT    NOT NULL
+);
+
+-- Progresso dos questionários em andamento (retomados após reinício do bot)
+CREATE TABLE IF NOT EXISTS questionnaire_checkpoints (
+    channel_id      INTEGER PRIMARY KEY,
+    user_id         INTEGER NOT NULL,
+    question_index  INTEGER NOT NULL,
+    answers         TEXT    NOT NULL,
+    deadline        TEXT    NOT NULL
+);
+
+-- Rascunhos do modo modal (retomados por um novo clique no painel, inclusive após reinício)
+CREATE TABLE IF NOT EXISTS modal_drafts (
+    user_id         INTEGER PRIMARY KEY,
+    page            INTEGER NOT NULL,
+    answers         TEXT    NOT NULL,
+    deadline        TEXT    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bot_state (
+    key             TEXT PRIMARY KEY,
+    value           TEXT
+) WITHOUT ROWID;
+"""
+# --- Fim: Esquema do Banco ---
+
+
+def to_db_time(dt: datetime) -> str:
+    """Converte um datetime para o formato ISO-8601 UTC usado no banco."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def from_db_time(value: Optional[str]) -> Optional[datetime]:
+    """Converte o texto ISO-8601 salvo no banco de volta para datetime (UTC)."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+# --- Início: Modelos ---
+@dataclass(frozen=True)
+class WhitelistAttempt:
+    attempt_id: int
+    user_id: int
+    username: str
+    completed_at: datetime
+
+    INSERT = ("INSERT OR IGNORE INTO whitelist_attempts "
+              "(attempt_id, user_id, username, completed_at) VALUES (?, ?, ?, ?)")
+    COUNT_BY_USER = "SELECT COUNT(*) AS total FROM whitelist_attempts WHERE user_id = ?"
+    # Paginação por chave (keyset): cada página é uma busca direta no índice (user_id, attempt_id)
+    SELECT_OLDER = ("SELECT * FROM whitelist_attempts WHERE user_id = ? AND attempt_id < ? "
+                    "ORDER BY attempt_id DESC LIMIT 1")
+    SELECT_NEWER = ("SELECT * FROM whitelist_attempts WHERE user_id = ? AND attempt_id > ? "
+                    "ORDER BY attempt_id ASC LIMIT 1")
+
+    def to_params(self) -> tuple:
+        return (self.attempt_id, self.user_id, self.username, to_db_time(self.completed_at))
+
+    @classmethod
+    def from_row(cls, row) -> "WhitelistAttempt":
+        return cls(row["attempt_id"], row["user_id"], row["username"], from_db_time(row["completed_at"]))
+
+
+@dataclass(frozen=True)
+class WhitelistAnswer:
+    attempt_id: int
+    question_number: int
+    question_text: str
+    answer_text: str
+
+    INSERT = ("INSERT OR IGNORE INTO whitelist_answers "
+              "(attempt_id, question_number, question_text, answer_text) VALUES (?, ?, ?, ?)")
+    SELECT_BY_ATTEMPT = "SELECT * FROM whitelist_answers WHERE attempt_id = ? ORDER BY question_number"
+
+    def to_params(self) -> tuple:
+        return (self.attempt_id, self.question_number, self.question_text, self.answer_text)
+
+    @classmethod
+    def from_row(cls, row) -> "WhitelistAnswer":
+        return cls(row["attempt_id"], row["question_number"], row["question_text"], row["answer_text"])
+
+
+@dataclass(frozen=True)
+class Ticket:
+    channel_id: int
+    creator_id: int
+    opened_at: datetime
+    category_id: Optional[int] = None
+    closed_at: Optional[datetime] = None
+
+    UPSERT = ("INSERT INTO tickets (channel_id, creator_id, opened_at, category_id, closed_at) "
+              "VALUES (?, ?, ?, ?, ?) ON CONFLICT(channel_id) DO UPDATE SET "
+              "creator_id = excluded.creator_id, opened_at = excluded.opened_at, "
+              "category_id = excluded.category_id, closed_at = excluded.closed_at")
+    SELECT_OPEN = "SELECT * FROM tickets WHERE closed_at IS NULL"
+
+    def to_params(self) -> tuple:
+        return (self.channel_id, self.creator_id, to_db_time(self.opened_at), self.category_id,
+                to_db_time(self.closed_at) if self.closed_at else None)
+
+    @classmethod
+    def from_row(cls, row) -> "Ticket":
+        return cls(row["channel_id"], row["creator_id"], from_db_time(row["opened_at"]),
+                   row["category_id"], from_db_time(row["closed_at"]))
+
+
+@dataclass(frozen=True)
+class Cooldown:
+    user_id: int
+    expires_at: datetime
+
+    UPSERT = ("INSERT INTO whitelist_cooldowns (user_id, expires_at) VALUES (?, ?) "
+              "ON CONFLICT(user_id) DO UPDATE SET expires_at = excluded.expires_at")
+    SELECT_ACTIVE = "SELECT user_id, expires_at FROM whitelist_cooldowns WHERE expires_at > ?"
+    DELETE_EXPIRED = "DELETE FROM whitelist_cooldowns WHERE expires_at <= ?"
+    DELETE_IF_EXPIRED = "DELETE FROM whitelist_cooldowns WHERE user_id = ? AND expires_at <= ?"
+
+    def to_params(self) -> tuple:
+        return (self.user_id, to_db_time(self.expires_at))
+
+    @classmethod
+    def from_row(cls, row) -> "Cooldown":
+        return cls(row["user_id"], from_db_time(row["expires_at"]))
+
+
+@dataclass(frozen=True)
+class QuestionnaireCheckpoint:
+    channel_id: int
+    user_id: int
+    question_index: int  # Perguntas já respondidas (índice da próxima)
+    answers: Tuple[Tuple[str, str], ...]  # (pergunta, resposta), em JSON no banco
+    deadline: datetime
+
+    UPSERT = ("INSERT INTO questionnaire_checkpoints (channel_id, user_id, question_index, answers, deadline) "
+              "VALUES (?, ?, ?, ?, ?) ON CONFLICT(channel_id) DO UPDATE SET "
+              "user_id = excluded.user_id, question_index = excluded.question_index, "
+              "answers = excluded.answers, deadline = excluded.deadline")
+    SELECT_ALL = "SELECT * FROM questionnaire_checkpoints"
+    DELETE = "DELETE FROM questionnaire_checkpoints WHERE channel_id = ?"
+
+    def to_params(self) -> tuple:
+        return (self.channel_id, self.user_id, self.question_index,
+                json.dumps(self.answers, ensure_ascii=False), to_db_time(self.deadline))
+
+    @classmethod
+    def from_row(cls, row) -> "QuestionnaireCheckpoint":
+        answers = tuple((question, answer) for question, answer in json.loads(row["answers"]))
+        return cls(row["channel_id"], row["user_id"], row["question_index"], answers,
+                   from_db_time(row["deadline"]))
+
+
+@dataclass(frozen=True)
+class ModalDraftCheckpoint:
+    user_id: int
+    page: int  # Páginas já respondidas (índice da próxima)
+    answers: Tuple[Tuple[int, str], ...]  # (número da pergunta, resposta), em JSON no banco
+    deadline: datetime
+
+    UPSERT = ("INSERT INTO modal_drafts (user_id, page, answers, deadline) VALUES (?, ?, ?, ?) "
+              "ON CONFLICT(user_id) DO UPDATE SET page = excluded.page, "
+              "answers = excluded.answers, deadline = excluded.deadline")
+    SELECT_ACTIVE = "SELECT * FROM modal_drafts WHERE deadline > ?"
+    DELETE = "DELETE FROM modal_drafts WHERE user_id = ?"
+    DELETE_EXPIRED = "DELETE FROM modal_drafts WHERE deadline <= ?"
+
+    def to_params(self) -> tuple:
+        return (self.user_id, self.page, json.dumps(self.answers, ensure_ascii=False), to_db_time(self.deadline))
+
+    @classmethod
+    def from_row(cls, row) -> "ModalDraftCheckpoint":
+        answers = tuple((number, answer) for number, answer in json.loads(row["answers"]))
+        return cls(row["user_id"], row["page"], answers, from_db_time(row["deadline"]))
+
+
+@dataclass(frozen=True)
+class BotState:
+    key: str
+    value: Optional[str]
+
+    SELECT = "SELECT key, value FROM bot_state WHERE key = ?"
+    UPSERT = ("INSERT INTO bot_state (key, value) VALUES (?, ?) "
+              "ON CONFLICT(key) DO UPDATE SET value = excluded.value")
+    DELETE = "DELETE FROM bot_state WHERE key = ?"
+
+    @classmethod
+    def from_row(cls, row) -> "BotState":
+        return cls(row["key"], row["value"])
+# --- Fim: Modelos ---
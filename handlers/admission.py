@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+# O token da interação vale 15 minutos; depois disso não dá mais para editar a
+# mensagem de fila nem avisar o membro, então a espera termina antes
+QUEUE_MAX_WAIT = 14 * 60
+UPDATE_INTERVAL = 15  # Segundos mínimos entre edições da mensagem de posição
+DEFAULT_SESSION_SECONDS = 15 * 60  # Duração estimada de uma sessão antes de haver medições
+DURATION_WINDOW = 50  # Sessões recentes usadas na estimativa de espera
+
+PositionCallback = Callable[[int, float], Awaitable[None]]
+
+
+class _Waiter:
+    __slots__ = ("member_id", "future", "enqueued_at")
+
+    def __init__(self, member_id: int, future: asyncio.Future):
+        self.member_id = member_id
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class AdmissionController:
+    """Limita quantos questionários de whitelist (modo canal) rodam ao mesmo tempo.
+
+    Com todas as vagas ocupadas, os pedidos entram em uma fila FIFO; cada vaga
+    liberada é entregue direto ao primeiro da fila. O limite vem de
+    `WHITELIST_MAX_SESSIONS` (lido a cada uso, então `/recarregar_config` vale
+    na hora); 0 desativa o controle.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self._limit = limit
+        self._holders: Dict[int, float] = {}  # membro -> início da sessão
+        self._queue: Deque[_Waiter] = deque()
+        self._durations: Deque[float] = deque(maxlen=DURATION_WINDOW)
+        # Métricas
+        self.admitted = 0
+        self.queued_total = 0
+        self.timeouts = 0
+        self.max_queue = 0
+        self.max_wait = 0.0
+        self._wait_total = 0.0
+        self._waited = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit if self._limit is not None else get_config().whitelist_max_sessions
+
+    @property
+    def active(self) -> int:
+        return len(self._holders)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def has_capacity(self) -> bool:
+        return self.limit <= 0 or self.active < self.limit
+
+    def position(self, member_id: int) -> Optional[int]:
+        """Posição (1 = próximo) do membro na fila, ou None se não estiver nela."""
+        for index, waiter in enumerate(self._queue, 1):
+            if waiter.member_id == member_id:
+                return index
+        return None
+
+    def estimated_wait(self, position: int) -> float:
+        """Segundos estimados até a vaga: as vagas se liberam a `limite / duração média` por segundo."""
+        average = sum(self._durations) / len(self._durations) if self._durations else DEFAULT_SESSION_SECONDS
+        return position * average / max(self.limit, 1)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "timeouts": self.timeouts,
+            "wait_avg": round(self._wait_total / self._waited, 3) if self._waited else 0.0,
+            "wait_max": round(self.max_wait, 3),
+        }
+
+    # --- Início: Vagas ---
+    def occupy(self, member_id: int):
+        """Ocupa uma vaga sem passar pela fila (sessões retomadas após reinício)."""
+        self._holders[member_id] = time.perf_counter()
+        self.admitted += 1
+
+    async def acquire(self, member_id: int, on_position: Optional[PositionCallback] = None,
+                      timeout: float = QUEUE_MAX_WAIT) -> bool:
+        """Espera uma vaga. False se a espera passar de `timeout`.
+
+        `on_position(posição, espera_estimada)` é chamado ao entrar na fila e
+        quando a posição muda (no máximo a cada `UPDATE_INTERVAL` segundos).
+        """
+        if not self._queue and self.has_capacity():
+            self.occupy(member_id)
+            return True
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(member_id, loop.create_future())
+        self._queue.append(waiter)
+        self.queued_total += 1
+        self.max_queue = max(self.max_queue, len(self._queue))
+        logger.info(f"Whitelist: {member_id} entrou na fila (posição {len(self._queue)}, {self.active} sessão(ões) ativa(s)).")
+
+        deadline = loop.time() + timeout
+        last_position = None
+        try:
+            while not waiter.future.done():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                position = self.position(member_id)
+                if on_position and position != last_position:
+                    last_position = position
+                    try:
+                        await on_position(position, self.estimated_wait(position))
+                    except Exception as e:
+                        # Falha ao editar a mensagem não tira ninguém da fila
+                        logger.warning(f"Não foi possível atualizar a posição na fila de {member_id}: {e}")
+                await asyncio.wait({waiter.future}, timeout=min(UPDATE_INTERVAL, remaining))
+        except BaseException:
+            # Cancelado (ex.: desligamento) depois de receber a vaga: devolve
+            if waiter.future.done():
+                self.release(member_id)
+            raise
+        finally:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._queue.remove(waiter)
+
+        waited = time.perf_counter() - waiter.enqueued_at
+        if waiter.future.cancelled():
+            self.timeouts += 1
+            logger.info(f"Whitelist: {member_id} desistiu da fila após {waited:.0f}s (tempo máximo).")
+            return False
+        self._wait_total += waited
+        self._waited += 1
+        self.max_wait = max(self.max_wait, waited)
+        return True
+
+    def release(self, member_id: int):
+        """Libera a vaga do membro e a entrega ao próximo da fila."""
+        started_at = self._holders.pop(member_id, None)
+        if started_at is None:
+            return
+        self._durations.append(time.perf_counter() - started_at)
+        self.rebalance()
+
+    def rebalance(self):
+        """Entrega as vagas livres aos primeiros da fila (também após aumentar o limite)."""
+        while self._queue and self.has_capacity():
+            waiter = self._queue.popleft()
+            if waiter.future.done():
+                continue
+            self.occupy(waiter.member_id)
+            waiter.future.set_result(True)
+    # --- Fim: Vagas ---
@@ -0,0 +1,161 @@
+import asyncio
+import csv
+import io
+import logging
+import os
+import time
+from datetime import datetime, tzinfo
+from typing import List, Optional, Tuple
+
+from database.database import Database
+from database.models import WhitelistAnswer, WhitelistAttempt
+
+# --- Configurações ---
+FLUSH_INTERVAL_SECONDS = 2.0
+MAX_BATCH_ATTEMPTS = 200
+CSV_HEADER = ['AttemptID', 'CompletionTimestampLocal', 'UserID',
+              'Username', 'QuestionNumber', 'QuestionText', 'AnswerText']
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerWriteBehind:
+    """Grava as respostas da whitelist em segundo plano (write-behind).
+
+    `enqueue()` apenas coloca a tentativa concluída em uma fila e retorna na hora.
+    Uma task dedicada junta as tentativas que chegarem dentro de um intervalo de
+    flush e grava todas de uma vez: uma única escrita bufferizada + um fsync no
+    CSV e uma única transação no banco. Ao desligar, `stop()` grava o que faltar.
+    """
+
+    def __init__(self, db: Database, csv_path: str, local_tz: tzinfo,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS, max_batch: int = MAX_BATCH_ATTEMPTS):
+        self.db = db
+        self.csv_path = csv_path
+        self.local_tz = local_tz
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Métricas
+        self.flush_count = 0
+        self.flushed_attempts = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+
+    # --- Início: Ciclo de Vida ---
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker(), name="answer-write-behind")
+
+    async def stop(self):
+        """Grava todas as tentativas pendentes e encerra a task."""
+        if self._task is None or self._stopping:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._task
+        logger.info(
+            f"Write-behind de respostas encerrado ({self.flushed_attempts} tentativas gravadas em {self.flush_count} flushes).")
+    # --- Fim: Ciclo de Vida ---
+
+    # --- Início: API Pública ---
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "flush_count": self.flush_count,
+            "flushed_attempts": self.flushed_attempts,
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency,
+        }
+
+    def enqueue(self, attempt_id: int, completed_at: datetime, user_id: int, username: str,
+                responses: List[Tuple[str, str]]):
+        """Agenda a gravação de uma tentativa concluída. Não bloqueia o event loop."""
+        if self._stopping:
+            raise RuntimeError("Write-behind de respostas já foi encerrado.")
+        attempt = WhitelistAttempt(attempt_id, user_id, username, completed_at)
+        answers = [WhitelistAnswer(attempt_id, i, question, answer)
+                   for i, (question, answer) in enumerate(responses, 1)]
+        self._queue.put_nowait((attempt, answers))
+    # --- Fim: API Pública ---
+
+    # --- Início: Worker ---
+    async def _worker(self):
+        stop = False
+        while not stop:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            # Espera o intervalo de flush juntando outras conclusões no mesmo lote
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+        # Drena o que sobrou na fila (desligamento)
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                remaining.append(item)
+        if remaining:
+            await self._flush(remaining)
+
+    async def _flush(self, batch):
+        start = time.perf_counter()
+        csv_payload = self._format_csv(batch)
+        try:
+            await asyncio.to_thread(self._append_csv, csv_payload)
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(batch)} tentativa(s) no CSV {self.csv_path}: {e}")
+        try:
+            await self.db.transaction([
+                (WhitelistAttempt.INSERT, [attempt.to_params() for attempt, _ in batch]),
+                (WhitelistAnswer.INSERT, [answer.to_params() for _, answers in batch for answer in answers]),
+            ])
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(batch)} tentativa(s) no banco: {e}")
+        latency = time.perf_counter() - start
+        self.flush_count += 1
+        self.flushed_attempts += len(batch)
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        attempt_ids = ", ".join(str(attempt.attempt_id) for attempt, _ in batch)
+        logger.info(
+            f"Respostas das tentativas [{attempt_ids}] gravadas em {latency * 1000:.1f} ms (fila: {self.queue_depth}).")
+
+    def _format_csv(self, batch) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for attempt, answers in batch:
+            # Mantém o formato local (Brasília) usado historicamente no CSV
+            completion_time_str = attempt.completed_at.astimezone(self.local_tz).strftime("%Y-%m-%d %H:%M:%S")
+            for answer in answers:
+                writer.writerow([attempt.attempt_id, completion_time_str, attempt.user_id, attempt.username,
+                                 answer.question_number, answer.question_text, answer.answer_text])
+        return buffer.getvalue()
+
+    def _append_csv(self, payload: str):
+        with open(self.csv_path, mode='a', newline='', encoding='utf-8') as file:
+            if file.tell() == 0:
+                csv.writer(file).writerow(CSV_HEADER)
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+    # --- Fim: Worker ---
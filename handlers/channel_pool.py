@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import re
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+CATEGORY_CHANNEL_LIMIT = 50  # Limite do Discord por categoria
+PURGE_MAX_MESSAGES = 1000  # Acima disso é mais barato apagar o canal e criar outro
+REFILL_RETRY_DELAY = 30  # Segundos após uma falha de criação
+
+# Canais do pool têm nome fixo ("wl-sala-03", "ticket-sala-12"): o dono nunca
+# vai no nome (renomear custa 2 chamadas a cada 10 min por canal). Sempre dois
+# dígitos, para não confundir com os canais avulsos "wl-<nome>-<4 dígitos>".
+POOL_NAME_PATTERN = re.compile(r"^(?P<prefix>[a-z]+)-sala-(?P<number>\d{2})$")
+
+
+def is_pool_channel(channel, prefix: Optional[str] = None) -> bool:
+    match = POOL_NAME_PATTERN.match(getattr(channel, "name", "") or "")
+    return bool(match) and (prefix is None or match.group("prefix") == prefix)
+
+
+def pool_channel_owner(channel) -> Optional[int]:
+    """Dono de um canal do pool: o único overwrite de membro que não é o bot."""
+    if not is_pool_channel(channel):
+        return None
+    me_id = channel.guild.me.id if channel.guild.me else None
+    for target in channel.overwrites:
+        if not isinstance(target, discord.Role) and target.id != me_id:
+            return target.id
+    return None
+
+
+class ChannelPool:
+    """Canais de sessão pré-criados e reciclados entre candidatos.
+
+    Mantém `size` canais ocultos (só o bot e, se houver, a staff enxergam) em
+    uma categoria. Entregar um canal custa uma chamada (`set_permissions` do
+    membro); na devolução o overwrite é removido, o canal é limpo (`purge`) e
+    volta para o pool; se a limpeza falhar, ele é apagado e reposto. A
+    reposição roda em segundo plano, fora do caminho do clique.
+    """
+
+    def __init__(self, prefix: str, size: int):
+        self.prefix = prefix
+        self.size = size
+        self.category: Optional[discord.CategoryChannel] = None
+        self.base_overwrites: Dict = {}
+        self._idle: Deque[int] = deque()
+        self._in_use: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._recycling: Set[asyncio.Task] = set()  # Devoluções em andamento (referência até terminarem)
+        self._created: Dict[int, int] = {}  # canal -> número (o cache pode ainda não ter o canal novo)
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.replaced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and self.category is not None
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def stats(self) -> dict:
+        return {"idle": len(self._idle), "in_use": len(self._in_use), "hits": self.hits,
+                "misses": self.misses, "recycled": self.recycled, "replaced": self.replaced}
+
+    # --- Início: Ciclo de Vida ---
+    def load(self, category: Optional[discord.CategoryChannel], base_overwrites: Dict):
+        """Adota os canais do pool já existentes na categoria e inicia a reposição."""
+        self.category = category
+        self.base_overwrites = base_overwrites
+        if self.size <= 0 or category is None:
+            return
+        self._idle.clear()
+        self._in_use.clear()
+        for channel in category.text_channels:
+            if not is_pool_channel(channel, self.prefix):
+                continue
+            if pool_channel_owner(channel):
+                self._in_use.add(channel.id)
+            else:
+                self._idle.append(channel.id)
+        logger.info(f"Pool '{self.prefix}': {len(self._idle)} canal(is) livre(s), "
+                    f"{len(self._in_use)} em uso (alvo: {self.size}).")
+        if self._task is None:
+            self._task = asyncio.create_task(self._refill_loop(), name=f"channel-pool-{self.prefix}")
+        self._wakeup.set()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    # --- Fim: Ciclo de Vida ---
+
+    # --- Início: Entrega e Devolução ---
+    def owns(self, channel) -> bool:
+        return channel.id in self._in_use or channel.id in self._idle
+
+    async def acquire(self, member: discord.Member,
+                      overwrite: discord.PermissionOverwrite) -> Optional[discord.TextChannel]:
+        """Entrega um canal livre ao membro (uma chamada). None se o pool estiver vazio."""
+        while self.enabled and self._idle:
+            channel = self.category.guild.get_channel(self._idle.popleft())
+            if channel is None:
+                continue  # Apagado por fora; a reposição cobre
+            self._wakeup.set()
+            self._in_use.add(channel.id)
+            try:
+                await channel.set_permissions(member, overwrite=overwrite, reason="Sessão atribuída (pool)")
+            except discord.NotFound:
+                self._in_use.discard(channel.id)
+                continue  # Apagado entre o cache e a chamada
+            except discord.HTTPException as e:
+                # Não fica órfão: volta pela reciclagem (limpo, ou apagado e reposto);
+                # quem pediu cai no canal avulso do backend
+                logger.warning(f"Pool '{self.prefix}': falha ao entregar {channel.name} ({e}); usando canal avulso.")
+                self.release(channel)
+                break
+            self.hits += 1
+            return channel
+        if self.size > 0:
+            self.misses += 1
+        return None
+
+    def release(self, channel: discord.TextChannel):
+        """Devolve o canal ao pool em segundo plano (remove o membro e limpa as mensagens)."""
+        task = asyncio.create_task(self._recycle(channel), name=f"channel-pool-release-{channel.id}")
+        self._recycling.add(task)
+        task.add_done_callback(self._recycling.discard)
+
+    async def _recycle(self, channel: discord.TextChannel):
+        if len(self._idle) >= self.size:
+            # Sobra de um pico de demanda (a reposição já completou o pool): só apaga
+            self._in_use.discard(channel.id)
+            try:
+                await channel.delete(reason="Pool de canais já completo")
+            except discord.HTTPException as e:
+                logger.error(f"Falha ao apagar canal {channel.name} excedente do pool: {e}")
+            return
+        try:
+            # Primeiro tira o acesso do ex-dono; só depois limpa
+            owner_id = pool_channel_owner(channel)
+            if owner_id:
+                await channel.set_permissions(discord.Object(id=owner_id), overwrite=None,
+                                              reason="Sessão encerrada (pool)")
+            deleted = await channel.purge(limit=PURGE_MAX_MESSAGES, reason="Sessão encerrada (pool)")
+            if len(deleted) >= PURGE_MAX_MESSAGES:
+                raise RuntimeError("canal com mensagens demais para reciclar")
+            self._in_use.discard(channel.id)
+            self._idle.append(channel.id)
+            self.recycled += 1
+        except discord.NotFound:
+            self._in_use.discard(channel.id)
+        except Exception as e:
+            # Não devolve um canal possivelmente sujo: apaga e deixa a reposição criar outro
+            logger.warning(f"Canal {channel.name} não pôde ser reciclado ({e}); será apagado e reposto.")
+            self._in_use.discard(channel.id)
+            self.replaced += 1
+            try:
+                await channel.delete(reason="Falha ao reciclar canal do pool")
+            except discord.HTTPException as e_del:
+                logger.error(f"Falha ao apagar canal {channel.name} do pool: {e_del}")
+        self._wakeup.set()
+    # --- Fim: Entrega e Devolução ---
+
+    # --- Início: Reposição ---
+    def _free_name(self) -> str:
+        used = {int(POOL_NAME_PATTERN.match(channel.name).group("number"))
+                for channel in self.category.text_channels if is_pool_channel(channel, self.prefix)}
+        used.update(number for channel_id, number in self._created.items()
+                    if channel_id in self._idle or channel_id in self._in_use)
+        number = next(n for n in range(1, 100) if n not in used)
+        return f"{self.prefix}-sala-{number:02d}"
+
+    async def _refill_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.enabled and len(self._idle) < self.size:
+                if len(self.category.channels) >= CATEGORY_CHANNEL_LIMIT:
+                    logger.warning(f"Pool '{self.prefix}': categoria {self.category.name} cheia; reposição pausada.")
+                    break
+                name = self._free_name()
+                try:
+                    channel = await self.category.guild.create_text_channel(
+                        name=name, category=self.category, overwrites=self.base_overwrites,
+                        reason="Reposição do pool de canais")
+                except discord.HTTPException as e:
+                    logger.error(f"Pool '{self.prefix}': falha ao criar {name}: {e}")
+                    await asyncio.sleep(REFILL_RETRY_DELAY)
+                    continue
+                self._created[channel.id] = int(POOL_NAME_PATTERN.match(name).group("number"))
+                self._idle.append(channel.id)
+    # --- Fim: Reposição ---
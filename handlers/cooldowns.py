@@ -0,0 +1,70 @@
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from database.database import Database
+from database.models import Cooldown, to_db_time
+
+logger = logging.getLogger(__name__)
+
+
+class CooldownStore:
+    """Mapa de cooldowns com expiração (TTL), persistido no banco.
+
+    As consultas são O(1) em um dict. Cada cooldown também entra em um min-heap
+    ordenado pela expiração, então as entradas vencidas são removidas em ordem
+    sem varrer o mapa inteiro: a memória fica limitada aos cooldowns ativos, não
+    a todos os usuários que já fizeram whitelist. O banco garante que um restart
+    não zere os cooldowns em andamento.
+    """
+
+    def __init__(self):
+        self._expiry: Dict[int, datetime] = {}
+        self._heap: List[Tuple[datetime, int]] = []
+        self.db: Optional[Database] = None
+
+    async def load(self, db: Database):
+        """Recarrega os cooldowns ainda ativos e apaga os vencidos do banco."""
+        self.db = db
+        now = datetime.now(timezone.utc)
+        rows = await db.fetchall(Cooldown.SELECT_ACTIVE, (to_db_time(now),))
+        for row in rows:
+            cooldown = Cooldown.from_row(row)
+            self._put(cooldown.user_id, cooldown.expires_at)
+        await db.execute(Cooldown.DELETE_EXPIRED, (to_db_time(now),))
+        logger.info(f"{len(self._expiry)} cooldown(s) de whitelist ativo(s) carregado(s) do banco.")
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def _put(self, user_id: int, expires_at: datetime):
+        self._expiry[user_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, user_id))
+
+    def set(self, user_id: int, expires_at: datetime):
+        """Define (ou renova) o cooldown do usuário."""
+        self._put(user_id, expires_at)
+        if self.db:
+            self.db.execute_nowait(Cooldown.UPSERT, Cooldown(user_id, expires_at).to_params())
+
+    def expires_at(self, user_id: int, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Retorna quando o cooldown do usuário termina, ou None se não houver cooldown ativo."""
+        now = now or datetime.now(timezone.utc)
+        self.evict_expired(now)
+        expires_at = self._expiry.get(user_id)
+        return expires_at if expires_at and expires_at > now else None
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Remove do topo do heap todos os cooldowns vencidos. Retorna quantos saíram."""
+        now = now or datetime.now(timezone.utc)
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, user_id = heapq.heappop(self._heap)
+            # Entradas antigas de um cooldown já renovado ficam no heap e são só descartadas
+            if self._expiry.get(user_id) == expires_at:
+                del self._expiry[user_id]
+                removed += 1
+                if self.db:
+                    self.db.execute_nowait(Cooldown.DELETE_IF_EXPIRED, (user_id, to_db_time(now)))
+        return removed
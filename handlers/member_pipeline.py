@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+PIPELINE_WORKERS = 4  # Eventos de membro processados em paralelo, no máximo
+OVERLOAD_THRESHOLD = 25  # Fila acima disso: etapas degradáveis são puladas
+LATENCY_WINDOW = 500  # Amostras mantidas por etapa para o p95
+
+# --- Eventos ---
+JOIN = "join"
+LEAVE = "leave"
+
+# Retornar False marca a etapa como não concluída (conta como falha) e
+# interrompe as etapas que dependem dela (ex.: triagem reprovada)
+StageHandler = Callable[[discord.Member], Awaitable[Optional[bool]]]
+
+
+@dataclass(frozen=True)
+class MemberStage:
+    """Etapa declarada do ciclo de vida de um membro."""
+    name: str
+    handler: StageHandler
+    event: str = JOIN
+    after: Tuple[str, ...] = ()  # Etapas que precisam terminar antes (ausentes são ignoradas)
+    degradable: bool = False  # Pulada quando a fila está sobrecarregada
+
+
+def _p95(samples) -> float:
+    ordered = sorted(samples)
+    return ordered[max(int(len(ordered) * 0.95) - 1, 0)] if ordered else 0.0
+
+
+@dataclass
+class StageStats:
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    max_latency: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    # Do enfileiramento do evento até o fim da etapa (ex.: entrada -> cargo atribuído)
+    since_enqueue: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, latency: float, since_enqueue: float, ok: bool):
+        self.runs += 1
+        if not ok:
+            self.failures += 1
+        self.latencies.append(latency)
+        self.since_enqueue.append(since_enqueue)
+        self.max_latency = max(self.max_latency, latency)
+
+    def as_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "latency_p95": round(_p95(self.latencies), 3),
+            "latency_max": round(self.max_latency, 3),
+            "since_enqueue_p95": round(_p95(self.since_enqueue), 3),
+        }
+
+
+class MemberPipeline:
+    """Pipeline único de entrada/saída de membros.
+
+    Os cogs registram etapas (`MemberStage`) em vez de adicionar listeners
+    próprios. Cada evento é enfileirado e atendido por um número fixo de
+    workers; as etapas independentes rodam em paralelo (`asyncio.gather`) e as
+    que declaram `after` esperam suas dependências. Cada etapa tem latência e
+    falhas próprias em `stats()`. Com a fila acima de `OVERLOAD_THRESHOLD`
+    (raid), as etapas degradáveis são puladas e contadas.
+    """
+
+    def __init__(self, workers: int = PIPELINE_WORKERS, overload_threshold: int = OVERLOAD_THRESHOLD):
+        self.worker_count = workers
+        self.overload_threshold = overload_threshold
+        self._stages: Dict[str, Dict[str, MemberStage]] = {JOIN: {}, LEAVE: {}}
+        self._waves: Dict[str, List[List[MemberStage]]] = {JOIN: [], LEAVE: []}
+        self._stats: Dict[Tuple[str, str], StageStats] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._overloaded = False
+        # Métricas do pipeline
+        self.processed = 0
+        self.max_depth = 0
+        self._queue_waits: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    # --- Início: Ciclo de Vida ---
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(), name=f"member-pipeline-{n}")
+                         for n in range(self.worker_count)]
+        logger.info(f"Pipeline de membros iniciado com {self.worker_count} worker(s): "
+                    f"entrada={self.describe(JOIN)} | saída={self.describe(LEAVE)}")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._queue.qsize():
+            logger.warning(f"{self._queue.qsize()} evento(s) de membro não processado(s) no encerramento.")
+    # --- Fim: Ciclo de Vida ---
+
+    # --- Início: Registro de Etapas ---
+    def register(self, stage: MemberStage):
+        if stage.event not in self._stages:
+            raise ValueError(f"Evento de membro desconhecido: {stage.event}")
+        self._stages[stage.event][stage.name] = stage
+        self._stats.setdefault((stage.event, stage.name), StageStats())
+        self._rebuild_waves(stage.event)
+
+    def unregister(self, name: str, event: str = JOIN):
+        if self._stages[event].pop(name, None):
+            self._rebuild_waves(event)
+
+    def _rebuild_waves(self, event: str):
+        """Agrupa as etapas em ondas (ordem topológica) e rejeita dependências circulares."""
+        pending = dict(self._stages[event])
+        done: set = set()
+        waves = []
+        while pending:
+            wave = [stage for stage in pending.values()
+                    if all(dep in done or dep not in self._stages[event] for dep in stage.after)]
+            if not wave:
+                raise ValueError(f"Dependência circular nas etapas de '{event}': {sorted(pending)}")
+            for stage in wave:
+                del pending[stage.name]
+            done.update(stage.name for stage in wave)
+            waves.append(wave)
+        self._waves[event] = waves
+
+    def describe(self, event: str) -> str:
+        return " -> ".join("+".join(stage.name for stage in wave) for wave in self._waves[event]) or "(nenhuma)"
+    # --- Fim: Registro de Etapas ---
+
+    # --- Início: API Pública ---
+    def enqueue(self, event: str, member: discord.Member):
+        self._queue.put_nowait((event, member, time.perf_counter()))
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        if depth > self.overload_threshold and not self._overloaded:
+            self._overloaded = True
+            logger.warning(f"Pipeline de membros sobrecarregado ({depth} na fila); etapas degradáveis serão puladas.")
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "queue_wait_p95": round(_p95(self._queue_waits), 3),
+            "stages": {f"{event}:{name}": stage_stats.as_dict()
+                       for (event, name), stage_stats in self._stats.items()},
+        }
+    # --- Fim: API Pública ---
+
+    # --- Início: Processamento ---
+    async def _worker(self):
+        while True:
+            event, member, enqueued_at = await self._queue.get()
+            try:
+                self._queue_waits.append(time.perf_counter() - enqueued_at)
+                await self._process(event, member, enqueued_at)
+                self.processed += 1
+            except Exception:
+                logger.exception(f"Erro no pipeline de membros ({event}) para {member} ({member.id}):")
+            finally:
+                self._queue.task_done()
+            if self._overloaded and self._queue.qsize() == 0:
+                self._overloaded = False
+                logger.info(f"Pipeline de membros normalizado: {self.stats()}")
+
+    async def _process(self, event: str, member: discord.Member, enqueued_at: float):
+        """Dispara todas as etapas de uma vez; cada uma espera só as próprias dependências."""
+        overloaded = self._queue.qsize() > self.overload_threshold
+        tasks: Dict[str, asyncio.Task] = {}
+        for wave in self._waves[event]:  # Ordem topológica: dependências já têm task
+            for stage in wave:
+                deps = [tasks[dep] for dep in stage.after if dep in tasks]
+                tasks[stage.name] = asyncio.ensure_future(
+                    self._run_after(event, stage, member, enqueued_at, deps, overloaded))
+        await asyncio.gather(*tasks.values())
+
+    async def _run_after(self, event: str, stage: MemberStage, member: discord.Member,
+                         enqueued_at: float, deps: List[asyncio.Task], overloaded: bool) -> bool:
+        results = await asyncio.gather(*deps) if deps else []
+        if not all(results) or (stage.degradable and overloaded):
+            self._stats[(event, stage.name)].skipped += 1
+            return False
+        return await self._run_stage(event, stage, member, enqueued_at)
+
+    async def _run_stage(self, event: str, stage: MemberStage, member: discord.Member,
+                         enqueued_at: float) -> bool:
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = (await stage.handler(member)) is not False
+        except Exception:
+            logger.exception(f"Erro na etapa '{stage.name}' ({event}) para {member} ({member.id}):")
+        end = time.perf_counter()
+        self._stats[(event, stage.name)].record(end - start, end - enqueued_at, ok)
+        return ok
+    # --- Fim: Processamento ---
@@ -1,23 +1,24 @@
 import discord
 import asyncio
-import csv
-import os
 import logging
 # Adicionado timedelta e timezone para manipulação de fuso horário
 from datetime import datetime, timedelta, timezone
 
+from database.models import QuestionnaireCheckpoint
+from handlers.cooldowns import CooldownStore
+from handlers.session_backend import end_session
+from handlers.whitelist_channels import whitelist_channels
+from utils.resolver import STAFF_CHANNEL_NAME
+
 # --- Configurações ---
 CSV_FILENAME = "whitelist_respostas.csv"
-STAFF_CHANNEL_NAME = "respostas-whitelist"
 COOLDOWN_MINUTES = 30
 QUESTIONNAIRE_TIMEOUT_MINUTES = 20
 DELETE_DELAY = 10
-ATTEMPT_ID_FILE = "whitelist_last_attempt_id.txt"
 
 # --- Variáveis Globais ---
-cooldowns = {}
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+# Carregado do banco em setup_hook (main.py)
+cooldowns = CooldownStore()
 logger = logging.getLogger(__name__)
 
 # --- Fuso Horário de Brasília (UTC-3) ---
@@ -48,65 +49,6 @@ questions = [
     "Caso receba uma punição (como um banimento), você se compromete a ler atentamente os motivos apresentados pela staff antes de buscar um recurso ou apelação?"
 ]
 
-# --- Funções de ID Sequencial ---
-
-
-def get_next_attempt_id() -> int:
-    last_id = 0
-    try:
-        if os.path.exists(ATTEMPT_ID_FILE):
-            with open(ATTEMPT_ID_FILE, 'r') as f:
-                content = f.read().strip()
-                if content:
-                    last_id = int(content)
-    except (IOError, ValueError) as e:
-        logger.error(
-            f"Erro ao ler o arquivo de ID de tentativa ({ATTEMPT_ID_FILE}): {e}. Resetando para 0.")
-        last_id = 0
-    return last_id + 1
-
-
-def update_last_attempt_id(last_id_used: int):
-    try:
-        with open(ATTEMPT_ID_FILE, 'w') as f:
-            f.write(str(last_id_used))
-    except IOError as e:
-        logger.error(
-            f"Falha ao atualizar o arquivo de ID de tentativa ({ATTEMPT_ID_FILE}) para {last_id_used}: {e}")
-
-
-# --- Função para Salvar no CSV (Modificada para formato local) ---
-def save_to_csv(attempt_id: int, completion_time_local: datetime, member: discord.Member, responses: list):
-    """Salva as respostas do membro em um arquivo CSV, incluindo ID da tentativa e timestamp local formatado."""
-    file_exists = os.path.isfile(CSV_FILENAME)
-    # Formato personalizado: YYYY-MM-DD HH:MM:SS (agora usando o tempo local passado)
-    completion_time_str = completion_time_local.strftime(
-        "%Y-%m-%d %H:%M:%S")  # <--- MODIFICADO
-
-    try:
-        with open(CSV_FILENAME, mode='a', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-
-            # Escreve o novo cabeçalho se o arquivo não existir ou estiver vazio
-            if not file_exists or os.path.getsize(CSV_FILENAME) == 0:
-                # Indica que o timestamp é local no cabeçalho
-                writer.writerow(['AttemptID', 'CompletionTimestampLocal', 'UserID',  # <--- MODIFICADO
-                                'Username', 'QuestionNumber', 'QuestionText', 'AnswerText'])
-
-            # Escreve as respostas do membro, usando o timestamp local formatado
-            for i, (question_text, answer) in enumerate(responses, 1):
-                writer.writerow(
-                    [attempt_id, completion_time_str, member.id, str(member), i, question_text, answer])
-        logger.info(
-            # Log atualizado
-            f"Respostas da tentativa {attempt_id} de {member} salvas em {CSV_FILENAME} com timestamp local.")
-    except IOError as e:
-        logger.error(
-            f"Erro ao escrever no arquivo CSV {CSV_FILENAME} para tentativa {attempt_id}: {e}")
-    except Exception as e:
-        logger.error(
-            f"Erro inesperado ao salvar CSV para tentativa {attempt_id} de {member}: {e}")
-
 # --- Função Principal do Questionário (Modificada) ---
 
 
@@ -118,18 +60,18 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
 
     # --- Mensagens Iniciais ---
     try:
-        await channel.send(f"👋 Olá {member.mention}, bem-vindo(a) ao seu teste de whitelist!")
-        await asyncio.sleep(1)
-        await channel.send(
+        # O dispatcher mantém a ordem no canal e respeita o rate limit real (sem pausas fixas)
+        await bot.outbound.send(channel, f"👋 Olá {member.mention}, bem-vindo(a) ao seu teste de whitelist!")
+        await bot.outbound.send(
+            channel,
             f"⏳ Você terá **{QUESTIONNAIRE_TIMEOUT_MINUTES} minutos** para responder todas as **{len(questions)} perguntas**. Boa sorte!",
             delete_after=QUESTIONNAIRE_TIMEOUT_MINUTES * 60
         )
-        await asyncio.sleep(3)
     except discord.Forbidden:
         logger.error(
             f"Erro de permissão ao enviar mensagens iniciais no canal {channel.name} para {member.id}")
         try:
-            await channel.delete(reason="Falha ao enviar mensagens iniciais (permissão)")
+            await bot.outbound.delete_channel(channel, reason="Falha ao enviar mensagens iniciais (permissão)")
         except Exception:
             logger.error(
                 f"Falha ao deletar canal {channel.name} após erro de permissão inicial.")
@@ -138,40 +80,131 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
         logger.error(
             f"Erro inesperado ao enviar mensagens iniciais para {member.id}: {e}")
         try:
-            await channel.delete(reason="Erro inesperado nas mensagens iniciais")
+            await bot.outbound.delete_channel(channel, reason="Erro inesperado nas mensagens iniciais")
         except Exception:
             logger.error(
                 f"Falha ao deletar canal {channel.name} após erro inesperado inicial.")
         return
 
     # Define cooldown usando a hora UTC
-    cooldowns[member.id] = now_utc + timedelta(minutes=COOLDOWN_MINUTES)
+    cooldowns.set(member.id, now_utc + timedelta(minutes=COOLDOWN_MINUTES))
+
+    checkpoint = QuestionnaireCheckpoint(
+        channel.id, member.id, 0, (), now_utc + timedelta(minutes=QUESTIONNAIRE_TIMEOUT_MINUTES))
+    save_checkpoint(bot, checkpoint)
+    await run_questionnaire(member, channel, bot, checkpoint)
+
+
+async def start_admitted_questionnaire(member: discord.Member, channel: discord.TextChannel, bot: discord.Client):
+    """Como `start_questionnaire`, liberando a vaga do controle de admissão ao final."""
+    try:
+        await start_questionnaire(member, channel, bot)
+    finally:
+        bot.whitelist_admission.release(member.id)
+
+
+def spawn_questionnaire(bot: discord.Client, coro, name: str) -> asyncio.Task:
+    """Roda o questionário em segundo plano, mantendo a task em `bot.questionnaire_tasks` até terminar."""
+    task = asyncio.create_task(coro, name=name)
+    bot.questionnaire_tasks.add(task)
+    task.add_done_callback(bot.questionnaire_tasks.discard)
+    return task
+
+
+async def finalize_questionnaire(bot: discord.Client, member: discord.Member, guild: discord.Guild,
+                                 responses_list: list, completion_time_utc: datetime) -> int:
+    """Registra uma tentativa concluída (ID, CSV + banco) e envia o embed para a staff.
+
+    Usado pelos dois modos de whitelist (canal e modal). Retorna o ID da tentativa.
+    """
+    # --- Obter ID e Salvar ---
+    # O alocador garante IDs únicos mesmo com conclusões simultâneas
+    current_attempt_id = await bot.attempt_ids.allocate()
+    logger.info(
+        f"Questionário concluído por {member}. Atribuindo ID de Tentativa: {current_attempt_id}")
+
+    # Gravação em segundo plano (CSV + banco); não bloqueia o event loop
+    bot.answer_writer.enqueue(current_attempt_id, completion_time_utc,
+                              member.id, str(member), responses_list)
+
+    # --- Enviar para Canal da Staff ---
+    staff_channel = bot.resolver.get("staff_channel", guild)
+    if staff_channel:
+        # O embed usa o timestamp UTC, que o Discord formata automaticamente.
+        embed = discord.Embed(
+            title=f"📋 Novas Respostas Whitelist [Tentativa #{current_attempt_id}]: {member.display_name}",
+            # Usar o timestamp UTC aqui <t:ts:F> é o ideal para o Discord
+            # <--- Mantém UTC
+            description=f"Usuário: {member.mention} (`{member.id}`)\nConcluído em: <t:{int(completion_time_utc.timestamp())}:F>",
+            color=discord.Color.green(),
+            timestamp=completion_time_utc  # <--- Mantém UTC no rodapé do embed
+        )
+        # Itera sobre a lista de respostas salvas
+        for idx, (pergunta, resposta) in enumerate(responses_list, 1):
+            resposta_truncated = (
+                resposta[:1020] + '...') if len(resposta) > 1024 else resposta
+            embed.add_field(
+                name=f"{idx}. {pergunta}", value=f">>> {resposta_truncated}", inline=False)
+
+        embed.set_footer(
+            text=f"ID do Usuário: {member.id} | ID da Tentativa: {current_attempt_id}")
+        try:
+            await bot.outbound.send(staff_channel, embed=embed)
+        except discord.Forbidden:
+            logger.error(
+                f"Erro: Sem permissão para enviar embed no canal da staff {STAFF_CHANNEL_NAME}")
+        except Exception as e:
+            logger.error(
+                f"Erro ao enviar embed para canal da staff: {e}", exc_info=True)
+    else:
+        logger.warning(
+            f"Canal da staff '{STAFF_CHANNEL_NAME}' não encontrado para a tentativa {current_attempt_id}.")
+    return current_attempt_id
 
-    def check(m):
-        return m.author == member and m.channel == channel
 
-    responses_list = []
-    start_time_utc = datetime.now(timezone.utc)  # Marca início em UTC
-    total_timeout_seconds = QUESTIONNAIRE_TIMEOUT_MINUTES * 60
+def save_checkpoint(bot: discord.Client, checkpoint: QuestionnaireCheckpoint):
+    """Grava o progresso sem bloquear a sessão (group commit do banco)."""
+    bot.db.execute_nowait(QuestionnaireCheckpoint.UPSERT, checkpoint.to_params())
+
+
+def delete_checkpoint(bot: discord.Client, channel_id: int):
+    bot.db.execute_nowait(QuestionnaireCheckpoint.DELETE, (channel_id,))
+
+
+async def run_questionnaire(member: discord.Member, channel: discord.TextChannel, bot: discord.Client,
+                            checkpoint: QuestionnaireCheckpoint, resumed: bool = False):
+    """Faz as perguntas a partir do checkpoint; o prazo é sempre o `deadline` salvo."""
+    # As respostas chegam pelo on_message do bot, roteadas pelo ID do canal
+    session = bot.questionnaire_sessions.open(channel, member)
+
+    responses_list = list(checkpoint.answers)
+    deadline_utc = checkpoint.deadline
+    first_index = len(responses_list)
     question_message = None
     answer_message = None
     questionnaire_completed_successfully = False
 
     try:
-        for i, question_text in enumerate(questions, 1):
-            # Calcula tempo restante com base em UTC
-            elapsed_seconds = (datetime.now(timezone.utc) -
-                               start_time_utc).total_seconds()
-            remaining_time_total = total_timeout_seconds - elapsed_seconds
+        if resumed and first_index < len(questions):
+            await bot.outbound.send(
+                channel,
+                f"🔄 {member.mention}, o bot foi reiniciado. Continuando da **pergunta {first_index + 1}/{len(questions)}**; "
+                f"o prazo termina <t:{int(deadline_utc.timestamp())}:R>."
+            )
+
+        for i, question_text in enumerate(questions[first_index:], first_index + 1):
+            # Tempo restante recalculado a partir do prazo salvo (vale também após reinício)
+            remaining_time_total = (deadline_utc - datetime.now(timezone.utc)).total_seconds()
 
             if remaining_time_total <= 0:
-                await channel.send(f"⏰ Tempo total esgotado! Você demorou mais de {QUESTIONNAIRE_TIMEOUT_MINUTES} minutos.", delete_after=DELETE_DELAY + 5)
+                await bot.outbound.send(channel, f"⏰ Tempo total esgotado! Você demorou mais de {QUESTIONNAIRE_TIMEOUT_MINUTES} minutos.", delete_after=DELETE_DELAY + 5)
                 raise asyncio.TimeoutError(
                     "Tempo total do questionário excedido.")
 
             try:
                 # Envia pergunta sem tempo restante
-                question_message = await channel.send(
+                question_message = await bot.outbound.send(
+                    channel,
                     # <--- MODIFICADO (sem tempo)
                     f"**Pergunta {i}/{len(questions)}:**\n{question_text}"
                 )
@@ -186,13 +219,15 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
 
             try:
                 # Espera resposta usando tempo restante calculado em UTC
-                answer_message = await bot.wait_for('message', check=check, timeout=remaining_time_total)
+                answer_message = await session.wait_answer(remaining_time_total)
                 responses_list.append((question_text, answer_message.content))
+                save_checkpoint(bot, QuestionnaireCheckpoint(
+                    channel.id, member.id, i, tuple(responses_list), deadline_utc))
 
                 # Deleta pergunta e resposta
                 try:
                     if question_message:
-                        await question_message.delete()
+                        await bot.outbound.delete_message(question_message)
                 except discord.NotFound:
                     pass
                 except discord.Forbidden:
@@ -204,7 +239,7 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
 
                 try:
                     if answer_message:
-                        await answer_message.delete()
+                        await bot.outbound.delete_message(answer_message)
                 except discord.NotFound:
                     pass
                 except discord.Forbidden:
@@ -219,11 +254,11 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
 
             except asyncio.TimeoutError:
                 logger.warning(
-                    f"Timeout (wait_for) durante pergunta {i} para {member} no canal {channel.name}. Tempo total provavelmente esgotado.")
-                await channel.send(f"⏰ Tempo total esgotado enquanto aguardava a resposta da pergunta {i}!", delete_after=DELETE_DELAY + 5)
+                    f"Timeout durante pergunta {i} para {member} no canal {channel.name}. Tempo total provavelmente esgotado.")
+                await bot.outbound.send(channel, f"⏰ Tempo total esgotado enquanto aguardava a resposta da pergunta {i}!", delete_after=DELETE_DELAY + 5)
                 if question_message:
                     try:
-                        await question_message.delete()
+                        await bot.outbound.delete_message(question_message)
                     except Exception:
                         pass
                 raise
@@ -232,57 +267,14 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
         questionnaire_completed_successfully = True
 
         # Registrar hora exata da conclusão EM UTC
+        # (o write-behind converte para o horário de Brasília ao gravar o CSV)
         completion_time_utc = datetime.now(timezone.utc)
-        # Converter o tempo UTC para o horário de Brasília (para o CSV)
-        completion_time_local = completion_time_utc.astimezone(
-            BRASILIA_TZ)  # <--- ADICIONADO
-
-        await channel.send("✅ Questionário concluído! Suas respostas foram registradas e serão avaliadas pela equipe.", delete_after=DELETE_DELAY)
-
-        # --- Obter ID e Salvar ---
-        current_attempt_id = get_next_attempt_id()
-        logger.info(
-            f"Questionário concluído por {member}. Atribuindo ID de Tentativa: {current_attempt_id}")
-
-        # Passa o TEMPO LOCAL para salvar no CSV
-        save_to_csv(current_attempt_id, completion_time_local,
-                    member, responses_list)  # <--- MODIFICADO
-        # Atualiza o contador para o próximo
-        update_last_attempt_id(current_attempt_id)
-
-        # --- Enviar para Canal da Staff ---
-        staff_channel = discord.utils.get(
-            channel.guild.text_channels, name=STAFF_CHANNEL_NAME)
-        if staff_channel:
-            # O embed usa o timestamp UTC, que o Discord formata automaticamente.
-            embed = discord.Embed(
-                title=f"📋 Novas Respostas Whitelist [Tentativa #{current_attempt_id}]: {member.display_name}",
-                # Usar o timestamp UTC aqui <t:ts:F> é o ideal para o Discord
-                # <--- Mantém UTC
-                description=f"Usuário: {member.mention} (`{member.id}`)\nConcluído em: <t:{int(completion_time_utc.timestamp())}:F>",
-                color=discord.Color.green(),
-                timestamp=completion_time_utc  # <--- Mantém UTC no rodapé do embed
-            )
-            # Itera sobre a lista de respostas salvas
-            for idx, (pergunta, resposta) in enumerate(responses_list, 1):
-                resposta_truncated = (
-                    resposta[:1020] + '...') if len(resposta) > 1024 else resposta
-                embed.add_field(
-                    name=f"{idx}. {pergunta}", value=f">>> {resposta_truncated}", inline=False)
-
-            embed.set_footer(
-                text=f"ID do Usuário: {member.id} | ID da Tentativa: {current_attempt_id}")
-            try:
-                await staff_channel.send(embed=embed)
-            except discord.Forbidden:
-                logger.error(
-                    f"Erro: Sem permissão para enviar embed no canal da staff {STAFF_CHANNEL_NAME}")
-            except Exception as e:
-                logger.error(
-                    f"Erro ao enviar embed para canal da staff: {e}", exc_info=True)
-        else:
-            logger.warning(
-                f"Canal da staff '{STAFF_CHANNEL_NAME}' não encontrado para a tentativa {current_attempt_id}.")
+
+        await bot.outbound.send(channel, "✅ Questionário concluído! Suas respostas foram registradas e serão avaliadas pela equipe.", delete_after=DELETE_DELAY)
+
+        await finalize_questionnaire(bot, member, channel.guild, responses_list, completion_time_utc)
+        # Concluído: um reinício a partir daqui não deve repetir a tentativa
+        delete_checkpoint(bot, channel.id)
 
     except asyncio.TimeoutError:
         logger.warning(
@@ -295,7 +287,7 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
             f"Erro inesperado durante o questionário para {member} no canal {channel.name}: {e}", exc_info=True)
         # Não salva nem incrementa ID em caso de erro
         try:
-            await channel.send("❌ Ocorreu um erro inesperado durante o questionário. Por favor, tente novamente mais tarde ou contate um administrador.", delete_after=DELETE_DELAY)
+            await bot.outbound.send(channel, "❌ Ocorreu um erro inesperado durante o questionário. Por favor, tente novamente mais tarde ou contate um administrador.", delete_after=DELETE_DELAY)
         except discord.Forbidden:
             logger.error(
                 f"Erro: Sem permissão para enviar mensagem de erro no canal {channel.name}")
@@ -304,18 +296,93 @@ async def start_questionnaire(member: discord.Member, channel: discord.TextChann
         await asyncio.sleep(DELETE_DELAY)
 
     finally:
-        logger.info(
-            f"Finalizando questionário para {member}. Tentando deletar canal {channel.name}...")
-        await asyncio.sleep(2)  # Pequena pausa antes de deletar
-        try:
-            await channel.delete(reason="Questionário finalizado, cancelado ou com erro")
-            logger.info(f"Canal {channel.name} deletado com sucesso.")
-        except discord.NotFound:
-            logger.warning(
-                f"Aviso: Canal {channel.name} já havia sido deletado.")
-        except discord.Forbidden:
-            logger.critical(
-                f"Erro Crítico: Sem permissão para deletar o canal {channel.name}. Necessário deletar manualmente.")
-        except Exception as e:
-            logger.error(
-                f"Erro inesperado ao tentar deletar canal {channel.name}: {e}", exc_info=True)
+        session.close()
+        if session.suspended:
+            # Desligamento do bot: canal e checkpoint ficam para a retomada
+            logger.info(
+                f"Questionário de {member} suspenso na pergunta {len(responses_list) + 1}; canal {channel.name} mantido.")
+        else:
+            delete_checkpoint(bot, channel.id)
+            await finish_channel(bot, channel, member)
+
+
+async def finish_channel(bot: discord.Client, channel: discord.TextChannel, member):
+    logger.info(
+        f"Finalizando questionário para {member}. Tentando deletar canal {channel.name}...")
+    await asyncio.sleep(2)  # Pequena pausa antes de deletar
+    try:
+        # Canal do pool volta para ele (limpo); os demais são apagados
+        await end_session(bot, channel, bot.channel_pools["whitelist"],
+                          reason="Questionário finalizado, cancelado ou com erro")
+        whitelist_channels.on_channel_delete(channel)
+        logger.info(f"Canal {channel.name} encerrado com sucesso.")
+    except discord.NotFound:
+        logger.warning(
+            f"Aviso: Canal {channel.name} já havia sido deletado.")
+    except discord.Forbidden:
+        logger.critical(
+            f"Erro Crítico: Sem permissão para deletar o canal {channel.name}. Necessário deletar manualmente.")
+    except Exception as e:
+        logger.error(
+            f"Erro inesperado ao tentar deletar canal {channel.name}: {e}", exc_info=True)
+
+
+# --- Início: Retomada Após Reinício ---
+async def run_resumed_questionnaire(member: discord.Member, channel: discord.TextChannel, bot: discord.Client,
+                                    checkpoint: QuestionnaireCheckpoint):
+    try:
+        await run_questionnaire(member, channel, bot, checkpoint, resumed=True)
+    finally:
+        bot.whitelist_admission.release(member.id)
+
+
+async def resume_questionnaires(bot: discord.Client, guild: discord.Guild, open_channels: dict) -> int:
+    """Retoma os questionários interrompidos por um reinício.
+
+    `open_channels` é o mapa canal -> dono dos canais/threads `wl-*` existentes. Canais
+    com checkpoint continuam da pergunta salva, com o prazo original; canais sem
+    checkpoint (ou cujo dono saiu do servidor) são apagados, e checkpoints sem
+    canal são descartados. Retorna o número de sessões retomadas.
+    """
+    rows = await bot.db.fetchall(QuestionnaireCheckpoint.SELECT_ALL)
+    checkpoints = {row["channel_id"]: QuestionnaireCheckpoint.from_row(row) for row in rows}
+
+    resumed = 0
+    for channel_id, checkpoint in checkpoints.items():
+        channel = guild.get_channel_or_thread(channel_id)
+        if channel is None:
+            logger.info(f"Checkpoint do canal {channel_id} descartado: canal não existe mais.")
+            delete_checkpoint(bot, channel_id)
+            continue
+        member = guild.get_member(checkpoint.user_id)
+        if member is None:
+            try:
+                member = await guild.fetch_member(checkpoint.user_id)
+            except discord.NotFound:
+                logger.info(f"Questionário do canal {channel.name} não retomado: membro {checkpoint.user_id} saiu do servidor.")
+                delete_checkpoint(bot, channel_id)
+                await finish_channel(bot, channel, checkpoint.user_id)
+                continue
+            except discord.HTTPException as e:
+                # Falha temporária: mantém canal e checkpoint para o próximo início
+                logger.error(f"Erro ao buscar membro {checkpoint.user_id} para retomar o questionário: {e}")
+                continue
+        # Sessões retomadas contam no limite de simultâneas, sem passar pela fila
+        bot.whitelist_admission.occupy(member.id)
+        spawn_questionnaire(bot, run_resumed_questionnaire(member, channel, bot, checkpoint),
+                            f"questionario-{channel_id}")
+        resumed += 1
+
+    # Canais de whitelist sem checkpoint não têm o que retomar
+    for channel_id, owner_id in open_channels.items():
+        if channel_id in checkpoints:
+            continue
+        channel = guild.get_channel_or_thread(channel_id)
+        if channel is not None:
+            logger.warning(f"Canal de whitelist {channel.name} sem checkpoint (dono {owner_id}); será apagado.")
+            await finish_channel(bot, channel, owner_id)
+
+    if checkpoints or open_channels:
+        logger.info(f"Questionários retomados após reinício: {resumed} de {len(checkpoints)} checkpoint(s).")
+    return resumed
+# --- Fim: Retomada Após Reinício ---
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionnaireSession:
+    """Sessão de questionário: um membro respondendo em um canal.
+
+    Só existe uma espera pendente por vez (a pergunta atual). Mensagens que
+    chegam sem espera pendente são ignoradas, como acontecia com o `wait_for`.
+    """
+
+    def __init__(self, manager: "QuestionnaireSessionManager", channel_id: int, member_id: int):
+        self._manager = manager
+        self.channel_id = channel_id
+        self.member_id = member_id
+        self.answers = 0
+        # Task que conduz a sessão; cancelada por suspend_all() no desligamento
+        self.task: Optional[asyncio.Task] = asyncio.current_task()
+        # True quando a sessão foi interrompida pelo desligamento do bot (o checkpoint
+        # e o canal são mantidos para a retomada)
+        self.suspended = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    def __enter__(self) -> "QuestionnaireSession":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._waiter and not self._waiter.done():
+            self._waiter.cancel()
+        self._manager._remove(self)
+
+    async def wait_answer(self, timeout: float) -> discord.Message:
+        """Espera a próxima mensagem do membro no canal. Lança asyncio.TimeoutError."""
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(self._waiter, timeout)
+        finally:
+            self._waiter = None
+
+    def deliver(self, message: discord.Message) -> bool:
+        if message.author.id != self.member_id or self._waiter is None or self._waiter.done():
+            return False
+        self._waiter.set_result(message)
+        self.answers += 1
+        return True
+
+
+class QuestionnaireSessionManager:
+    """Roteia as mensagens do gateway para a sessão dona do canal.
+
+    Substitui um `bot.wait_for('message')` por pergunta: com N sessões ativas,
+    o discord.py rodava os N `check` para cada mensagem do servidor. Aqui cada
+    mensagem custa uma busca no dicionário canal -> sessão, e só a sessão do
+    canal confere o autor.
+    """
+
+    def __init__(self):
+        self._by_channel: Dict[int, QuestionnaireSession] = {}
+        # Métricas
+        self.routed = 0
+
+    def __len__(self) -> int:
+        return len(self._by_channel)
+
+    def open(self, channel: discord.abc.Snowflake, member: discord.abc.Snowflake) -> QuestionnaireSession:
+        """Registra a sessão do canal. Use com `with` para garantir a remoção."""
+        previous = self._by_channel.get(channel.id)
+        if previous is not None:
+            logger.warning(f"Canal {channel.id} já tinha uma sessão de questionário (membro {previous.member_id}); substituída.")
+            previous.close()
+        session = QuestionnaireSession(self, channel.id, member.id)
+        self._by_channel[channel.id] = session
+        return session
+
+    def get(self, channel_id: int) -> Optional[QuestionnaireSession]:
+        return self._by_channel.get(channel_id)
+
+    def _remove(self, session: QuestionnaireSession):
+        if self._by_channel.get(session.channel_id) is session:
+            del self._by_channel[session.channel_id]
+
+    async def suspend_all(self):
+        """Interrompe todas as sessões no desligamento, preservando os checkpoints."""
+        tasks = []
+        for session in list(self._by_channel.values()):
+            session.suspended = True
+            if session.task and not session.task.done():
+                session.task.cancel()
+                tasks.append(session.task)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"{len(tasks)} questionário(s) suspenso(s); serão retomados no próximo início.")
+
+    def route(self, message: discord.Message) -> bool:
+        """Entrega a mensagem à sessão do canal, se houver. Chamado no on_message."""
+        session = self._by_channel.get(message.channel.id)
+        if session is None or not session.deliver(message):
+            return False
+        self.routed += 1
+        return True
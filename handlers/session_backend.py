@@ -0,0 +1,107 @@
+import logging
+from typing import Dict, List, Optional, Union
+
+import discord
+
+from handlers.channel_pool import ChannelPool
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# --- Backends ---
+CHANNEL = "channel"
+THREAD = "thread"
+
+THREAD_AUTO_ARCHIVE_MINUTES = 10080  # Máximo do Discord (7 dias): tickets longos não arquivam sozinhos
+
+SessionChannel = Union[discord.TextChannel, discord.Thread]
+
+
+class ChannelSessionBackend:
+    """Um canal de texto por sessão, com overwrites de permissão e tópico.
+
+    Limitado a 50 canais por categoria e 500 por servidor. Com um pool
+    (`CHANNEL_POOL_SIZE`), usa um canal pré-criado: só o overwrite do dono é
+    enviado, sem criar canal nem tópico.
+    """
+    kind = CHANNEL
+
+    def __init__(self, category: Optional[discord.CategoryChannel], pool: Optional[ChannelPool] = None):
+        self.category = category
+        self.pool = pool
+
+    async def create(self, guild: discord.Guild, name: str, owner: discord.Member, *,
+                     topic: str, overwrites: Dict, reason: Optional[str] = None) -> discord.TextChannel:
+        if self.pool and owner in overwrites:
+            channel = await self.pool.acquire(owner, overwrites[owner])
+            if channel:
+                return channel
+        return await guild.create_text_channel(
+            name=name, category=self.category, overwrites=overwrites, topic=topic, reason=reason)
+
+
+class ThreadSessionBackend:
+    """Uma thread privada por sessão, sob um único canal pai.
+
+    Não envia overwrites e não conta no limite de canais da categoria/servidor.
+    O dono é adicionado à thread; a staff enxerga as threads privadas pela
+    permissão "Gerenciar Threads" no canal pai. Threads não têm tópico, então o
+    dono fica codificado no nome (ver `parse_channel_owner`/`parse_ticket_creator`).
+    """
+    kind = THREAD
+
+    def __init__(self, parent: discord.TextChannel):
+        self.parent = parent
+
+    async def create(self, guild: discord.Guild, name: str, owner: discord.Member, *,
+                     topic: str = "", overwrites: Optional[Dict] = None,
+                     reason: Optional[str] = None) -> discord.Thread:
+        thread = await self.parent.create_thread(
+            name=name[:100], type=discord.ChannelType.private_thread, invitable=False,
+            auto_archive_duration=THREAD_AUTO_ARCHIVE_MINUTES, reason=reason)
+        try:
+            await thread.add_user(owner)
+        except discord.HTTPException:
+            # Thread sem o dono não serve para nada; não deixa órfã
+            await thread.delete()
+            raise
+        return thread
+
+
+def session_backend(guild: discord.Guild, category: Optional[discord.CategoryChannel],
+                    thread_parent_id: Optional[int],
+                    pool: Optional[ChannelPool] = None) -> Union[ChannelSessionBackend, ThreadSessionBackend]:
+    """Backend configurado em SESSION_BACKEND; sem canal pai válido, volta para canais."""
+    if get_config().session_backend == THREAD:
+        parent = guild.get_channel(thread_parent_id) if thread_parent_id else None
+        if isinstance(parent, discord.TextChannel):
+            return ThreadSessionBackend(parent)
+        logger.error(
+            f"SESSION_BACKEND=thread, mas o canal pai ({thread_parent_id}) não existe ou não é de texto; usando canais.")
+    return ChannelSessionBackend(category, pool)
+
+
+async def end_session(bot: discord.Client, channel: SessionChannel, pool: Optional[ChannelPool],
+                      reason: Optional[str] = None):
+    """Encerra a sessão: canal do pool volta a ele (limpo em segundo plano); os demais são apagados."""
+    if pool and pool.owns(channel):
+        pool.release(channel)
+    else:
+        await bot.outbound.delete_channel(channel, reason=reason)
+
+
+def session_channels(guild: discord.Guild, category_id: Optional[int] = None,
+                     thread_parent_id: Optional[int] = None) -> List[SessionChannel]:
+    """Canais e threads de sessão existentes, dos dois backends.
+
+    Os dois são sempre varridos: trocar SESSION_BACKEND não deixa sessões
+    abertas pelo outro backend sem índice.
+    """
+    found: List[SessionChannel] = []
+    category = guild.get_channel(category_id) if category_id else None
+    if isinstance(category, discord.CategoryChannel):
+        found.extend(category.text_channels)
+    parent = guild.get_channel(thread_parent_id) if thread_parent_id else None
+    if isinstance(parent, discord.TextChannel):
+        found.extend(parent.threads)
+    return found
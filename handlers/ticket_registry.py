@@ -0,0 +1,116 @@
+import logging
+import re
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+import discord
+
+from database.database import Database
+from database.models import Ticket
+from handlers.channel_pool import is_pool_channel, pool_channel_owner
+from handlers.session_backend import session_channels
+
+logger = logging.getLogger(__name__)
+
+# Canais e threads de ticket seguem o padrão "ticket-<user_id>"
+TICKET_NAME_PATTERN = re.compile(r"^ticket-(\d+)$")
+
+
+def parse_ticket_creator(channel) -> Optional[int]:
+    """Extrai o ID do criador a partir do nome do canal (ou do overwrite, nos canais do pool)."""
+    match = TICKET_NAME_PATTERN.match(getattr(channel, "name", "") or "")
+    if match:
+        return int(match.group(1))
+    return pool_channel_owner(channel) if is_pool_channel(channel, "ticket") else None
+
+
+class TicketRegistry:
+    """Registro persistente de tickets abertos (canal <-> criador).
+
+    Substitui a busca por nome na lista de canais e o `fetch_member` no
+    fechamento: a existência de um ticket e os dados do criador saem de dicts
+    em memória (O(1)), espelhados na tabela `tickets`. Se o registro divergir do
+    servidor (canal apagado manualmente, bot fora do ar), `reconcile` o corrige
+    a partir dos canais da categoria.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._by_channel: Dict[int, Ticket] = {}
+        self._by_creator: Dict[int, int] = {}
+        self._reserved: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._by_channel)
+
+    # --- Início: Carga e Reconciliação ---
+    async def load(self):
+        rows = await self.db.fetchall(Ticket.SELECT_OPEN)
+        for row in rows:
+            self._add(Ticket.from_row(row))
+        logger.info(f"Registro de tickets carregado: {len(self._by_channel)} ticket(s) aberto(s).")
+
+    def reconcile(self, guild: discord.Guild, category_id: int, thread_parent_id: Optional[int] = None) -> int:
+        """Sincroniza o registro com os canais da categoria de tickets e as
+        threads do canal pai (backend de threads). Retorna o número de correções feitas."""
+        live_channels = {}
+        for channel in session_channels(guild, category_id, thread_parent_id):
+            creator_id = parse_ticket_creator(channel)
+            if creator_id:
+                live_channels[channel.id] = (channel, creator_id)
+
+        fixes = 0
+        for channel_id in list(self._by_channel):
+            if channel_id not in live_channels:
+                self.close(channel_id)
+                fixes += 1
+        for channel_id, (channel, creator_id) in live_channels.items():
+            if channel_id not in self._by_channel:
+                container_id = channel.parent_id if isinstance(channel, discord.Thread) else category_id
+                self.open(Ticket(channel_id, creator_id, channel.created_at, container_id))
+                fixes += 1
+        if fixes:
+            logger.warning(f"Registro de tickets divergia do servidor: {fixes} correção(ões) aplicada(s).")
+        return fixes
+    # --- Fim: Carga e Reconciliação ---
+
+    # --- Início: Consulta ---
+    def get(self, channel_id: int) -> Optional[Ticket]:
+        return self._by_channel.get(channel_id)
+
+    def get_by_creator(self, creator_id: int) -> Optional[Ticket]:
+        channel_id = self._by_creator.get(creator_id)
+        return self._by_channel.get(channel_id) if channel_id else None
+
+    def reserve(self, creator_id: int) -> bool:
+        """Reserva a criação de um ticket. Retorna False se já houver ticket ou reserva."""
+        if creator_id in self._reserved or creator_id in self._by_creator:
+            return False
+        self._reserved.add(creator_id)
+        return True
+
+    def release_reservation(self, creator_id: int):
+        self._reserved.discard(creator_id)
+    # --- Fim: Consulta ---
+
+    # --- Início: Alteração ---
+    def _add(self, ticket: Ticket):
+        self._by_channel[ticket.channel_id] = ticket
+        self._by_creator[ticket.creator_id] = ticket.channel_id
+
+    def open(self, ticket: Ticket):
+        self._reserved.discard(ticket.creator_id)
+        self._add(ticket)
+        self.db.execute_nowait(Ticket.UPSERT, ticket.to_params())
+
+    def close(self, channel_id: int) -> Optional[Ticket]:
+        ticket = self._by_channel.pop(channel_id, None)
+        if ticket is None:
+            return None
+        if self._by_creator.get(ticket.creator_id) == channel_id:
+            del self._by_creator[ticket.creator_id]
+        closed = replace(ticket, closed_at=datetime.now(timezone.utc))
+        self.db.execute_nowait(Ticket.UPSERT, closed.to_params())
+        return closed
+    # --- Fim: Alteração ---
@@ -0,0 +1,121 @@
+import gzip
+import html
+import io
+import logging
+from collections import Counter
+from datetime import timezone
+from typing import AsyncIterator, Optional, Tuple
+
+from utils.config import TRANSCRIPT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+TRANSCRIPT_HEADER = "--- Transcrição do Ticket ---\n\n"
+TRANSCRIPT_FOOTER = "--- Fim da Transcrição ---\n"
+
+
+def format_timestamp(dt) -> str:
+    return dt.astimezone(timezone.utc).strftime("%d/%m/%Y %H:%M:%S UTC")
+
+
+def format_transcript_line(msg) -> str:
+    """Formata uma mensagem do ticket como texto da transcrição."""
+    content = msg.clean_content if msg.clean_content else "(mensagem vazia)"
+    attachments_str = ""
+    if msg.attachments:
+        # Lista apenas nomes de anexos
+        attachments_str = "\n  " + "\n  ".join(f"[Anexo: {att.filename}]" for att in msg.attachments)
+    # Simplifica embeds para texto
+    embeds_str = ""
+    if msg.embeds:
+        embeds_str = f"\n  [Embed: {msg.embeds[0].title if msg.embeds[0].title else '(sem título)'}]"
+    return f"[{format_timestamp(msg.created_at)}] {msg.author}:\n  {content}{attachments_str}{embeds_str}\n\n"
+
+
+def format_transcript_html(msg) -> str:
+    """Formata uma mensagem do ticket como bloco HTML (conteúdo escapado)."""
+    content = html.escape(msg.clean_content) if msg.clean_content else "<i>(mensagem vazia)</i>"
+    extras = []
+    for att in msg.attachments:
+        url = getattr(att, "url", None)
+        name = html.escape(att.filename)
+        extras.append(f'<div class="att">📎 <a href="{html.escape(url)}">{name}</a></div>' if url else f'<div class="att">📎 {name}</div>')
+    if msg.embeds:
+        extras.append(f'<div class="att">[Embed: {html.escape(msg.embeds[0].title or "(sem título)")}]</div>')
+    return (f'<div class="msg"><span class="ts">{format_timestamp(msg.created_at)}</span> '
+            f'<span class="author">{html.escape(str(msg.author))}</span>'
+            f'<div class="content">{content}</div>{"".join(extras)}</div>\n')
+
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; background: #313338; color: #dbdee1; margin: 24px; }}
+.msg {{ padding: 6px 0; border-bottom: 1px solid #3f4147; }}
+.ts {{ color: #949ba4; font-size: 12px; }}
+.author {{ font-weight: bold; color: #f2f3f5; margin-left: 6px; }}
+.content {{ margin-top: 4px; white-space: pre-wrap; word-wrap: break-word; }}
+.att {{ color: #00a8fc; font-size: 13px; }}
+a {{ color: #00a8fc; }}
+</style></head><body>
+<h2>{title}</h2>
+"""
+HTML_FOOT = "</body></html>\n"
+
+
+class TranscriptSummary:
+    """Estatísticas acumuladas durante a renderização da transcrição."""
+
+    def __init__(self):
+        self.messages = 0
+        self.attachments = 0
+        self.participants: Counter = Counter()  # (id, nome) -> nº de mensagens
+        self.first_at = None
+        self.last_at = None
+
+    def add(self, msg):
+        self.messages += 1
+        self.attachments += len(msg.attachments)
+        self.participants[(getattr(msg.author, "id", None), str(msg.author))] += 1
+        if self.first_at is None:
+            self.first_at = msg.created_at
+        self.last_at = msg.created_at
+
+
+async def render_transcript(messages: AsyncIterator, title: str, fmt: str = "text",
+                            compress: bool = False) -> Tuple[Optional[io.BytesIO], Optional[str], TranscriptSummary]:
+    """Renderiza o histórico inteiro em um único arquivo em memória.
+
+    As mensagens são consumidas em streaming e escritas direto no buffer
+    (passando pelo gzip quando `compress` é True), sem lista intermediária.
+    Retorna (buffer, nome_do_arquivo, resumo); buffer e nome são None se o
+    histórico estiver vazio.
+    """
+    if fmt not in TRANSCRIPT_FORMATS:
+        fmt = "text"
+    buffer = io.BytesIO()
+    sink = gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6) if compress else buffer
+    summary = TranscriptSummary()
+
+    if fmt == "html":
+        sink.write(HTML_HEAD.format(title=html.escape(title)).encode("utf-8"))
+        formatter = format_transcript_html
+    else:
+        sink.write(f"{title}\n{TRANSCRIPT_HEADER}".encode("utf-8"))
+        formatter = format_transcript_line
+
+    async for msg in messages:
+        summary.add(msg)
+        sink.write(formatter(msg).encode("utf-8"))
+
+    sink.write((HTML_FOOT if fmt == "html" else TRANSCRIPT_FOOTER).encode("utf-8"))
+    if compress:
+        sink.close()  # Finaliza o stream gzip (não fecha o BytesIO)
+
+    if summary.messages == 0:
+        return None, None, summary
+    buffer.seek(0)
+    extension = "html" if fmt == "html" else "txt"
+    filename = f"transcript-{title.lstrip('#')}.{extension}" + (".gz" if compress else "")
+    return buffer, filename, summary
@@ -0,0 +1,125 @@
+import logging
+import re
+from typing import Dict, Optional, Set
+
+import discord
+
+from handlers.channel_pool import is_pool_channel, pool_channel_owner
+
+logger = logging.getLogger(__name__)
+
+# Mesmo formato gravado no tópico pelo WhitelistView: "CheckID: wl-<user_id>"
+CHECK_ID_PATTERN = re.compile(r"CheckID: wl-(\d+)")
+# Threads não têm tópico: o ID completo do dono vai no fim do nome ("wl-<nome>-<user_id>")
+THREAD_NAME_PATTERN = re.compile(r"^wl-.*-(\d{15,21})$")
+
+
+def check_id_for(user_id: int) -> str:
+    return f"CheckID: wl-{user_id}"
+
+
+def thread_name_for(base_name: str, user_id: int) -> str:
+    suffix = f"-{user_id}"
+    return f"{base_name[:100 - len(suffix)]}{suffix}"
+
+
+def parse_channel_owner(channel) -> Optional[int]:
+    """Extrai o ID do dono de um canal de whitelist (tópico ou overwrite, no pool) ou de uma thread (nome)."""
+    if isinstance(channel, discord.Thread):
+        match = THREAD_NAME_PATTERN.match(channel.name or "")
+        return int(match.group(1)) if match else None
+    topic = getattr(channel, "topic", None)
+    match = CHECK_ID_PATTERN.search(topic) if topic else None
+    if match:
+        return int(match.group(1))
+    # Canal do pool: sem tópico, o dono é o overwrite de membro
+    return pool_channel_owner(channel) if is_pool_channel(channel, "wl") else None
+
+
+class WhitelistChannelIndex:
+    """Índice user_id -> canal de whitelist aberto.
+
+    Montado uma vez na inicialização (varrendo os tópicos) e mantido pelos
+    eventos de criação/remoção de canal, para que o botão de whitelist confira
+    em O(1) se o usuário já tem um canal. A reserva (`reserve`) cobre o intervalo
+    entre o clique e o retorno do `create_text_channel`, impedindo que um clique
+    duplo crie dois canais.
+    """
+
+    def __init__(self):
+        self._by_user: Dict[int, int] = {}
+        self._by_channel: Dict[int, int] = {}
+        self._reserved: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._by_user)
+
+    @property
+    def reserved_count(self) -> int:
+        return len(self._reserved)
+
+    # --- Início: Consulta e Reserva ---
+    def get(self, user_id: int) -> Optional[int]:
+        """ID do canal de whitelist aberto do usuário, se houver."""
+        return self._by_user.get(user_id)
+
+    def reserve(self, user_id: int) -> bool:
+        """Reserva a criação de um canal. Retorna False se já houver canal ou reserva."""
+        if user_id in self._reserved or user_id in self._by_user:
+            return False
+        self._reserved.add(user_id)
+        return True
+
+    def open_channels(self) -> Dict[int, int]:
+        """Cópia do mapa canal -> dono dos canais de whitelist abertos."""
+        return dict(self._by_channel)
+
+    def release_reservation(self, user_id: int):
+        self._reserved.discard(user_id)
+
+    def register(self, user_id: int, channel_id: int):
+        """Associa o canal ao usuário e libera a reserva."""
+        self._reserved.discard(user_id)
+        previous = self._by_user.get(user_id)
+        if previous and previous != channel_id:
+            self._by_channel.pop(previous, None)
+        self._by_user[user_id] = channel_id
+        self._by_channel[channel_id] = user_id
+
+    def discard_user(self, user_id: int):
+        channel_id = self._by_user.pop(user_id, None)
+        if channel_id is not None:
+            self._by_channel.pop(channel_id, None)
+    # --- Fim: Consulta e Reserva ---
+
+    # --- Início: Manutenção por Eventos ---
+    def rebuild(self, guild: discord.Guild) -> int:
+        """Reconstrói o índice a partir dos tópicos dos canais e dos nomes das threads."""
+        self._by_user.clear()
+        self._by_channel.clear()
+        for channel in [*guild.text_channels, *guild.threads]:
+            owner_id = parse_channel_owner(channel)
+            if owner_id:
+                self.register(owner_id, channel.id)
+        logger.info(f"Índice de canais de whitelist reconstruído: {len(self._by_user)} canal(is) aberto(s).")
+        return len(self._by_user)
+
+    def on_channel_create(self, channel):
+        owner_id = parse_channel_owner(channel)
+        if owner_id:
+            self.register(owner_id, channel.id)
+
+    def on_channel_update(self, before, after):
+        if getattr(before, "topic", None) != getattr(after, "topic", None):
+            self.on_channel_delete(before)
+            self.on_channel_create(after)
+
+    def on_channel_delete(self, channel):
+        owner_id = self._by_channel.pop(channel.id, None)
+        if owner_id is not None and self._by_user.get(owner_id) == channel.id:
+            del self._by_user[owner_id]
+    # --- Fim: Manutenção por Eventos ---
+
+
+# Instância única compartilhada pela view e pelo cog de whitelist
+whitelist_channels = WhitelistChannelIndex()
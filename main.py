@@ -5,6 +5,21 @@ import itertools
 # <--- CERTIFIQUE-SE DE IMPORTAR A VIEW AQUI
 from views.whitelist_view import WhitelistView
 from cogs.ticket_system import CreateTicketView, TicketControlView
+from database.database import Database
+from database.attempt_ids import AttemptIdAllocator
+from database.importer import import_whitelist_csv
+from handlers.admission import AdmissionController
+from handlers.answer_writer import AnswerWriteBehind
+from handlers.channel_pool import ChannelPool
+from handlers.member_pipeline import MemberPipeline, MemberStage, JOIN, LEAVE
+from handlers.questionnaire import CSV_FILENAME, BRASILIA_TZ, cooldowns
+from handlers.questionnaire_sessions import QuestionnaireSessionManager
+from utils.config import get_config
+from utils.dispatcher import DEFAULT_WORKERS, OutboundDispatcher
+from utils.resolver import GuildResolver
+from utils.logger import setup_logging
+from utils.metrics import InstrumentedCommandTree, MetricsRegistry, MetricsServer, observe_command, register_bot_metrics
+from utils.log_sink import DiscordLogSink, LOW as LOG_LOW, NORMAL as LOG_NORMAL, HIGH as LOG_HIGH
 import os
 from dotenv import load_dotenv
 import asyncio
@@ -12,20 +27,20 @@ import logging
 from datetime import datetime, timezone
 import traceback
 import sys
-import random
 import ctypes
 import aiohttp
-import logging
 
 if sys.platform == 'win32':
     kernel32 = ctypes.windll.kernel32
     kernel32.SetConsoleOutputCP(65001)
 
 load_dotenv()
+# Log fora do event loop (fila + thread); configurado antes de validar o .env
+setup_logging()
 TOKEN = os.getenv("DISCORD_TOKEN")
-try:
-    GUILD_ID = int(os.getenv("DISCORD_GUILD_ID"))
-except (TypeError, ValueError):
+# Todo o .env é validado uma vez em utils/config.py
+GUILD_ID = get_config().guild_id
+if GUILD_ID is None:
     logging.critical(
         "DISCORD_GUILD_ID não definido ou inválido no .env! Encerrando.")
     sys.exit("Erro: DISCORD_GUILD_ID ausente ou inválido.")
@@ -34,19 +49,94 @@ except (TypeError, ValueError):
 class CustomBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.all()
+        # Criado antes do cliente: o trace HTTP alimenta os buckets de rate limit
+        self.outbound = OutboundDispatcher(get_config().outbound_workers or DEFAULT_WORKERS)
         super().__init__(
             command_prefix="!",
             intents=intents,
             help_command=None,
-            chunk_guilds_at_startup=False
+            chunk_guilds_at_startup=False,
+            http_trace=self.outbound.trace_config,
+            tree_cls=InstrumentedCommandTree
         )
         self.persistent_views_added = False
         self.guild_id = GUILD_ID
+        self.db = Database()
+        self.attempt_ids = AttemptIdAllocator(self.db)
+        self.answer_writer = AnswerWriteBehind(self.db, CSV_FILENAME, BRASILIA_TZ)
+        self._csv_import_task = None
+        # Canal de logs resolvido uma vez; eventos agrupados em mensagens de até 10 embeds
+        self.log_sink = DiscordLogSink(self, get_config().logs_channel_id)
+        # Entradas/saídas passam por um pipeline único; os cogs registram as próprias etapas.
+        # As funções são definidas mais abaixo no módulo e resolvidas no momento da chamada.
+        self.member_pipeline = MemberPipeline()
+        self.questionnaire_sessions = QuestionnaireSessionManager()
+        # Tasks dos questionários em segundo plano (spawn_questionnaire); encerradas no close()
+        self.questionnaire_tasks = set()
+        # Canais pré-criados e reciclados; carregados pelos cogs no on_ready
+        pool_size = get_config().channel_pool_size
+        self.channel_pools = {"whitelist": ChannelPool("wl", pool_size), "ticket": ChannelPool("ticket", pool_size)}
+        # Limite de questionários simultâneos (WHITELIST_MAX_SESSIONS) com fila de espera
+        self.whitelist_admission = AdmissionController()
+        # Canais/cargos por nome lógico, resolvidos uma vez e invalidados pelos eventos abaixo
+        self.resolver = GuildResolver()
+        # Métricas no formato do Prometheus (endpoint local em METRICS_PORT)
+        self.metrics = MetricsRegistry()
+        register_bot_metrics(self.metrics, self, cooldowns)
+        self.metrics_server = None
+        self.member_pipeline.register(MemberStage("cargo Visitante", lambda member: grant_visitante_role(member)))
+        self.member_pipeline.register(MemberStage("log", lambda member: send_member_log(member, "join")))
+        self.member_pipeline.register(MemberStage("log", lambda member: send_member_log(member, "leave"), event=LEAVE))
 
     async def on_message(self, message):
-        pass
+        # Respostas de questionário: uma busca por canal, sem um wait_for por sessão
+        self.questionnaire_sessions.route(message)
+
+    async def on_app_command_completion(self, interaction, command):
+        observe_command(interaction)
+
+    # --- Início: Invalidação do Resolver ---
+    async def on_guild_channel_create(self, channel):
+        self.resolver.on_channel_event(channel)
+
+    async def on_guild_channel_update(self, before, after):
+        self.resolver.on_channel_event(after, before)
+
+    async def on_guild_channel_delete(self, channel):
+        self.resolver.on_channel_event(channel)
+
+    async def on_guild_role_create(self, role):
+        self.resolver.on_role_event(role)
+
+    async def on_guild_role_update(self, before, after):
+        self.resolver.on_role_event(after, before)
+
+    async def on_guild_role_delete(self, role):
+        self.resolver.on_role_event(role)
+    # --- Fim: Invalidação do Resolver ---
 
     async def setup_hook(self):
+        # --- BANCO DE DADOS ---
+        # Aberto antes dos cogs, que dependem dele no cog_load
+        await self.db.connect()
+        await self.attempt_ids.load()
+        await cooldowns.load(self.db)
+        self.answer_writer.start()
+        self.outbound.start()
+        self.log_sink.start()
+        self.member_pipeline.start()
+        config = get_config()
+        if config.metrics_port:
+            self.metrics_server = MetricsServer(self.metrics, config.metrics_host, config.metrics_port)
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                logging.error(f"Endpoint de métricas não iniciado ({config.metrics_host}:{config.metrics_port}): {e}")
+                self.metrics_server = None
+        # Importação única do CSV legado, em segundo plano para não atrasar o login
+        self._csv_import_task = asyncio.create_task(
+            import_whitelist_csv(self.db, CSV_FILENAME, BRASILIA_TZ, allocate=self.attempt_ids.allocate))
+        # ------------------------------------
         # --- REGISTRO DE VIEWS PERSISTENTES ---
         if not self.persistent_views_added:
             # Adicione instâncias de TODAS as suas views persistentes aqui
@@ -61,6 +151,29 @@ class CustomBot(commands.Bot):
         # ------------------------------------
         await self.load_extensions()
 
+    async def close(self):
+        # Questionários em andamento param aqui; os checkpoints permitem retomá-los
+        await self.questionnaire_sessions.suspend_all()
+        # As que ainda não tinham sessão (mensagens iniciais, fila) também param
+        for task in list(self.questionnaire_tasks):
+            task.cancel()
+        await asyncio.gather(*self.questionnaire_tasks, return_exceptions=True)
+        await self.member_pipeline.stop()
+        for pool in self.channel_pools.values():
+            await pool.stop()
+        # Envia os logs pendentes enquanto a sessão HTTP ainda está aberta
+        await self.log_sink.stop()
+        await super().close()
+        await self.outbound.stop()
+        # Importação interrompida será retomada (idempotente) no próximo início
+        if self._csv_import_task and not self._csv_import_task.done():
+            self._csv_import_task.cancel()
+        # Grava as respostas pendentes e fecha o banco por último
+        await self.answer_writer.stop()
+        await self.db.close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+
     async def load_extensions(self):
         log_header("CARREGANDO EXTENSÕES", "📦")
         loaded = 0
@@ -106,21 +219,9 @@ class CustomBot(commands.Bot):
 
 bot = CustomBot()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler('bot.log', encoding='utf-8', mode='a'),
-        logging.StreamHandler()
-    ]
-)
-
-
 def log_header(message, emoji="ℹ️"):
-    logging.info(f"\n{emoji} {'=' * 50}")
-    logging.info(f"{emoji} {message.center(48)}")
-    logging.info(f"{emoji} {'=' * 50}")
+    # Um registro só (antes eram três linhas por cabeçalho)
+    logging.info(f"{emoji} {'=' * 15} {message} {'=' * 15}")
 
 
 def log_status(message, status="success"):
@@ -130,34 +231,9 @@ def log_status(message, status="success"):
     logging.log(level, f"{emojis.get(status, 'ℹ️')} {message}")
 
 
-async def send_log_discord(embed_content):
-    try:
-        logs_channel_id_str = os.getenv("LOGS_DISCORD")
-        if logs_channel_id_str:
-            try:
-                channel_id = int(logs_channel_id_str)
-                channel = bot.get_channel(channel_id)
-                if channel:
-                    await channel.send(embed=embed_content)
-                else:
-                    log_status(
-                        f"Canal de logs Discord (ID: {channel_id}) não encontrado no cache.", "warning")
-            except ValueError:
-                log_status(
-                    f"LOGS_DISCORD ('{logs_channel_id_str}') é inválido.", "error")
-            except discord.Forbidden:
-                log_status(
-                    f"Permissão negada para enviar mensagens no canal de logs (ID: {logs_channel_id_str}).", "error")
-            except discord.HTTPException as e:
-                log_status(
-                    f"Erro HTTP ao enviar log para Discord: {e}", "error")
-            except Exception as e:
-                log_status(
-                    f"Erro inesperado ao enviar log para Discord: {e}", "error")
-                logging.error(traceback.format_exc())
-    except Exception as e:
-        log_status(
-            f"Erro crítico ao tentar enviar log para Discord: {str(e)}", "error")
+def send_log_discord(embed_content, priority=LOG_NORMAL, kind="evento"):
+    """Enfileira o embed no canal de logs (LOGS_DISCORD); o envio é agrupado pelo sink."""
+    bot.log_sink.log(embed_content, priority=priority, kind=kind)
 
 
 @bot.event
@@ -210,9 +286,10 @@ async def on_ready():
             name="📅 Horário", value=f"<t:{unix_timestamp}:F>", inline=False)
         embed_ready.set_footer(text="Genesis RP System")
 
-        await send_log_discord(embed_ready)
+        await bot.log_sink.resolve()
+        send_log_discord(embed_ready, priority=LOG_HIGH, kind="inicialização")
         log_status(
-            "Mensagem de inicialização enviada para o canal de logs", "success")
+            "Mensagem de inicialização enfileirada para o canal de logs", "success")
 
         log_header("SINCRONIZANDO COMANDOS SLASH", "🔄")
         try:
@@ -238,63 +315,96 @@ async def on_ready():
 
 
 async def send_member_log(member, action):
+    """Etapa de log de entrada/saída; erros sobem para o pipeline (contados como falha)."""
+    is_join = action == "join"
+    color = discord.Color.green() if is_join else discord.Color.red()
+    title = f"{'🟢' if is_join else '🔴'} {'Novo Membro' if is_join else 'Membro Saiu'}"
+
+    embed = discord.Embed(
+        color=color,
+        timestamp=datetime.now()
+    )
+    embed.set_author(name=f"{member.name} ({member.id})",
+                     icon_url=member.display_avatar.url)
+    embed.set_thumbnail(url=member.display_avatar.url)
+
+    created_unix = int(member.created_at.timestamp())
+    embed.add_field(name="📅 Conta Criada",
+                    value=f"<t:{created_unix}:F> (<t:{created_unix}:R>)", inline=False)
+
+    if not is_join and member.joined_at:
+        joined_unix = int(member.joined_at.timestamp())
+        embed.add_field(name="👋 Entrada no Servidor",
+                        value=f"<t:{joined_unix}:F> (<t:{joined_unix}:R>)", inline=False)
+        now_utc = datetime.now(timezone.utc)
+        time_in_server = now_utc - member.joined_at
+        days = time_in_server.days
+        duration_str = f"{days} dia(s)" if days > 0 else "Menos de um dia"
+        if days < 3:
+            hours, remainder = divmod(time_in_server.seconds, 3600)
+            minutes, _ = divmod(remainder, 60)
+            duration_str = f"{days}d {hours}h {minutes}m" if days > 0 else f"{hours}h {minutes}m"
+
+        embed.add_field(name="⏱ Tempo no Servidor",
+                        value=duration_str, inline=True)
+
+    current_member_count = member.guild.member_count
+    embed.add_field(name="👥 Total Atual", value=str(
+        current_member_count), inline=True)
+
+    if not is_join:
+        roles = [role.mention for role in sorted(
+            member.roles, key=lambda r: r.position, reverse=True) if role.name != "@everyone"]
+        role_limit = 10
+        roles_str = "Nenhum cargo específico."
+        if roles:
+            roles_to_show = roles[:role_limit]
+            roles_str = " ".join(roles_to_show)
+            if len(roles) > role_limit:
+                roles_str += f" (+{len(roles) - role_limit})"
+
+        embed.add_field(
+            name=f"🔹 Cargos ({len(roles)})", value=roles_str, inline=False)
+
+    send_log_discord(embed, priority=LOG_LOW, kind="entrada" if is_join else "saída")
+
+
+async def grant_visitante_role(member: discord.Member) -> bool:
+    """Etapa de entrada: atribui o cargo Visitante.
+
+    Retorna False quando o cargo deveria ser atribuído e não foi (o pipeline
+    conta como falha). Sem VISITANTE_ID não há o que fazer: conta como concluída.
+    """
+    visitante_role_id = get_config().visitante_role_id
+    if visitante_role_id is None:
+        return True  # Desativado por configuração (pode mudar com /recarregar_config)
+    role = bot.resolver.get("visitante_role", member.guild)
+    if not role:
+        log_status(
+            f"Cargo Visitante (ID: {visitante_role_id}) não encontrado no servidor.", "warning")
+        return False
     try:
-        is_join = action == "join"
-        color = discord.Color.green() if is_join else discord.Color.red()
-        title = f"{'🟢' if is_join else '🔴'} {'Novo Membro' if is_join else 'Membro Saiu'}"
+        await bot.outbound.add_roles(member, role, reason="Entrada no servidor")
+        log_status(
+            f"Cargo '{role.name}' atribuído a {member.name} ({member.id})", "success")
 
-        embed = discord.Embed(
-            color=color,
+        embed_role = discord.Embed(
+            description=f"✅ {member.mention} recebeu o cargo {role.mention} ao entrar.",
+            color=discord.Color.blue(),
             timestamp=datetime.now()
         )
-        embed.set_author(name=f"{member.name} ({member.id})",
-                         icon_url=member.display_avatar.url)
-        embed.set_thumbnail(url=member.display_avatar.url)
-
-        created_unix = int(member.created_at.timestamp())
-        embed.add_field(name="📅 Conta Criada",
-                        value=f"<t:{created_unix}:F> (<t:{created_unix}:R>)", inline=False)
-
-        if not is_join and member.joined_at:
-            joined_unix = int(member.joined_at.timestamp())
-            embed.add_field(name="👋 Entrada no Servidor",
-                            value=f"<t:{joined_unix}:F> (<t:{joined_unix}:R>)", inline=False)
-            now_utc = datetime.now(timezone.utc)
-            time_in_server = now_utc - member.joined_at
-            days = time_in_server.days
-            duration_str = f"{days} dia(s)" if days > 0 else "Menos de um dia"
-            if days < 3:
-                hours, remainder = divmod(time_in_server.seconds, 3600)
-                minutes, _ = divmod(remainder, 60)
-                duration_str = f"{days}d {hours}h {minutes}m" if days > 0 else f"{hours}h {minutes}m"
-
-            embed.add_field(name="⏱ Tempo no Servidor",
-                            value=duration_str, inline=True)
-
-        current_member_count = member.guild.member_count
-        embed.add_field(name="👥 Total Atual", value=str(
-            current_member_count), inline=True)
-
-        if not is_join:
-            roles = [role.mention for role in sorted(
-                member.roles, key=lambda r: r.position, reverse=True) if role.name != "@everyone"]
-            role_limit = 10
-            roles_str = "Nenhum cargo específico."
-            if roles:
-                roles_to_show = roles[:role_limit]
-                roles_str = " ".join(roles_to_show)
-                if len(roles) > role_limit:
-                    roles_str += f" (+{len(roles) - role_limit})"
-
-            embed.add_field(
-                name=f"🔹 Cargos ({len(roles)})", value=roles_str, inline=False)
-
-        await send_log_discord(embed)
-
-    except Exception as e:
+        embed_role.set_author(
+            name=f"{member.name} ({member.id})", icon_url=member.display_avatar.url)
+        send_log_discord(embed_role, priority=LOG_LOW, kind="cargo Visitante atribuído")
+        return True
+    except discord.Forbidden:
+        log_status(
+            f"Permissão negada para adicionar cargo Visitante a {member.name}.", "error")
+        return False
+    except discord.HTTPException as e:
         log_status(
-            f"Erro ao criar/enviar log de membro para {member.id} (Ação: {action}): {str(e)}", "error")
-        logging.error(traceback.format_exc())
+            f"Erro HTTP ao adicionar cargo Visitante a {member.name}: {e}", "error")
+        return False
 
 
 @bot.event
@@ -303,50 +413,8 @@ async def on_member_join(member: discord.Member):
         log_status(
             f"Bot {member.name} entrou, ignorando processamento de membro.", "info")
         return
-
-    await send_member_log(member, "join")
-
-    visitante_id_str = os.getenv("VISITANTE_ID")
-    if visitante_id_str:
-        try:
-            visitante_role_id = int(visitante_id_str)
-            role = member.guild.get_role(visitante_role_id)
-            if role:
-                log_status(
-                    f"Tentando adicionar cargo '{role.name}' para {member.name}...", "loading")
-                await asyncio.sleep(random.uniform(0.3, 0.8))
-                await member.add_roles(role, reason="Entrada no servidor")
-                log_status(
-                    f"Cargo '{role.name}' atribuído a {member.name} ({member.id})", "success")
-
-                embed_role = discord.Embed(
-                    description=f"✅ {member.mention} recebeu o cargo {role.mention} ao entrar.",
-                    color=discord.Color.blue(),
-                    timestamp=datetime.now()
-                )
-                embed_role.set_author(
-                    name=f"{member.name} ({member.id})", icon_url=member.display_avatar.url)
-                await send_log_discord(embed_role)
-
-            else:
-                log_status(
-                    f"Cargo Visitante (ID: {visitante_id_str}) não encontrado no servidor.", "warning")
-        except ValueError:
-            log_status(
-                f"VISITANTE_ID ('{visitante_id_str}') é inválido.", "error")
-        except discord.Forbidden:
-            log_status(
-                f"Permissão negada para adicionar cargo Visitante a {member.name}.", "error")
-        except discord.HTTPException as e:
-            log_status(
-                f"Erro HTTP ao adicionar cargo Visitante a {member.name}: {e}", "error")
-        except Exception as e:
-            log_status(
-                f"Erro inesperado ao atribuir cargo Visitante a {member.name}: {str(e)}", "error")
-            logging.error(traceback.format_exc())
-    else:
-        log_status(
-            "VISITANTE_ID não definido no .env, cargo não atribuído.", "warning")
+    # Etapas (cargo, log, boas-vindas...) rodam em paralelo no pipeline de membros
+    bot.member_pipeline.enqueue(JOIN, member)
 
 # Ciclo de status do bot
 status_list = itertools.cycle([
@@ -366,7 +434,7 @@ async def on_member_remove(member: discord.Member):
     if member.bot:
         return
     log_status(f"Membro {member.name} ({member.id}) saiu.", "info")
-    await send_member_log(member, "leave")
+    bot.member_pipeline.enqueue(LEAVE, member)
 
 
 async def main():
@@ -0,0 +1,246 @@
+import logging
+import os
+from dataclasses import dataclass, fields
+from typing import FrozenSet, List, Optional, Tuple
+
+import discord
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = ("1", "true", "sim", "yes")
+WHITELIST_MODES = ("channel", "modal")
+SESSION_BACKENDS = ("channel", "thread")
+TRANSCRIPT_FORMATS = ("text", "html")
+
+
+@dataclass(frozen=True)
+class BotConfig:
+    """Snapshot imutável da configuração do .env, validado uma única vez.
+
+    Os cogs leem sempre de `get_config()` no momento do uso (nunca guardam
+    cópias), então `reload_config()` troca a configuração de todo o bot com uma
+    única atribuição.
+    """
+    guild_id: Optional[int]
+    # --- Cargos ---
+    mod_role_ids: FrozenSet[int]
+    visitante_role_id: Optional[int]
+    turista_role_id: Optional[int]
+    analise_role_id: Optional[int]
+    # --- Canais ---
+    logs_channel_id: Optional[int]
+    whitelist_channel_id: Optional[int]
+    verificar_channel_id: Optional[int]
+    comunicados_channel_id: Optional[int]
+    avisos_channel_id: Optional[int]
+    boas_vindas_channel_id: Optional[int]
+    regras_channel_id: Optional[int]
+    ticket_category_id: Optional[int]
+    closed_ticket_log_channel_id: Optional[int]
+    ticket_log_channel_id: Optional[int]
+    comunicados_channel_ids: FrozenSet[int]  # Canais onde /comunicados pode ser usado
+    # --- Sessões (whitelist e tickets) ---
+    session_backend: str  # "channel" (canal por sessão) ou "thread" (thread privada)
+    whitelist_thread_parent_id: Optional[int]
+    ticket_thread_parent_id: Optional[int]
+    channel_pool_size: int  # Canais pré-criados por categoria (0 desativa o pool)
+    # --- Requisições de saída ---
+    outbound_workers: int  # Requisições simultâneas (0 = padrão do dispatcher)
+    # --- Whitelist ---
+    whitelist_mode: str  # "channel" (canal por candidato) ou "modal" (formulários efêmeros)
+    whitelist_max_sessions: int  # Questionários simultâneos no modo canal (0 = sem limite)
+    # --- Métricas ---
+    metrics_port: int  # Porta do endpoint /metrics (0 desativa)
+    metrics_host: str
+    interaction_ack_budget: float  # Segundos até o defer automático de uma interação (0 desativa)
+    # --- Tickets ---
+    transcript_format: str
+    transcript_gzip: bool
+    # Problemas encontrados na validação (variáveis ausentes ou inválidas)
+    problems: Tuple[str, ...] = ()
+
+    # --- Início: Flags de Funcionalidade ---
+    @property
+    def tickets_enabled(self) -> bool:
+        return bool(self.ticket_category_id and self.mod_role_ids)
+
+    @property
+    def verification_enabled(self) -> bool:
+        return bool(self.turista_role_id and self.visitante_role_id)
+
+    @property
+    def comunicados_enabled(self) -> bool:
+        return bool(self.comunicados_channel_ids and self.mod_role_ids)
+    # --- Fim: Flags de Funcionalidade ---
+
+    # --- Início: Permissões ---
+    def is_moderator(self, member) -> bool:
+        """True se o membro tem algum cargo de moderação (interseção de conjuntos)."""
+        return not self.mod_role_ids.isdisjoint(role.id for role in getattr(member, "roles", ()))
+    # --- Fim: Permissões ---
+
+    def diff(self, other: "BotConfig") -> List[str]:
+        """Nomes dos campos que mudaram entre dois snapshots."""
+        return [f.name for f in fields(self)
+                if f.name != "problems" and getattr(self, f.name) != getattr(other, f.name)]
+
+
+# --- Início: Leitura e Validação ---
+def _read_id(name: str, problems: List[str], required: bool = False) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    if not value:
+        if required:
+            problems.append(f"{name} não definido")
+        return None
+    if not value.isdigit():
+        problems.append(f"{name} inválido ('{value}')")
+        return None
+    return int(value)
+
+
+def _read_count(name: str, problems: List[str], zero_meaning: str) -> int:
+    """Inteiro não negativo opcional; ausente ou inválido vale 0."""
+    value = os.getenv(name, "").strip() or "0"
+    if not value.isdigit():
+        problems.append(f"{name} inválido ('{value}'); {zero_meaning}")
+        return 0
+    return int(value)
+
+
+def _read_seconds(name: str, problems: List[str], default: float, maximum: float) -> float:
+    """Segundos (decimal) opcionais entre 0 e `maximum`; ausente ou inválido usa o padrão."""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = -1.0
+    if not 0 <= seconds <= maximum:
+        problems.append(f"{name} inválido ('{value}'); usando {default}")
+        return default
+    return seconds
+
+
+def _read_id_set(name: str, problems: List[str], required: bool = False) -> FrozenSet[int]:
+    value = os.getenv(name, "")
+    ids = set()
+    for part in value.split(","):
+        part = part.strip()
+        if part.isdigit():
+            ids.add(int(part))
+        elif part:
+            problems.append(f"Valor inválido '{part}' em {name}")
+    if required and not ids:
+        problems.append(f"{name} não definido ou vazio")
+    return frozenset(ids)
+
+
+def load_config(reload_env: bool = False) -> BotConfig:
+    """Lê e valida todas as variáveis de ambiente. Nunca lança por valor ausente/inválido:
+    o campo fica None (ou vazio) e o problema é registrado em `problems`."""
+    load_dotenv(override=reload_env)
+    problems: List[str] = []
+
+    transcript_format = os.getenv("TICKET_TRANSCRIPT_FORMAT", "text").strip().lower()
+    if transcript_format not in TRANSCRIPT_FORMATS:
+        problems.append(f"TICKET_TRANSCRIPT_FORMAT '{transcript_format}' inválido; usando 'text'")
+        transcript_format = "text"
+
+    whitelist_mode = os.getenv("WHITELIST_MODE", "channel").strip().lower()
+    if whitelist_mode not in WHITELIST_MODES:
+        problems.append(f"WHITELIST_MODE '{whitelist_mode}' inválido; usando 'channel'")
+        whitelist_mode = "channel"
+
+    session_backend = os.getenv("SESSION_BACKEND", "channel").strip().lower()
+    if session_backend not in SESSION_BACKENDS:
+        problems.append(f"SESSION_BACKEND '{session_backend}' inválido; usando 'channel'")
+        session_backend = "channel"
+    thread_backend = session_backend == "thread"
+
+    comunicados_id = _read_id("COMUNICADOS_ID", problems, required=True)
+    avisos_id = _read_id("AVISOS_ID", problems)
+    config = BotConfig(
+        guild_id=_read_id("DISCORD_GUILD_ID", problems, required=True),
+        mod_role_ids=_read_id_set("ALLOWED_MOD_ROLE_IDS", problems, required=True),
+        visitante_role_id=_read_id("VISITANTE_ID", problems, required=True),
+        turista_role_id=_read_id("TURISTA_ID", problems, required=True),
+        analise_role_id=_read_id("ANALISE_ID", problems, required=True),
+        logs_channel_id=_read_id("LOGS_DISCORD", problems),
+        whitelist_channel_id=_read_id("WHITELIST_ID", problems, required=True),
+        verificar_channel_id=_read_id("VERIFICAR_ID", problems, required=True),
+        comunicados_channel_id=comunicados_id,
+        avisos_channel_id=avisos_id,
+        boas_vindas_channel_id=_read_id("BOAS_VINDAS_ID", problems),
+        regras_channel_id=_read_id("REGRAS_ID", problems),
+        ticket_category_id=_read_id("TICKET_CATEGORY_ID", problems, required=True),
+        closed_ticket_log_channel_id=_read_id("CLOSED_TICKET_LOG_CHANNEL_ID", problems),
+        ticket_log_channel_id=_read_id("TICKET_LOG_CHANNEL_ID", problems),
+        comunicados_channel_ids=frozenset(c for c in (comunicados_id, avisos_id) if c),
+        session_backend=session_backend,
+        whitelist_thread_parent_id=_read_id("WHITELIST_THREAD_PARENT_ID", problems, required=thread_backend),
+        ticket_thread_parent_id=_read_id("TICKET_THREAD_PARENT_ID", problems, required=thread_backend),
+        channel_pool_size=_read_count("CHANNEL_POOL_SIZE", problems, "pool desativado"),
+        outbound_workers=_read_count("OUTBOUND_WORKERS", problems, "usando o padrão"),
+        whitelist_mode=whitelist_mode,
+        whitelist_max_sessions=_read_count("WHITELIST_MAX_SESSIONS", problems, "sem limite"),
+        metrics_port=_read_count("METRICS_PORT", problems, "métricas desativadas"),
+        metrics_host=os.getenv("METRICS_HOST", "127.0.0.1").strip() or "127.0.0.1",
+        interaction_ack_budget=_read_seconds("INTERACTION_ACK_BUDGET", problems, 2.0, 2.9),
+        transcript_format=transcript_format,
+        transcript_gzip=os.getenv("TICKET_TRANSCRIPT_GZIP", "false").strip().lower() in TRUE_VALUES,
+        problems=tuple(problems),
+    )
+    for problem in config.problems:
+        logger.warning(f"Configuração: {problem}.")
+    return config
+# --- Fim: Leitura e Validação ---
+
+
+# --- Início: Snapshot Atual ---
+_current: Optional[BotConfig] = None
+
+
+def get_config() -> BotConfig:
+    """Snapshot atual (carregado na primeira chamada)."""
+    global _current
+    if _current is None:
+        _current = load_config()
+    return _current
+
+
+def reload_config() -> Tuple[BotConfig, List[str]]:
+    """Relê o .env e troca o snapshot de uma vez. Retorna (novo, campos alterados).
+
+    O ID do servidor não muda em tempo de execução: se ele for alterado no .env,
+    o valor antigo é mantido até o próximo reinício.
+    """
+    global _current
+    old = get_config()
+    new = load_config(reload_env=True)
+    if new.guild_id != old.guild_id:
+        logger.warning("DISCORD_GUILD_ID alterado no .env; a mudança só vale após reiniciar o bot.")
+        new = BotConfig(**{f.name: getattr(new, f.name) for f in fields(new) if f.name != "guild_id"},
+                        guild_id=old.guild_id)
+    changed = old.diff(new)
+    _current = new
+    logger.info(f"Configuração recarregada. Campos alterados: {', '.join(changed) or 'nenhum'}.")
+    return new, changed
+# --- Fim: Snapshot Atual ---
+
+
+# --- Início: Check de Comandos ---
+async def check_user_has_mod_role(interaction: discord.Interaction) -> bool:
+    """Check de app_commands: o usuário precisa de um cargo de ALLOWED_MOD_ROLE_IDS."""
+    if not interaction.guild or not isinstance(interaction.user, discord.Member):
+        return False
+    config = get_config()
+    if not config.mod_role_ids:
+        logger.debug(f"Check de cargo falhou para {interaction.user}: Nenhum cargo permitido.")
+        return False
+    if config.is_moderator(interaction.user):
+        return True
+    logger.warning(f"Check de cargo falhou para {interaction.user}: Sem cargo permitido.")
+    return False
+# --- Fim: Check de Comandos ---
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+DEFAULT_WORKERS = 50  # Requisições simultâneas no máximo (uma por canal/membro); OUTBOUND_WORKERS
+REPORT_INTERVAL = 300  # Segundos entre relatórios no log (só quando houve fila ou 429)
+MAX_TRACKED_ROUTES = 1024  # Acima disso, buckets já resetados são descartados
+MAJOR_PARAMETERS = ("channels", "guilds", "webhooks")
+API_PREFIX = re.compile(r"^/api/v\d+")
+
+
+def route_key(method: str, path: str) -> str:
+    """Normaliza uma requisição para a chave do bucket de rate limit do Discord.
+
+    O bucket é definido pelo método, pela rota e pelo parâmetro principal
+    (canal, servidor ou webhook); os demais IDs da URL não importam.
+    Ex.: PUT /api/v10/guilds/1/members/2/roles/3 -> "PUT /guilds/1/members/:id/roles/:id"
+    """
+    path = API_PREFIX.sub("", path)
+    segments = []
+    major_seen = False
+    previous = None
+    for segment in path.split("/"):
+        if segment.isdigit():
+            if not major_seen and previous in MAJOR_PARAMETERS:
+                major_seen = True
+                segments.append(segment)
+            else:
+                segments.append(":id")
+        else:
+            segments.append(segment)
+        previous = segment
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+@dataclass
+class _Job:
+    route: str
+    factory: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float
+    label: str = ""
+
+
+@dataclass
+class DispatcherStats:
+    completed: int = 0
+    failed: int = 0
+    rate_limited: int = 0  # Respostas 429 recebidas (de qualquer origem)
+    rate_limited_by_route: Counter = field(default_factory=Counter)
+    max_wait: float = 0.0  # Maior tempo (s) entre enfileirar e iniciar uma requisição
+    saturated: int = 0  # Vezes em que todos os workers ficaram ocupados com trabalho pronto esperando
+
+
+class OutboundDispatcher:
+    """Agendador central das requisições de saída (mensagens, edições, exclusões e cargos).
+
+    Cada trabalho entra na fila da sua chave de justiça (o canal, ou o membro
+    para trocas de cargo). As filas são atendidas em rodízio, uma requisição
+    em andamento por chave, então um canal com centenas de mensagens não atrasa
+    os demais e a ordem dentro de um canal é preservada.
+
+    Os buckets são acompanhados pelos cabeçalhos X-RateLimit-* de cada resposta
+    (via `trace_config`, ligado ao `http_trace` do cliente): quando um bucket
+    chega a zero, os trabalhos daquela rota esperam o reset enquanto os outros
+    seguem. Não há pausas fixas; o ritmo é o que os limites reais permitem.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.worker_count = workers
+        self.stats = DispatcherStats()
+        self._queues: Dict[Hashable, Deque[_Job]] = {}
+        self._ring: Deque[Hashable] = deque()  # Chaves com trabalho pendente, em rodízio
+        self._busy: Set[Hashable] = set()
+        self._blocked: Dict[str, float] = {}  # rota -> instante (loop.time) em que o bucket reseta
+        self._global_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._workers = []
+        self._reporter: Optional[asyncio.Task] = None
+        self._last_reported_429 = 0
+        self._last_reported_saturated = 0
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    # --- Início: Ciclo de Vida ---
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(), name=f"outbound-{n}")
+                         for n in range(self.worker_count)]
+        self._reporter = asyncio.create_task(self._report_loop(), name="outbound-report")
+        logger.info(f"Dispatcher de saída iniciado com {self.worker_count} worker(s).")
+
+    async def stop(self):
+        """Cancela os workers; trabalhos ainda na fila são cancelados."""
+        tasks = self._workers + ([self._reporter] if self._reporter else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._reporter = None
+        self._workers = []
+        for queue in self._queues.values():
+            for job in queue:
+                job.future.cancel()
+        self._queues.clear()
+        self._ring.clear()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas atuais, para logs e ajuste sob carga."""
+        now = asyncio.get_running_loop().time()
+        return {
+            "queue_depth": self.queue_depth,
+            "active_keys": len(self._queues),
+            "in_flight": len(self._busy),
+            "workers": self.worker_count,
+            "saturated": self.stats.saturated,
+            "blocked_routes": sum(1 for until in self._blocked.values() if until > now),
+            "completed": self.stats.completed,
+            "failed": self.stats.failed,
+            "rate_limited": self.stats.rate_limited,
+            "max_wait": round(self.stats.max_wait, 3),
+            "top_429_routes": self.stats.rate_limited_by_route.most_common(5),
+        }
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            saturated = self.stats.saturated - self._last_reported_saturated
+            if self.queue_depth or saturated or self.stats.rate_limited != self._last_reported_429:
+                self._last_reported_429 = self.stats.rate_limited
+                self._last_reported_saturated = self.stats.saturated
+                logger.info(f"Dispatcher de saída: {self.snapshot()}")
+            if saturated:
+                logger.warning(f"Dispatcher de saída: {saturated} trabalho(s) esperaram por um worker livre "
+                               f"(todos os {self.worker_count} ocupados). Considere aumentar OUTBOUND_WORKERS.")
+    # --- Fim: Ciclo de Vida ---
+
+    # --- Início: Enfileiramento ---
+    def submit(self, key: Hashable, route: str, factory: Callable[[], Awaitable[Any]],
+               label: str = "") -> asyncio.Future:
+        """Enfileira `factory()` na fila de `key`. Retorna um future com o resultado.
+
+        `route` deve seguir o formato de `route_key` para que o bloqueio por
+        bucket funcione. Sem workers ativos (ex.: antes do setup_hook), executa direto.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._workers:
+            task = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda t: self._copy_result(t, future))
+            return future
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._ring.append(key)
+        queue.append(_Job(route, factory, future, loop.time(), label))
+        self._wakeup.set()
+        return future
+
+    @staticmethod
+    def _copy_result(task: asyncio.Future, future: asyncio.Future):
+        if future.done():
+            return
+        if task.cancelled():
+            future.cancel()
+        elif task.exception():
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def send(self, channel: discord.abc.Messageable, *args, **kwargs) -> asyncio.Future:
+        return self.submit(channel.id, f"POST /channels/{channel.id}/messages",
+                           lambda: channel.send(*args, **kwargs), "send")
+
+    def edit_message(self, message: discord.Message, **kwargs) -> asyncio.Future:
+        return self.submit(message.channel.id, f"PATCH /channels/{message.channel.id}/messages/:id",
+                           lambda: message.edit(**kwargs), "edit")
+
+    def delete_message(self, message: discord.Message) -> asyncio.Future:
+        return self.submit(message.channel.id, f"DELETE /channels/{message.channel.id}/messages/:id",
+                           message.delete, "delete_message")
+
+    def delete_channel(self, channel: discord.abc.GuildChannel, reason: Optional[str] = None) -> asyncio.Future:
+        return self.submit(channel.id, f"DELETE /channels/{channel.id}",
+                           lambda: channel.delete(reason=reason), "delete_channel")
+
+    def add_roles(self, member: discord.Member, *roles: discord.abc.Snowflake,
+                  reason: Optional[str] = None) -> asyncio.Future:
+        return self.submit(("member", member.id), f"PUT /guilds/{member.guild.id}/members/:id/roles/:id",
+                           lambda: member.add_roles(*roles, reason=reason), "add_roles")
+
+    def remove_roles(self, member: discord.Member, *roles: discord.abc.Snowflake,
+                     reason: Optional[str] = None) -> asyncio.Future:
+        return self.submit(("member", member.id), f"DELETE /guilds/{member.guild.id}/members/:id/roles/:id",
+                           lambda: member.remove_roles(*roles, reason=reason), "remove_roles")
+    # --- Fim: Enfileiramento ---
+
+    # --- Início: Agendamento ---
+    def _wait_for(self, route: str, now: float) -> float:
+        return max(self._global_until, self._blocked.get(route, 0.0)) - now
+
+    def _next_job(self, now: float):
+        """Próximo trabalho em rodízio: pula chaves ocupadas e rotas sem cota."""
+        for _ in range(len(self._ring)):
+            key = self._ring[0]
+            self._ring.rotate(-1)
+            if key in self._busy:
+                continue
+            queue = self._queues[key]
+            if self._wait_for(queue[0].route, now) > 0:
+                continue
+            job = queue.popleft()
+            if not queue:
+                del self._queues[key]
+                self._ring.pop()  # A chave acabou de ir para o fim do rodízio
+            self._busy.add(key)
+            return key, job
+        return None
+
+    def _has_ready_job(self, now: float) -> bool:
+        return any(key not in self._busy and self._wait_for(queue[0].route, now) <= 0
+                   for key, queue in self._queues.items())
+
+    def _next_unblock_delay(self, now: float) -> Optional[float]:
+        waits = [self._wait_for(queue[0].route, now)
+                 for key, queue in self._queues.items() if key not in self._busy]
+        waits = [wait for wait in waits if wait > 0]
+        return min(waits) if waits else None
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            picked = self._next_job(now)
+            if picked is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._next_unblock_delay(now))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            key, job = picked
+            if len(self._busy) >= self.worker_count and self._has_ready_job(now):
+                self.stats.saturated += 1  # O limite de workers é o gargalo, não o rate limit
+            try:
+                await self._run(job, loop.time())
+            finally:
+                self._busy.discard(key)
+                self._wakeup.set()
+
+    async def _run(self, job: _Job, started_at: float):
+        if job.future.cancelled():
+            return
+        self.stats.max_wait = max(self.stats.max_wait, started_at - job.enqueued_at)
+        try:
+            result = await job.factory()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            self.stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+    # --- Fim: Agendamento ---
+
+    # --- Início: Cabeçalhos de Rate Limit ---
+    async def _on_request_end(self, session, context, params: aiohttp.TraceRequestEndParams):
+        response = params.response
+        headers = response.headers
+        route = route_key(params.method, params.url.path)
+        now = asyncio.get_running_loop().time()
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if response.status == 429:
+            self.stats.rate_limited += 1
+            self.stats.rate_limited_by_route[route] += 1
+            retry_after = float(headers.get("Retry-After") or reset_after or 1.0)
+            if headers.get("X-RateLimit-Global"):
+                self._global_until = now + retry_after
+            else:
+                self._blocked[route] = now + retry_after
+            logger.warning(f"429 em {route} (scope={headers.get('X-RateLimit-Scope', '?')}); "
+                           f"aguardando {retry_after:.2f}s. Total de 429: {self.stats.rate_limited}")
+            return
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None or reset_after is None:
+            return
+        if int(remaining) == 0:
+            self._blocked[route] = now + float(reset_after)
+            if len(self._blocked) > MAX_TRACKED_ROUTES:
+                self._blocked = {r: until for r, until in self._blocked.items() if until > now}
+        else:
+            self._blocked.pop(route, None)
+    # --- Fim: Cabeçalhos de Rate Limit ---
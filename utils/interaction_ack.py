@@ -0,0 +1,181 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Optional
+
+import discord
+from discord.ui import View
+
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+ACK_DEADLINE = 3.0  # Prazo do Discord para responder (ou deferir) uma interação
+NEAR_DEADLINE = 2.5  # Respostas mais lentas que isso contam como "por pouco"
+ACK_BUCKETS = (0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0)
+ACK_POLL_INTERVAL = 0.05  # Resolução da medição de respostas feitas direto em `interaction.response`
+EXTRAS_KEY = "ack_tracker"  # Chave em `interaction.extras`
+
+
+def _metrics(interaction: discord.Interaction):
+    return getattr(interaction.client, "metrics", None)
+
+
+class AckTracker:
+    """Acompanha o prazo de 3s de uma interação, só com a API pública do discord.py.
+
+    Um watchdog observa `interaction.response.is_done()`: mede quando a
+    primeira resposta aconteceu e, se nada vier dentro do orçamento
+    (`INTERACTION_ACK_BUDGET`, contado a partir da criação da interação no
+    Discord), chama `interaction.response.defer()` sozinho. `respond` e
+    `defer_response` usam a mesma trava do watchdog (as duas respostas nunca
+    correm juntas), medem o tempo exato e, depois do defer automático, viram
+    followup e no-op.
+    """
+
+    def __init__(self, interaction: discord.Interaction, handler: str, ephemeral: bool):
+        self.interaction = interaction
+        self.handler = handler
+        self.ephemeral = ephemeral
+        self.auto_deferred = False
+        self.recorded = False
+        self.received_at = time.perf_counter()
+        # Idade da interação ao chegar aqui (gateway + fila local), limitada ao prazo
+        age = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        self.age_at_receive = min(max(age, 0.0), ACK_DEADLINE)
+        self.lock = asyncio.Lock()
+        self._watchdog: Optional[asyncio.Task] = None
+
+    def start(self, budget: float):
+        self._watchdog = asyncio.create_task(self._watch(budget), name=f"ack-{self.handler}")
+
+    # --- Início: Medição ---
+    def _record(self, mode: str, failed: bool = False):
+        if self.recorded:
+            return
+        self.recorded = True
+        if self._watchdog and self._watchdog is not asyncio.current_task():
+            self._watchdog.cancel()
+        elapsed = time.perf_counter() - self.received_at
+        total = self.age_at_receive + elapsed
+        metrics = _metrics(self.interaction)
+        if failed:
+            logger.warning(f"Interação '{self.handler}' expirou antes da resposta ({total:.2f}s desde a criação).")
+            if metrics:
+                metrics.counter("bot_interaction_ack_failed_total", "Interações que expiraram antes da resposta.",
+                                ("handler",)).inc(handler=self.handler)
+            return
+        if metrics:
+            metrics.histogram("bot_interaction_ack_seconds", "Tempo entre receber a interação e respondê-la.",
+                              ("handler", "mode"), ACK_BUCKETS).observe(elapsed, handler=self.handler, mode=mode)
+        if total >= NEAR_DEADLINE:
+            logger.warning(f"Interação '{self.handler}' respondida perto do prazo: {total:.2f}s ({mode}).")
+            if metrics:
+                metrics.counter("bot_interaction_ack_near_deadline_total",
+                                f"Respostas a mais de {NEAR_DEADLINE}s da criação da interação.",
+                                ("handler",)).inc(handler=self.handler)
+
+    async def _acknowledge(self, mode: str, call):
+        try:
+            result = await call
+        except discord.NotFound as e:
+            if e.code == 10062:  # Unknown interaction: o prazo passou
+                self._record(mode, failed=True)
+            raise
+        self._record(mode)
+        return result
+    # --- Fim: Medição ---
+
+    async def _watch(self, budget: float):
+        # Sem orçamento (0), só mede até o prazo do Discord
+        limit = (budget if budget > 0 else ACK_DEADLINE) - self.age_at_receive
+        response = self.interaction.response
+        while not response.is_done() and time.perf_counter() - self.received_at < limit:
+            await asyncio.sleep(ACK_POLL_INTERVAL)
+        if response.is_done():
+            self._record("handler")  # Resposta direta (fora dos helpers); precisão de ACK_POLL_INTERVAL
+            return
+        if budget <= 0:
+            self._record("handler", failed=True)
+            return
+        await self._auto_defer()
+
+    async def _auto_defer(self):
+        async with self.lock:
+            response = self.interaction.response
+            if response.is_done():
+                self._record("handler")
+                return
+            # Sempre "pensando...": os handlers daqui respondem com mensagem nova (e
+            # `edit_original_response` tem de editar essa resposta, não o painel)
+            try:
+                await self._acknowledge("auto", response.defer(ephemeral=self.ephemeral, thinking=True))
+            except (discord.HTTPException, discord.InteractionResponded) as e:
+                # Expiração já registrada em `_acknowledge`; o handler segue e recebe o erro ao responder
+                logger.warning(f"Interação '{self.handler}': defer automático falhou: {e}")
+                return
+            self.auto_deferred = True
+        logger.info(f"Interação '{self.handler}' deferida automaticamente sem resposta do handler.")
+        metrics = _metrics(self.interaction)
+        if metrics:
+            metrics.counter("bot_interaction_auto_defer_total", "Interações deferidas automaticamente.",
+                            ("handler",)).inc(handler=self.handler)
+
+
+def track_interaction(interaction: discord.Interaction, handler: str, ephemeral: bool = True) -> AckTracker:
+    """Começa a acompanhar o prazo da interação (guardado em `interaction.extras`)."""
+    tracker = AckTracker(interaction, handler, ephemeral)
+    interaction.extras[EXTRAS_KEY] = tracker
+    tracker.start(get_config().interaction_ack_budget)
+    return tracker
+
+
+# --- Início: Respostas ---
+def _tracker_lock(interaction: discord.Interaction):
+    tracker: Optional[AckTracker] = interaction.extras.get(EXTRAS_KEY)
+    return tracker, (tracker.lock if tracker else contextlib.nullcontext())
+
+
+async def respond(interaction: discord.Interaction, *args, **kwargs):
+    """`interaction.response.send_message`, ou followup se a interação já foi respondida/deferida.
+
+    Use nos handlers acompanhados (comandos e `TrackedView`): o defer automático
+    pode ter acontecido enquanto o handler trabalhava.
+    """
+    tracker, lock = _tracker_lock(interaction)
+    async with lock:
+        if not interaction.response.is_done():
+            call = interaction.response.send_message(*args, **kwargs)
+            return await (tracker._acknowledge("handler", call) if tracker else call)
+    delete_after = kwargs.pop("delete_after", None)
+    message = await interaction.followup.send(*args, wait=True, **kwargs)
+    if delete_after is not None:
+        await message.delete(delay=delete_after)
+    return None
+
+
+async def defer_response(interaction: discord.Interaction, *, ephemeral: bool = False, thinking: bool = False):
+    """`interaction.response.defer`; não faz nada se a interação já foi deferida (ex.: automaticamente)."""
+    tracker, lock = _tracker_lock(interaction)
+    async with lock:
+        if interaction.response.is_done():
+            return None
+        call = interaction.response.defer(ephemeral=ephemeral, thinking=thinking)
+        return await (tracker._acknowledge("handler", call) if tracker else call)
+# --- Fim: Respostas ---
+
+
+class TrackedView(View):
+    """View persistente com medição do tempo de resposta e defer automático.
+
+    `defer_ephemeral` define como o defer automático aparece (só importa se o
+    handler responder com `respond` depois dele).
+    """
+    defer_ephemeral = True
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        custom_id = (interaction.data or {}).get("custom_id", type(self).__name__)
+        track_interaction(interaction, custom_id, self.defer_ephemeral)
+        return True
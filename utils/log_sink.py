@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import Deque, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+EMBEDS_PER_MESSAGE = 10  # Limite do Discord por mensagem
+EMBED_CHARS_PER_MESSAGE = 6000  # Limite do Discord para a soma dos embeds de uma mensagem
+FLUSH_INTERVAL = 2.0  # Segundos que o primeiro evento espera por companhia antes do envio
+MAX_BACKLOG = 100  # Acima disso, eventos de baixa prioridade passam a ser só contados
+MAX_QUEUE = 1000  # Limite rígido da fila (canal fora do ar): acima disso, qualquer evento só é contado
+RESOLVE_RETRY_MIN = 5.0  # Segundos até a primeira nova tentativa de resolver o canal
+RESOLVE_RETRY_MAX = 300.0
+STOP_FLUSH_TIMEOUT = 5.0
+
+# --- Prioridades ---
+LOW = 0  # Entradas, saídas, cargo automático: podem ser agregados sob carga
+NORMAL = 1
+HIGH = 2  # Moderação e status do bot: só agregados acima de MAX_QUEUE
+
+
+class DiscordLogSink:
+    """Canal de logs do Discord com envio agrupado.
+
+    Os eventos entram em uma fila e uma única task os envia em mensagens de até
+    10 embeds: o envio sai quando a mensagem enche ou quando o primeiro evento
+    espera `FLUSH_INTERVAL`. Com a fila acima de `MAX_BACKLOG` (raid, divulgação),
+    eventos de baixa prioridade deixam de ser enviados um a um e viram um
+    resumo com a contagem por tipo; acima de `MAX_QUEUE` (canal inacessível por
+    muito tempo), o mesmo vale para todos. O canal é resolvido uma vez; se
+    falhar, a task tenta de novo com backoff.
+    """
+
+    def __init__(self, bot: discord.Client, channel_id: Optional[int] = None,
+                 flush_interval: float = FLUSH_INTERVAL, max_backlog: int = MAX_BACKLOG,
+                 max_queue: int = MAX_QUEUE):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.channel: Optional[discord.abc.Messageable] = None
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self.max_queue = max_queue
+        self._resolve_delay = 0.0  # > 0 depois de um resolve() que falhou: o _run tenta de novo
+        self._queue: Deque[Tuple[int, str, discord.Embed]] = deque()
+        self._suppressed: Counter = Counter()
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.sent_messages = 0
+        self.sent_embeds = 0
+        self.suppressed_total = 0
+
+    def set_channel(self, channel_id: Optional[int]):
+        """Troca o canal de logs (recarga de configuração); resolvido de novo no próximo resolve()."""
+        if channel_id != self.channel_id:
+            self.channel_id = channel_id
+            self.channel = None
+            self._resolve_delay = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.channel_id is not None
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue)
+
+    # --- Início: Ciclo de Vida ---
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="discord-log-sink")
+
+    async def resolve(self) -> bool:
+        """Resolve o canal de logs (cache, depois API). Chamado no on_ready."""
+        if not self.enabled or self.channel is not None:
+            return self.channel is not None
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(self.channel_id)
+            except discord.HTTPException as e:
+                self._resolve_delay = min(self._resolve_delay * 2 or RESOLVE_RETRY_MIN, RESOLVE_RETRY_MAX)
+                logger.error(f"Canal de logs Discord (ID: {self.channel_id}) não encontrado: {e}. "
+                             f"Nova tentativa em {self._resolve_delay:.0f}s.")
+                self._wakeup.set()
+                return False
+        self.channel = channel
+        self._resolve_delay = 0.0
+        self._wakeup.set()
+        logger.info(f"Canal de logs Discord resolvido: #{getattr(channel, 'name', channel.id)}")
+        return True
+
+    async def stop(self):
+        """Encerra a task e tenta enviar o que ainda estiver na fila."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.channel is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), STOP_FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"{len(self._queue)} log(s) do Discord descartado(s) no encerramento.")
+
+    async def _drain(self):
+        while self._queue or self._suppressed:
+            await self._flush_once()
+    # --- Fim: Ciclo de Vida ---
+
+    # --- Início: Entrada de Eventos ---
+    def log(self, embed: discord.Embed, priority: int = NORMAL, kind: str = "evento"):
+        """Enfileira um embed para o canal de logs. Não bloqueia."""
+        if not self.enabled:
+            return
+        if len(self._queue) >= self.max_queue or (priority == LOW and len(self._queue) >= self.max_backlog):
+            self._suppress(kind)
+        else:
+            self._queue.append((priority, kind, embed))
+        if len(self._queue) >= EMBEDS_PER_MESSAGE:
+            self._full.set()
+        self._wakeup.set()
+
+    def _suppress(self, kind: str):
+        if not self._suppressed:
+            scope = "todos os eventos" if len(self._queue) >= self.max_queue else "eventos de baixa prioridade"
+            logger.warning(f"Log do Discord atrasado ({len(self._queue)} na fila): {scope} serão agregados.")
+        self._suppressed[kind] += 1
+        self.suppressed_total += 1
+    # --- Fim: Entrada de Eventos ---
+
+    # --- Início: Envio ---
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.channel is None and self._resolve_delay and self.enabled:
+                await asyncio.sleep(self._resolve_delay)
+                await self.resolve()
+                continue
+            if self.channel is None or not (self._queue or self._suppressed):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Espera a mensagem encher ou o prazo do primeiro evento vencer
+            deadline = loop.time() + self.flush_interval
+            while len(self._queue) < EMBEDS_PER_MESSAGE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            await self._flush_once()
+
+    def _summary_embed(self) -> discord.Embed:
+        lines = [f"• {count}x {kind}" for kind, count in self._suppressed.most_common()]
+        embed = discord.Embed(
+            title="⚠️ Eventos agrupados (alto volume)",
+            description="\n".join(lines)[:4000],
+            color=discord.Color.dark_grey(),
+            timestamp=discord.utils.utcnow()
+        )
+        self._suppressed.clear()
+        return embed
+
+    def _next_batch(self):
+        batch = []
+        total_chars = 0
+        if self._suppressed:
+            summary = self._summary_embed()
+            batch.append(summary)
+            total_chars += len(summary)
+        while self._queue and len(batch) < EMBEDS_PER_MESSAGE:
+            embed = self._queue[0][2]
+            if batch and total_chars + len(embed) > EMBED_CHARS_PER_MESSAGE:
+                break
+            self._queue.popleft()
+            batch.append(embed)
+            total_chars += len(embed)
+        return batch
+
+    async def _flush_once(self):
+        batch = self._next_batch()
+        if not batch:
+            return
+        try:
+            await self.bot.outbound.send(self.channel, embeds=batch)
+            self.sent_messages += 1
+            self.sent_embeds += len(batch)
+        except asyncio.CancelledError:
+            # Encerramento no meio do envio: o lote volta à frente da fila e o stop() tenta de novo
+            # (se a requisição já tinha saído, o lote pode aparecer duas vezes; melhor que perdê-lo)
+            self._queue.extendleft((NORMAL, "reenvio", embed) for embed in reversed(batch))
+            raise
+        except discord.Forbidden:
+            logger.error(f"Permissão negada para enviar logs no canal {self.channel_id}; {len(batch)} embed(s) perdido(s).")
+        except discord.HTTPException as e:
+            logger.error(f"Erro HTTP ao enviar {len(batch)} log(s) para o Discord: {e}")
+        except Exception:
+            logger.exception(f"Erro inesperado ao enviar {len(batch)} log(s) para o Discord:")
+    # --- Fim: Envio ---
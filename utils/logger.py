@@ -0,0 +1,189 @@
+import atexit
+import copy
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# --- Configurações Padrão ---
+# Lidas do ambiente (e não do BotConfig): o log precisa existir antes da validação
+# do .env, que já registra os problemas encontrados
+DEFAULT_FILE = "bot.log"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 10
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enfileira o registro sem formatá-lo.
+
+    O `QueueHandler` padrão formata a mensagem inteira (data, traceback) no
+    chamador, ou seja, no event loop. Aqui só os argumentos são aplicados
+    (`%`), para o texto não mudar depois; o resto fica com a thread do listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Um objeto JSON por linha, para ferramentas de análise de log."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotaciona por tamanho e/ou por tempo; o arquivo rotacionado vira `.gz`.
+
+    Os arquivos antigos recebem a data da rotação no nome
+    (`bot.log.20250101-000000.gz`) e só os `backup_count` mais recentes ficam.
+    Roda na thread do listener, então a compressão não pausa o bot.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, interval_seconds: float = 0,
+                 backup_count: int = DEFAULT_BACKUP_COUNT, encoding: str = "utf-8"):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        self.interval = interval_seconds
+        self.rollover_at = time.time() + interval_seconds if interval_seconds else None
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            target = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}.gz"
+            suffix = 1
+            while os.path.exists(target):
+                target = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}-{suffix}.gz"
+                suffix += 1
+            with open(self.baseFilename, "rb") as source, gzip.open(target, "wb") as compressed:
+                shutil.copyfileobj(source, compressed)
+            os.remove(self.baseFilename)
+            self._prune()
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+
+    def _prune(self):
+        if self.backupCount <= 0:
+            return
+        rotated = sorted(glob.glob(glob.escape(self.baseFilename) + ".*.gz"), key=lambda path: (os.path.getmtime(path), path))
+        for old in rotated[:-self.backupCount]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value.isdigit() else default
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """`"cogs.ticket_system=DEBUG,discord=WARNING"` -> {nome do logger: nível}."""
+    levels = {}
+    for part in spec.split(","):
+        name, _, level = part.partition("=")
+        level_value = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level_value, int):
+            levels[name.strip()] = level_value
+    return levels
+
+
+def setup_logging(level: Optional[str] = None, filename: Optional[str] = None, json_lines: Optional[bool] = None,
+                  module_levels: Optional[Dict[str, int]] = None) -> logging.handlers.QueueListener:
+    """Configura o log do bot uma única vez (chamar no início do main.py).
+
+    O logger raiz recebe só um `QueueHandler`: cada chamada de log apenas
+    enfileira o registro, e uma thread (`QueueListener`) formata e escreve no
+    console e no arquivo. Variáveis de ambiente (todas opcionais):
+
+    - `LOG_LEVEL`: nível geral (padrão INFO).
+    - `LOG_LEVELS`: níveis por módulo, ex.: `cogs.ticket_system=DEBUG,discord=WARNING`.
+    - `LOG_FILE`: arquivo de log (padrão `bot.log`; vazio desativa o arquivo).
+    - `LOG_FORMAT`: `text` (padrão) ou `json` (JSON lines, só no arquivo).
+    - `LOG_MAX_BYTES` / `LOG_ROTATE_HOURS` / `LOG_BACKUP_COUNT`: rotação por tamanho
+      (padrão 10 MB) e/ou por tempo (padrão desligada); arquivos antigos em `.gz`.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).strip().upper() or "INFO"
+    level_value = logging.getLevelName(level)
+    invalid_level = None if isinstance(level_value, int) else level
+    filename = filename if filename is not None else os.getenv("LOG_FILE", DEFAULT_FILE).strip()
+    if json_lines is None:
+        json_lines = os.getenv("LOG_FORMAT", "text").strip().lower() == "json"
+    if module_levels is None:
+        module_levels = parse_levels(os.getenv("LOG_LEVELS", ""))
+
+    text_formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+    console = logging.StreamHandler()
+    console.setFormatter(text_formatter)
+    handlers = [console]
+    if filename:
+        file_handler = CompressedRotatingFileHandler(
+            filename,
+            max_bytes=_env_int("LOG_MAX_BYTES", DEFAULT_MAX_BYTES),
+            interval_seconds=_env_int("LOG_ROTATE_HOURS", 0) * 3600,
+            backup_count=_env_int("LOG_BACKUP_COUNT", DEFAULT_BACKUP_COUNT))
+        file_handler.setFormatter(JsonLinesFormatter() if json_lines else text_formatter)
+        handlers.append(file_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(logging.INFO if invalid_level else level_value)
+    # Níveis por módulo: abaixo do nível, a chamada para no isEnabledFor (nada é enfileirado)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    if invalid_level:
+        logging.getLogger(__name__).warning(f"LOG_LEVEL inválido ('{invalid_level}'); usando INFO.")
+    return _listener
+
+
+def stop_logging():
+    """Esvazia a fila e fecha os arquivos (chamado também no atexit)."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
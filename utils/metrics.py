@@ -0,0 +1,313 @@
+import functools
+import logging
+import math
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import aiohttp
+import discord
+from aiohttp import web
+from discord import app_commands
+
+from utils.dispatcher import route_key
+from utils.interaction_ack import track_interaction
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # Segundos
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_SNOWFLAKE = re.compile(r"/\d+")
+
+LabelValues = Tuple[str, ...]
+GaugeValue = Union[float, Dict[LabelValues, float]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+# --- Início: Tipos de Métrica ---
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Métrica {self.name}: rótulos esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(sufixo do nome, rótulos formatados, valor)."""
+        return ()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    """Valor instantâneo. Com `callback`, é lido na hora da coleta (nada a atualizar no caminho quente)."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], GaugeValue]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        values = self._values
+        if self.callback is not None:
+            try:
+                current = self.callback()
+            except Exception as e:
+                logger.warning(f"Métrica {self.name}: falha ao coletar ({e}).")
+                return
+            values = current if isinstance(current, dict) else {(): current}
+        for key, value in values.items():
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    """Histograma de buckets fixos (contagens cumulativas no formato do Prometheus)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * len(self.buckets)
+            self._sums[key] = 0.0
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        self._sums[key] += value
+
+    def samples(self):
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield "_bucket", _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"'), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), self._sums[key]
+            yield "_count", _format_labels(self.labelnames, key), cumulative
+# --- Fim: Tipos de Métrica ---
+
+
+class MetricsRegistry:
+    """Conjunto de métricas do bot, exportado no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric_type, name: str, *args, **kwargs):
+        existing = self._metrics.get(name)
+        if existing is not None:
+            if not isinstance(existing, metric_type):
+                raise ValueError(f"Métrica {name} já registrada como {existing.kind}")
+            return existing
+        metric = self._metrics[name] = metric_type(name, *args, **kwargs)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], GaugeValue]] = None) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames, callback)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# --- Início: Instrumentação do Bot ---
+def rest_route(method: str, path: str) -> str:
+    """Rota REST sem IDs (nem o parâmetro principal), para não explodir a cardinalidade."""
+    return _SNOWFLAKE.sub("/:id", route_key(method, path))
+
+
+def observe_handler(client: discord.Client, handler: str, seconds: float, status: str = "ok"):
+    metrics: Optional[MetricsRegistry] = getattr(client, "metrics", None)
+    if metrics is not None:
+        metrics.histogram("bot_handler_seconds", "Duração dos comandos e botões persistentes.",
+                          ("handler", "status")).observe(seconds, handler=handler, status=status)
+
+
+def timed_handler(name: str):
+    """Mede a duração de um callback de botão (`async def cb(self, interaction, ...)`)."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            started = time.perf_counter()
+            status = "ok"
+            try:
+                return await func(self, interaction, *args, **kwargs)
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                observe_handler(interaction.client, name, time.perf_counter() - started, status)
+        return wrapper
+    return decorator
+
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Árvore de comandos que mede a duração de cada comando de aplicação.
+
+    O início é marcado no `interaction_check` (antes dos checks do comando); o
+    fim, no evento `app_command_completion` (ver `CustomBot`) ou no `on_error`.
+    Ali também começa o acompanhamento do prazo de resposta (ver
+    `utils.interaction_ack`); comandos cuja resposta é pública declaram
+    `extras={"defer_ephemeral": False}`.
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+        if interaction.type is discord.InteractionType.application_command:
+            command = interaction.command
+            name = command.qualified_name if command is not None else (interaction.data or {}).get("name", "?")
+            ephemeral = command.extras.get("defer_ephemeral", True) if command is not None else True
+            track_interaction(interaction, f"/{name}", ephemeral)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        observe_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+
+def observe_command(interaction: discord.Interaction, status: str = "ok"):
+    started = interaction.extras.get("started_at")
+    if started is not None and interaction.command is not None:
+        observe_handler(interaction.client, f"/{interaction.command.qualified_name}",
+                        time.perf_counter() - started, status)
+
+
+def register_bot_metrics(metrics: MetricsRegistry, bot, cooldowns):
+    """Métricas de estado lidas na coleta (callbacks) e o contador de chamadas REST.
+
+    O cliente aceita um só `http_trace`, então o contador é anexado ao
+    `TraceConfig` do dispatcher (antes do login, que o congela).
+    """
+    def ticket_count():
+        cog = bot.get_cog("TicketSystemCog")
+        return len(cog.registry) if cog else 0
+
+    metrics.gauge("bot_whitelist_sessions_active", "Questionários em andamento (modo canal).",
+                  callback=lambda: len(bot.questionnaire_sessions))
+    metrics.gauge("bot_whitelist_admission", "Controle de admissão: vagas ocupadas, limite e fila.", ("state",),
+                  callback=lambda: {(key,): bot.whitelist_admission.stats()[key] for key in ("active", "limit", "queued")})
+    metrics.gauge("bot_whitelist_cooldowns", "Membros em cooldown de whitelist.", callback=lambda: len(cooldowns))
+    metrics.gauge("bot_tickets_open", "Tickets abertos.", callback=ticket_count)
+    metrics.gauge("bot_member_queue_depth", "Eventos de entrada/saída aguardando no pipeline.",
+                  callback=lambda: bot.member_pipeline.queue_depth)
+    metrics.gauge("bot_outbound_queue_depth", "Requisições aguardando no dispatcher de saída.",
+                  callback=lambda: bot.outbound.queue_depth)
+    metrics.gauge("bot_log_sink_backlog", "Eventos aguardando envio ao canal de logs.",
+                  callback=lambda: bot.log_sink.backlog)
+    metrics.gauge("bot_channel_pool_channels", "Canais do pool por estado.", ("pool", "state"),
+                  callback=lambda: {(name, state): pool.stats()[state]
+                                    for name, pool in bot.channel_pools.items() for state in ("idle", "in_use")})
+    metrics.gauge("bot_latency_seconds", "Latência do gateway (heartbeat).",
+                  callback=lambda: 0 if math.isnan(bot.latency) else bot.latency)
+
+    rest_calls = metrics.counter("discord_rest_requests_total", "Chamadas REST ao Discord por rota e status.",
+                                 ("route", "status"))
+
+    async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams):
+        rest_calls.inc(route=rest_route(params.method, params.url.path), status=str(params.response.status))
+
+    bot.outbound.trace_config.on_request_end.append(on_request_end)
+# --- Fim: Instrumentação do Bot ---
+
+
+class MetricsServer:
+    """Endpoint HTTP local (`GET /metrics`) no formato texto do Prometheus."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Métricas disponíveis em http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,134 @@
+import logging
+from typing import Dict, NamedTuple, Optional, Set, Tuple, Type
+
+import discord
+
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# --- Nomes Fixos ---
+STAFF_CHANNEL_NAME = "respostas-whitelist"
+WHITELIST_CATEGORY_NAME = "WHITELIST"
+
+# --- Tipos de Recurso ---
+CHANNEL = "channel"
+ROLE = "role"
+
+
+class Resource(NamedTuple):
+    """Como achar um recurso lógico: pelo ID de um campo do `BotConfig` ou pelo nome."""
+    kind: str
+    config_field: Optional[str] = None
+    name: Optional[str] = None
+    channel_type: Type = discord.abc.GuildChannel
+    description: str = ""
+
+
+RESOURCES: Dict[str, Resource] = {
+    "staff_channel": Resource(CHANNEL, name=STAFF_CHANNEL_NAME, channel_type=discord.TextChannel,
+                              description="canal de respostas da staff"),
+    "whitelist_category": Resource(CHANNEL, name=WHITELIST_CATEGORY_NAME, channel_type=discord.CategoryChannel,
+                                   description="categoria de whitelist"),
+    "logs": Resource(CHANNEL, "logs_channel_id", description="canal de logs (LOGS_DISCORD)"),
+    "boas_vindas": Resource(CHANNEL, "boas_vindas_channel_id", description="canal de boas-vindas (BOAS_VINDAS_ID)"),
+    "ticket_category": Resource(CHANNEL, "ticket_category_id", channel_type=discord.CategoryChannel,
+                                description="categoria de tickets (TICKET_CATEGORY_ID)"),
+    "ticket_log": Resource(CHANNEL, "ticket_log_channel_id", channel_type=discord.TextChannel,
+                           description="log de tickets (TICKET_LOG_CHANNEL_ID)"),
+    "closed_ticket_log": Resource(CHANNEL, "closed_ticket_log_channel_id", channel_type=discord.TextChannel,
+                                  description="log de tickets fechados (CLOSED_TICKET_LOG_CHANNEL_ID)"),
+    "analise_role": Resource(ROLE, "analise_role_id", description="cargo Análise (ANALISE_ID)"),
+    "turista_role": Resource(ROLE, "turista_role_id", description="cargo Turista (TURISTA_ID)"),
+    "visitante_role": Resource(ROLE, "visitante_role_id", description="cargo Visitante (VISITANTE_ID)"),
+}
+
+
+class GuildResolver:
+    """Resolve canais e cargos por nome lógico uma vez e guarda o resultado.
+
+    A busca por nome percorre todos os canais do servidor; aqui ela só se
+    repete quando um evento de criação/alteração/remoção de canal ou cargo
+    toca o recurso (mesmo ID, ou nome igual antes/depois da alteração). A
+    ausência também fica em cache e é avisada uma única vez, até o recurso
+    voltar a existir. `/recarregar_config` limpa tudo (os IDs podem mudar).
+    """
+
+    def __init__(self, resources: Dict[str, Resource] = RESOURCES):
+        self.resources = resources
+        self._cache: Dict[Tuple[int, str], Optional[object]] = {}
+        self._warned: Set[Tuple[int, str]] = set()
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cache), "missing": len(self._warned), "hits": self.hits, "misses": self.misses}
+
+    # --- Início: API Pública ---
+    def get(self, key: str, guild: discord.Guild):
+        """Objeto do recurso `key` no servidor, ou None (avisado uma vez) se não existir."""
+        cache_key = (guild.id, key)
+        try:
+            found = self._cache[cache_key]
+            self.hits += 1
+            return found
+        except KeyError:
+            pass
+        self.misses += 1
+        found = self._lookup(self.resources[key], guild)
+        self._cache[cache_key] = found
+        if found is None:
+            if cache_key not in self._warned:
+                self._warned.add(cache_key)
+                logger.warning(f"Recurso '{key}' ({self.resources[key].description or key}) não encontrado no servidor {guild.name}.")
+        else:
+            self._warned.discard(cache_key)
+        return found
+
+    def invalidate(self, key: Optional[str] = None):
+        """Esquece um recurso (ou todos); o próximo get() resolve de novo."""
+        if key is None:
+            self._cache.clear()
+            self._warned.clear()
+            return
+        for cache_key in [k for k in self._cache if k[1] == key]:
+            del self._cache[cache_key]
+    # --- Fim: API Pública ---
+
+    def _lookup(self, resource: Resource, guild: discord.Guild):
+        if resource.kind == ROLE:
+            role_id = getattr(get_config(), resource.config_field)
+            return guild.get_role(role_id) if role_id else None
+        if resource.config_field:
+            channel_id = getattr(get_config(), resource.config_field)
+            channel = guild.get_channel(channel_id) if channel_id else None
+        else:
+            channel = discord.utils.get(guild.channels, name=resource.name)
+            if channel is not None and not isinstance(channel, resource.channel_type):
+                # Mesmo nome em outro tipo (ex.: canal de voz "WHITELIST"): procura o do tipo certo
+                channel = discord.utils.find(
+                    lambda c: c.name == resource.name and isinstance(c, resource.channel_type), guild.channels)
+        return channel if isinstance(channel, resource.channel_type) else None
+
+    # --- Início: Invalidação por Eventos ---
+    def _touches(self, resource: Resource, cached, obj, before=None) -> bool:
+        if cached is not None and cached.id == obj.id:
+            return True
+        if resource.config_field:
+            return getattr(get_config(), resource.config_field) == obj.id
+        return resource.name is not None and resource.name in (obj.name, getattr(before, "name", None))
+
+    def _on_change(self, kind: str, obj, before=None):
+        guild_id = obj.guild.id
+        for cache_key in [k for k in self._cache if k[0] == guild_id]:
+            resource = self.resources[cache_key[1]]
+            if resource.kind == kind and self._touches(resource, self._cache[cache_key], obj, before):
+                del self._cache[cache_key]
+
+    def on_channel_event(self, channel: discord.abc.GuildChannel, before: Optional[discord.abc.GuildChannel] = None):
+        self._on_change(CHANNEL, channel, before)
+
+    def on_role_event(self, role: discord.Role, before: Optional[discord.Role] = None):
+        self._on_change(ROLE, role, before)
+    # --- Fim: Invalidação por Eventos ---
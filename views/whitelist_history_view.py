@@ -0,0 +1,90 @@
+import discord
+import logging
+from discord.ui import View, Button, button
+from typing import Optional
+
+from database.database import Database
+from database.models import WhitelistAnswer, WhitelistAttempt
+
+logger = logging.getLogger(__name__)
+
+# Limite por resposta para manter o embed abaixo do máximo de 6000 caracteres
+ANSWER_PREVIEW_LIMIT = 160
+
+
+async def fetch_attempt_page(db: Database, user_id: int, before: Optional[int] = None, after: Optional[int] = None):
+    """Busca a próxima tentativa do usuário (mais antiga que `before` ou mais
+    recente que `after`) junto com as respostas. Cada página é uma busca direta
+    no índice (user_id, attempt_id), independente do tamanho do histórico."""
+    if after is not None:
+        row = await db.fetchone(WhitelistAttempt.SELECT_NEWER, (user_id, after))
+    else:
+        # Sem cursor: a tentativa mais recente
+        row = await db.fetchone(WhitelistAttempt.SELECT_OLDER, (user_id, before if before is not None else 2**63 - 1))
+    if not row:
+        return None, []
+    attempt = WhitelistAttempt.from_row(row)
+    answer_rows = await db.fetchall(WhitelistAnswer.SELECT_BY_ATTEMPT, (attempt.attempt_id,))
+    return attempt, [WhitelistAnswer.from_row(r) for r in answer_rows]
+
+
+def build_history_embed(target: discord.abc.User, attempt: WhitelistAttempt, answers: list, page: int, total: int) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"📚 Histórico de Whitelist: {target.display_name} [Tentativa #{attempt.attempt_id}]",
+        description=f"Usuário: {target.mention} (`{target.id}`)\nConcluído em: <t:{int(attempt.completed_at.timestamp())}:F>",
+        color=discord.Color.blurple(),
+        timestamp=attempt.completed_at
+    )
+    for answer in answers:
+        text = answer.answer_text or "(vazia)"
+        if len(text) > ANSWER_PREVIEW_LIMIT:
+            text = text[:ANSWER_PREVIEW_LIMIT - 3] + "..."
+        embed.add_field(name=f"{answer.question_number}. {answer.question_text}"[:256],
+                        value=f">>> {text}", inline=False)
+    embed.set_footer(text=f"Tentativa {page}/{total} | Nome na época: {attempt.username}")
+    return embed
+
+
+class WhitelistHistoryView(View):
+    """Paginação do histórico de whitelist: ◀ mais recente / mais antiga ▶."""
+
+    def __init__(self, db: Database, author_id: int, target: discord.abc.User,
+                 attempt: WhitelistAttempt, total: int):
+        super().__init__(timeout=300)
+        self.db = db
+        self.author_id = author_id
+        self.target = target
+        self.attempt = attempt
+        self.total = total
+        self.page = 1
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.newer_button.disabled = self.page <= 1
+        self.older_button.disabled = self.page >= self.total
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Apenas quem usou o comando pode navegar neste histórico.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, attempt: Optional[WhitelistAttempt], answers: list, step: int):
+        if attempt is None:
+            await interaction.response.send_message("⚠️ Não há mais tentativas nessa direção.", ephemeral=True)
+            return
+        self.attempt = attempt
+        self.page += step
+        self._update_buttons()
+        embed = build_history_embed(self.target, attempt, answers, self.page, self.total)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @button(label="Mais recente", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def newer_button(self, interaction: discord.Interaction, button_obj: Button):
+        attempt, answers = await fetch_attempt_page(self.db, self.target.id, after=self.attempt.attempt_id)
+        await self._show(interaction, attempt, answers, -1)
+
+    @button(label="Mais antiga", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def older_button(self, interaction: discord.Interaction, button_obj: Button):
+        attempt, answers = await fetch_attempt_page(self.db, self.target.id, before=self.attempt.attempt_id)
+        await self._show(interaction, attempt, answers, 1)
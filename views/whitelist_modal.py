@@ -0,0 +1,235 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import discord
+from discord.ui import Button, Modal, TextInput, View
+
+from database.database import Database
+from database.models import ModalDraftCheckpoint, to_db_time
+from handlers.questionnaire import (COOLDOWN_MINUTES, QUESTIONNAIRE_TIMEOUT_MINUTES, cooldowns,
+                                    finalize_questionnaire, questions)
+from utils.interaction_ack import respond
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações ---
+QUESTIONS_PER_PAGE = 5  # Limite do Discord: 5 campos por modal
+LABEL_MAX = 45  # Limite do Discord para o rótulo do campo e o título do modal
+PLACEHOLDER_MAX = 100
+ANSWER_MAX = 1024  # Cabe inteiro em um campo do embed da staff
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def page_count() -> int:
+    return (len(questions) + QUESTIONS_PER_PAGE - 1) // QUESTIONS_PER_PAGE
+
+
+def page_questions(page: int) -> List[Tuple[int, str]]:
+    """(número, texto) das perguntas de uma página."""
+    start = page * QUESTIONS_PER_PAGE
+    return list(enumerate(questions[start:start + QUESTIONS_PER_PAGE], start + 1))
+
+
+class ModalDraft:
+    """Respostas em andamento de um candidato no modo modal.
+
+    Fica em memória e é gravado na tabela `modal_drafts` a cada página, para
+    que um novo clique no painel retome o formulário mesmo após um reinício.
+    """
+
+    def __init__(self, member_id: int, deadline: Optional[datetime] = None,
+                 answers: Optional[Dict[int, str]] = None, page: int = 0):
+        self.member_id = member_id
+        self.deadline = deadline or datetime.now(timezone.utc) + timedelta(minutes=QUESTIONNAIRE_TIMEOUT_MINUTES)
+        self.answers: Dict[int, str] = answers or {}  # número da pergunta -> resposta
+        self.page = page
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: ModalDraftCheckpoint) -> "ModalDraft":
+        return cls(checkpoint.user_id, checkpoint.deadline, dict(checkpoint.answers), checkpoint.page)
+
+    def to_checkpoint(self) -> ModalDraftCheckpoint:
+        return ModalDraftCheckpoint(self.member_id, self.page, tuple(self.answers.items()), self.deadline)
+
+    @property
+    def remaining(self) -> float:
+        return (self.deadline - datetime.now(timezone.utc)).total_seconds()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining <= 0
+
+    def responses_list(self) -> List[Tuple[str, str]]:
+        return [(text, self.answers[number]) for number, text in enumerate(questions, 1)]
+
+
+# Um rascunho por candidato: um segundo clique no painel retoma a página atual
+_drafts: Dict[int, ModalDraft] = {}
+
+
+# --- Início: Persistência dos Rascunhos ---
+async def load_modal_drafts(db: Database) -> int:
+    """Recarrega os rascunhos ainda no prazo e apaga os vencidos do banco."""
+    now = to_db_time(datetime.now(timezone.utc))
+    for row in await db.fetchall(ModalDraftCheckpoint.SELECT_ACTIVE, (now,)):
+        draft = ModalDraft.from_checkpoint(ModalDraftCheckpoint.from_row(row))
+        _drafts[draft.member_id] = draft
+    await db.execute(ModalDraftCheckpoint.DELETE_EXPIRED, (now,))
+    if _drafts:
+        logger.info(f"{len(_drafts)} rascunho(s) de whitelist (modal) carregado(s) do banco.")
+    return len(_drafts)
+
+
+def save_draft(bot: discord.Client, draft: ModalDraft):
+    """Grava o progresso sem bloquear a resposta (group commit do banco)."""
+    bot.db.execute_nowait(ModalDraftCheckpoint.UPSERT, draft.to_checkpoint().to_params())
+
+
+def discard_draft(bot: discord.Client, member_id: int):
+    _drafts.pop(member_id, None)
+    bot.db.execute_nowait(ModalDraftCheckpoint.DELETE, (member_id,))
+
+
+def active_draft(bot: discord.Client, member_id: int) -> Optional[ModalDraft]:
+    """Rascunho do membro ainda no prazo; um vencido é descartado."""
+    draft = _drafts.get(member_id)
+    if draft and draft.expired:
+        discard_draft(bot, member_id)
+        return None
+    return draft
+# --- Fim: Persistência dos Rascunhos ---
+
+
+def page_embed(draft: ModalDraft) -> discord.Embed:
+    """Mostra as perguntas completas da página (os rótulos do modal são curtos)."""
+    embed = discord.Embed(
+        title=f"📝 Whitelist — Página {draft.page + 1}/{page_count()}",
+        description=f"Responda às perguntas abaixo no formulário. O prazo termina <t:{int(draft.deadline.timestamp())}:R>.",
+        color=discord.Color.blurple()
+    )
+    for number, text in page_questions(draft.page):
+        embed.add_field(name=f"Pergunta {number}", value=text, inline=False)
+    return embed
+
+
+class QuestionnaireModal(Modal):
+    """Uma página do questionário: até 5 campos de texto."""
+
+    def __init__(self, draft: ModalDraft):
+        super().__init__(title=_truncate(f"Whitelist — Página {draft.page + 1}/{page_count()}", LABEL_MAX),
+                         timeout=max(draft.remaining, 1))
+        self.draft = draft
+        self.page = draft.page
+        self.inputs: List[Tuple[int, TextInput]] = []
+        for number, text in page_questions(draft.page):
+            text_input = TextInput(
+                label=_truncate(f"{number}. {text}", LABEL_MAX),
+                placeholder=_truncate(text, PLACEHOLDER_MAX),
+                style=discord.TextStyle.paragraph,
+                default=draft.answers.get(number),
+                max_length=ANSWER_MAX,
+                required=True
+            )
+            self.add_item(text_input)
+            self.inputs.append((number, text_input))
+
+    async def on_submit(self, interaction: discord.Interaction):
+        draft = self.draft
+        if draft.expired:
+            discard_draft(interaction.client, draft.member_id)
+            await interaction.response.edit_message(
+                content=f"⏰ Tempo total esgotado! Você demorou mais de {QUESTIONNAIRE_TIMEOUT_MINUTES} minutos.",
+                embed=None, view=None)
+            return
+        if self.page != draft.page:
+            # Modal antigo reenviado depois de outro avanço: ignora as respostas
+            await interaction.response.send_message("⚠️ Esta página já foi respondida.", ephemeral=True)
+            return
+
+        for number, text_input in self.inputs:
+            draft.answers[number] = text_input.value
+        draft.page += 1
+
+        if draft.page < page_count():
+            save_draft(interaction.client, draft)
+            await interaction.response.edit_message(embed=page_embed(draft), view=ModalPageView(draft))
+            return
+
+        # --- Última página: mesma finalização do modo canal ---
+        discard_draft(interaction.client, draft.member_id)
+        await interaction.response.edit_message(
+            content="⏳ Registrando suas respostas...", embed=None, view=None)
+        try:
+            await finalize_questionnaire(interaction.client, interaction.user, interaction.guild,
+                                         draft.responses_list(), datetime.now(timezone.utc))
+            await interaction.edit_original_response(
+                content="✅ Questionário concluído! Suas respostas foram registradas e serão avaliadas pela equipe.")
+        except Exception as e:
+            logger.error(f"Erro ao finalizar questionário (modal) de {interaction.user}: {e}", exc_info=True)
+            await interaction.edit_original_response(
+                content="❌ Ocorreu um erro inesperado ao registrar suas respostas. Contate um administrador.")
+
+    async def on_error(self, interaction: discord.Interaction, error: Exception):
+        logger.error(f"Erro no modal de whitelist de {interaction.user}: {error}", exc_info=True)
+        if not interaction.response.is_done():
+            await interaction.response.send_message("❌ Ocorreu um erro inesperado.", ephemeral=True)
+
+
+class ModalPageView(View):
+    """Mensagem efêmera com o botão que abre o modal da página atual."""
+
+    def __init__(self, draft: ModalDraft):
+        super().__init__(timeout=max(draft.remaining, 1))
+        self.draft = draft
+        label = "Responder" if draft.page == 0 else "Próxima página"
+        self.open_button = Button(label=f"{label} ({draft.page + 1}/{page_count()})",
+                                  style=discord.ButtonStyle.primary)
+        self.open_button.callback = self.open_modal
+        self.add_item(self.open_button)
+
+    async def open_modal(self, interaction: discord.Interaction):
+        if self.draft.expired:
+            discard_draft(interaction.client, self.draft.member_id)
+            await interaction.response.edit_message(
+                content=f"⏰ Tempo total esgotado! Você demorou mais de {QUESTIONNAIRE_TIMEOUT_MINUTES} minutos.",
+                embed=None, view=None)
+            return
+        await interaction.response.send_modal(QuestionnaireModal(self.draft))
+
+
+async def resume_modal_questionnaire(interaction: discord.Interaction, draft: ModalDraft):
+    """Novo clique no painel com rascunho no prazo: reabre a página atual (o cooldown não se aplica)."""
+    await respond(interaction, embed=page_embed(draft), view=ModalPageView(draft), ephemeral=True)
+    logger.info(f"Questionário (modal) retomado por {interaction.user} na página {draft.page + 1}.")
+
+
+async def start_modal_questionnaire(interaction: discord.Interaction):
+    """Modo modal: sem canal por candidato; tudo em respostas efêmeras da interação.
+
+    Deve ser a primeira resposta da interação do painel (sem defer antes). Quem
+    já tem rascunho no prazo passa por `resume_modal_questionnaire`.
+    """
+    member = interaction.user
+    draft = ModalDraft(member.id)
+    _drafts[member.id] = draft
+    save_draft(interaction.client, draft)
+    cooldowns.set(member.id, datetime.now(timezone.utc) + timedelta(minutes=COOLDOWN_MINUTES))
+    await respond(interaction, embed=page_embed(draft), view=ModalPageView(draft), ephemeral=True)
+    logger.info(f"Questionário (modal) iniciado por {member} (ID: {member.id}).")
+
+    # Cargo de análise, como no modo canal (depois da resposta, fora do prazo de 3s)
+    analise_role = interaction.client.resolver.get("analise_role", interaction.guild)
+    if analise_role and analise_role not in member.roles:
+        try:
+            await interaction.client.outbound.add_roles(member, analise_role, reason="Iniciou processo de Whitelist")
+        except discord.HTTPException as e:
+            logger.error(f"Não foi possível atribuir o cargo 'Análise' para {member}: {e}")
+
+    # Rascunhos vencidos de quem abandonou o formulário
+    for member_id, old in list(_drafts.items()):
+        if old.expired:
+            discard_draft(interaction.client, member_id)
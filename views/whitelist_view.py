@@ -3,7 +3,7 @@ import asyncio
 import logging
 import re
 import os
-from discord.ui import View, Button, button
+from discord.ui import Button, button
 from datetime import datetime, timedelta, timezone
 
 # Try-except para importações (sem alterações)
@@ -11,19 +11,30 @@ try:
     import sys
     sys.path.append(os.path.abspath(
         os.path.join(os.path.dirname(__file__), '..')))
-    from handlers.questionnaire import start_questionnaire, cooldowns, COOLDOWN_MINUTES
+    from handlers.questionnaire import start_admitted_questionnaire, spawn_questionnaire, cooldowns, COOLDOWN_MINUTES
 
 except ImportError as e:
     logging.critical(
         f"Falha crítica ao importar de handlers.questionnaire: {e}. Verifique a estrutura de pastas e o sys.path.")
 
-    async def start_questionnaire(*args, **kwargs):
+    async def start_admitted_questionnaire(*args, **kwargs):
         logging.error(
-            "Função start_questionnaire FALTANDO devido a erro de import.")
-    cooldowns = {}
+            "Função start_admitted_questionnaire FALTANDO devido a erro de import.")
+
+    def spawn_questionnaire(bot, coro, name):
+        return asyncio.create_task(coro, name=name)
+    from handlers.cooldowns import CooldownStore
+    cooldowns = CooldownStore()
     COOLDOWN_MINUTES = 30
 
 
+from handlers.session_backend import THREAD, end_session, session_backend
+from handlers.whitelist_channels import whitelist_channels, check_id_for, thread_name_for
+from utils.config import get_config
+from utils.interaction_ack import TrackedView, defer_response, respond
+from utils.metrics import timed_handler
+from views.whitelist_modal import active_draft, resume_modal_questionnaire, start_modal_questionnaire
+
 logger = logging.getLogger(__name__)
 
 # Função sanitize_channel_name (sem alterações)
@@ -40,24 +51,100 @@ def sanitize_channel_name(name: str) -> str:
     return name
 
 
-class WhitelistView(View):
+def queue_message(position: int, eta_seconds: float) -> str:
+    """Mensagem efêmera de quem está na fila; o Discord atualiza o tempo relativo sozinho."""
+    eta = datetime.now(timezone.utc) + timedelta(seconds=eta_seconds)
+    return (f"⏳ Muitas whitelists em andamento. Você está na fila, na posição **{position}**.\n"
+            f"Previsão da sua vez: <t:{int(eta.timestamp())}:R>. Esta mensagem é atualizada sozinha; não clique de novo.")
+
+
+def existing_whitelist_channel(guild: discord.Guild, member_id: int):
+    """Canal (ou thread) de whitelist em andamento do membro, pelo índice em memória."""
+    channel_id = whitelist_channels.get(member_id)
+    if not channel_id:
+        return None
+    channel = guild.get_channel_or_thread(channel_id)
+    if channel is None:
+        # Entrada obsoleta (evento de remoção perdido): descarta
+        whitelist_channels.discard_user(member_id)
+    return channel
+
+
+def already_running_message(channel) -> str:
+    return (f"❗ Ops! Parece que você já tem um processo de whitelist em andamento no canal {channel.mention}. "
+            "Por favor, conclua o processo lá ou, se precisar de ajuda, mencione a staff no canal.")
+
+
+def whitelist_overwrites(guild: discord.Guild, member: discord.Member = None) -> dict:
+    """Permissões do canal de whitelist; sem `member`, a base oculta usada pelo pool."""
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False),
+        guild.me: discord.PermissionOverwrite(
+            # Permissões para o bot
+            read_messages=True, send_messages=True, manage_channels=True, manage_messages=True, embed_links=True)
+    }
+    if member:
+        # Permissões básicas
+        overwrites[member] = discord.PermissionOverwrite(
+            read_messages=True, send_messages=True, attach_files=True, embed_links=True)
+    return overwrites
+
+
+class WhitelistView(TrackedView):
     def __init__(self):
         # timeout=None é essencial para persistência!
         super().__init__(timeout=None)
 
+    async def start_modal_whitelist(self, interaction: discord.Interaction, now: datetime):
+        member = interaction.user
+        # Antes do cooldown (que começa junto com o rascunho): quem fechou a mensagem
+        # efêmera, ou voltou após um reinício do bot, continua de onde parou
+        draft = active_draft(interaction.client, member.id)
+        if draft:
+            await resume_modal_questionnaire(interaction, draft)
+            return
+        cooldown_expires_at = cooldowns.expires_at(member.id, now)
+        if cooldown_expires_at:
+            remaining_seconds = (cooldown_expires_at - now).total_seconds()
+            remaining_minutes = int(
+                remaining_seconds // 60) + (1 if remaining_seconds % 60 > 0 else 0)
+            logger.info(
+                f"Usuário {member} (ID: {member.id}) tentou whitelist (modal) mas está em cooldown por ~{remaining_minutes} min.")
+            await respond(
+                interaction,
+                f"❌ Você ainda está em cooldown! Por favor, aguarde mais **{remaining_minutes} minuto(s)** para tentar novamente.",
+                ephemeral=True
+            )
+            return
+        # Um questionário em canal aberto antes da troca para o modo modal ainda vale
+        existing_channel = existing_whitelist_channel(interaction.guild, member.id)
+        if existing_channel:
+            logger.warning(
+                f"Tentativa de whitelist (modal) por {member} (ID: {member.id}), mas o canal '{existing_channel.name}' já existe.")
+            await respond(interaction, already_running_message(existing_channel), ephemeral=True)
+            return
+        await start_modal_questionnaire(interaction)
+
     @button(label="Quero fazer whitelist", style=discord.ButtonStyle.success, custom_id="start_whitelist")
+    @timed_handler("start_whitelist")
     async def start_whitelist_button(self, interaction: discord.Interaction, button_obj: Button):
         member = interaction.user
         guild = interaction.guild
         now = datetime.now(timezone.utc)
 
+        # Modo modal: o formulário precisa ser a primeira resposta (sem defer)
+        if get_config().whitelist_mode == "modal":
+            await self.start_modal_whitelist(interaction, now)
+            return
+
         # ----- ETAPA 1: Deferir -----
         # Deferir cedo para evitar "Interaction Failed"
-        await interaction.response.defer(ephemeral=True, thinking=True)
+        await defer_response(interaction, ephemeral=True, thinking=True)
 
         # ----- ETAPA 2: Verificar Cooldown -----
-        if member.id in cooldowns and cooldowns[member.id] > now:
-            remaining_delta = cooldowns[member.id] - now
+        cooldown_expires_at = cooldowns.expires_at(member.id, now)
+        if cooldown_expires_at:
+            remaining_delta = cooldown_expires_at - now
             remaining_seconds = remaining_delta.total_seconds()
             # Arredonda para cima os minutos restantes
             remaining_minutes = int(
@@ -73,56 +160,71 @@ class WhitelistView(View):
 
         whitelist_channel = None
         analise_role = None
+        reserved = False
+        admission = interaction.client.whitelist_admission
+        admitted = False
 
         try:
-            # ----- ETAPA 3: Verificar Canal Existente (MODIFICADO) -----
-            logger.debug(
-                f"Iniciando verificação de canal existente para {member} (ID: {member.id})")
-            # String exata que procuramos no tópico
-            check_id_string = f"CheckID: wl-{member.id}"
-            existing_channel = None
-
-            # Otimização: Procurar apenas na categoria "WHITELIST" se ela existir
-            target_category = discord.utils.get(
-                guild.categories, name="WHITELIST")
-            search_scope = target_category.text_channels if target_category else guild.text_channels
-            logger.debug(
-                f"Escopo da busca: {'Categoria WHITELIST' if target_category else 'Todos os canais de texto'}")
-
-            for channel in search_scope:
-                # Verifica se o canal tem tópico e se o tópico contém nossa string de ID
-                if channel.topic and check_id_string in channel.topic:
-                    existing_channel = channel
-                    logger.info(
-                        f"Canal existente encontrado para {member.id} pelo tópico: {channel.name} (ID: {channel.id})")
-                    break  # Encontrou, não precisa continuar procurando
+            # ----- ETAPA 3: Verificar Canal Existente (índice em memória) -----
+            # String gravada no tópico; o índice é reconstruído a partir dela na inicialização
+            check_id_string = check_id_for(member.id)
+            existing_channel = existing_whitelist_channel(guild, member.id)
+            if existing_channel:
+                logger.info(
+                    f"Canal existente encontrado para {member.id} pelo índice: {existing_channel.id}")
+
+            target_category = interaction.client.resolver.get("whitelist_category", guild)
 
-            # Se encontrou um canal existente pelo tópico...
+            # Se encontrou um canal existente pelo índice...
             if existing_channel:
                 logger.warning(
-                    f"Tentativa de iniciar whitelist por {member} (ID: {member.id}), mas canal '{existing_channel.name}' (ID: {existing_channel.id}) já existe (verificado via tópico).")
+                    f"Tentativa de iniciar whitelist por {member} (ID: {member.id}), mas canal '{existing_channel.name}' (ID: {existing_channel.id}) já existe (verificado via índice).")
                 # Envia a mensagem amigável informando o usuário
+                await interaction.followup.send(already_running_message(existing_channel), ephemeral=True)
+                return  # Interrompe a execução aqui
+
+            # Reserva: um clique duplo não cria um segundo canal enquanto o primeiro está sendo criado
+            if not whitelist_channels.reserve(member.id):
+                logger.warning(
+                    f"Clique duplicado de {member} (ID: {member.id}): canal de whitelist já está sendo criado.")
+                position = admission.position(member.id)
                 await interaction.followup.send(
-                    f"❗ Ops! Parece que você já tem um processo de whitelist em andamento no canal {existing_channel.mention}. "
-                    "Por favor, conclua o processo lá ou, se precisar de ajuda, mencione a staff no canal.",
+                    f"⏳ Você já está na fila da whitelist (posição **{position}**)." if position else
+                    "⏳ Seu canal de whitelist já está sendo criado. Aguarde alguns segundos.",
                     ephemeral=True
                 )
-                return  # Interrompe a execução aqui
+                return
+            reserved = True
 
-            logger.debug(
-                f"Nenhum canal existente encontrado para {member.id} via tópico.")
+            # ----- ETAPA 3.1: Controle de Admissão (fila FIFO) -----
+            # Limita os questionários simultâneos (WHITELIST_MAX_SESSIONS); a mensagem
+            # da interação mostra a posição e é editada no lugar enquanto a fila anda
+            queued = False
+
+            async def show_position(position: int, eta_seconds: float):
+                nonlocal queued
+                queued = True
+                await interaction.edit_original_response(content=queue_message(position, eta_seconds))
+
+            if not await admission.acquire(member.id, show_position):
+                await interaction.edit_original_response(
+                    content="⌛ A fila da whitelist está longa e o tempo de espera acabou. Tente novamente em alguns minutos.")
+                return
+            admitted = True
+            if queued:
+                await interaction.edit_original_response(content="✅ Chegou a sua vez! Criando seu canal de whitelist...")
 
             # ----- ETAPA 4: ATRIBUIR CARGO DE ANÁLISE (Sem alterações lógicas) -----
-            analise_role_id_str = os.getenv("ANALISE_ID")
-            if not analise_role_id_str:
+            analise_role_id = get_config().analise_role_id
+            if analise_role_id is None:
                 logger.critical(
-                    "Variável de ambiente ANALISE_ID não definida!")
+                    "Variável de ambiente ANALISE_ID não definida ou inválida!")
                 await interaction.followup.send("❌ Erro de configuração do bot: Cargo 'Análise' não definido. Avise a staff.", ephemeral=True)
                 return
 
+            analise_role = None
             try:
-                analise_role_id = int(analise_role_id_str)
-                analise_role = guild.get_role(analise_role_id)
+                analise_role = interaction.client.resolver.get("analise_role", guild)
 
                 if not analise_role:
                     logger.error(
@@ -133,17 +235,13 @@ class WhitelistView(View):
                 if analise_role not in member.roles:
                     logger.info(
                         f"Atribuindo cargo '{analise_role.name}' para {member} (ID: {member.id}).")
-                    await member.add_roles(analise_role, reason="Iniciou processo de Whitelist")
+                    await interaction.client.outbound.add_roles(member, analise_role, reason="Iniciou processo de Whitelist")
                     logger.info(
                         f"Cargo '{analise_role.name}' atribuído com sucesso para {member}.")
                 else:
                     logger.info(
                         f"Membro {member} já possui o cargo '{analise_role.name}'.")
 
-            except ValueError:
-                logger.error(f"ANALISE_ID ('{analise_role_id_str}') inválido.")
-                await interaction.followup.send("❌ Erro de configuração: ID do cargo 'Análise' inválido. Avise a staff.", ephemeral=True)
-                return
             except discord.Forbidden:
                 logger.error(
                     f"Sem permissão para adicionar cargo '{analise_role.name if analise_role else analise_role_id}' para {member}.")
@@ -162,34 +260,31 @@ class WhitelistView(View):
             suffix = f"-{str(member.id)[-4:]}"
             available_len = max_name_len - len(suffix)
             display_channel_name = f"{base_name[:available_len]}{suffix}"
+            backend = session_backend(guild, target_category, get_config().whitelist_thread_parent_id,
+                                      interaction.client.channel_pools["whitelist"])
+            if backend.kind == THREAD:
+                # Sem tópico em threads: o ID completo do dono vai no nome
+                display_channel_name = thread_name_for(base_name, member.id)
 
             logger.info(
                 f"Preparando para criar canal '{display_channel_name}' para {member} (ID: {member.id}).")
 
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                # Permissões básicas
-                member: discord.PermissionOverwrite(read_messages=True, send_messages=True, attach_files=True, embed_links=True),
-                guild.me: discord.PermissionOverwrite(
-                    # Permissões para o bot
-                    read_messages=True, send_messages=True, manage_channels=True, manage_messages=True, embed_links=True)
-            }
-
-            # Usa a categoria encontrada anteriormente ou None se não existir
-            category_to_use = target_category  # Reutiliza a variável
+            overwrites = whitelist_overwrites(guild, member)
 
             # **IMPORTANTE: Definir o TÓPICO na criação**
             # Inclui o CheckID
             channel_topic = f"Whitelist para {member.display_name} ({member.id}) | {check_id_string}"
 
-            whitelist_channel = await guild.create_text_channel(
-                name=display_channel_name,
+            # Canal (overwrites + tópico) ou thread privada, conforme SESSION_BACKEND
+            whitelist_channel = await backend.create(
+                guild, display_channel_name, member,
                 overwrites=overwrites,
-                category=category_to_use,  # Usa a categoria encontrada
-                topic=channel_topic  # Define o tópico aqui!
+                topic=channel_topic,  # Define o tópico aqui!
+                reason=f"Whitelist de {member}"
             )
+            whitelist_channels.register(member.id, whitelist_channel.id)
             logger.info(
-                f"Canal '{whitelist_channel.name}' criado com sucesso para {member} com tópico definido.")
+                f"Canal '{whitelist_channel.name}' pronto para {member}.")
 
             # ----- ETAPA 6: Informar Usuário e Iniciar Questionário -----
             confirmation_message = f"✅ Seu canal de whitelist foi criado: {whitelist_channel.mention}"
@@ -200,8 +295,12 @@ class WhitelistView(View):
 
             await interaction.followup.send(confirmation_message, ephemeral=True)
 
-            # Inicia o questionário no novo canal
-            await start_questionnaire(member, whitelist_channel, interaction.client)
+            # Inicia o questionário no novo canal, fora do callback do botão (que termina
+            # aqui); a vaga da fila passa para a task e é liberada quando ela acabar
+            spawn_questionnaire(interaction.client,
+                                start_admitted_questionnaire(member, whitelist_channel, interaction.client),
+                                f"questionario-{whitelist_channel.id}")
+            admitted = False
 
         # ----- Blocos Except (sem alterações lógicas significativas, apenas garantia de followup) -----
         except discord.Forbidden as e:
@@ -219,7 +318,7 @@ class WhitelistView(View):
             # Tentar remover o cargo se foi dado e a criação falhou
             if not whitelist_channel and analise_role and analise_role in member.roles:
                 try:
-                    await member.remove_roles(analise_role, reason="Falha na criação do canal de Whitelist")
+                    await interaction.client.outbound.remove_roles(member, analise_role, reason="Falha na criação do canal de Whitelist")
                     logger.info(
                         f"Cargo '{analise_role.name}' removido de {member} devido à falha na criação do canal.")
                 except Exception as e_rem:
@@ -247,18 +346,27 @@ class WhitelistView(View):
             # Limpeza em caso de erro após criação parcial
             if whitelist_channel:  # Se o canal chegou a ser criado
                 try:
-                    await whitelist_channel.delete(reason="Falha inesperada no setup da whitelist")
+                    await end_session(interaction.client, whitelist_channel, interaction.client.channel_pools["whitelist"],
+                                      reason="Falha inesperada no setup da whitelist")
                     logger.info(
-                        f"Canal {whitelist_channel.name} deletado devido a erro no setup.")
+                        f"Canal {whitelist_channel.name} encerrado devido a erro no setup.")
                 except Exception as e_del:
                     logger.error(
                         f"Não foi possível deletar o canal {whitelist_channel.name} após erro no setup: {e_del}")
             # Tenta remover o cargo se foi dado e algo deu errado
             if analise_role and analise_role in member.roles:
                 try:
-                    await member.remove_roles(analise_role, reason="Falha no setup da Whitelist")
+                    await interaction.client.outbound.remove_roles(member, analise_role, reason="Falha no setup da Whitelist")
                     logger.info(
                         f"Cargo '{analise_role.name}' removido de {member} devido à falha no setup.")
                 except Exception as e_rem:
                     logger.error(
                         f"Não foi possível remover cargo de {member} após falha no setup: {e_rem}")
+
+        finally:
+            # Libera a reserva se o canal não chegou a ser registrado no índice
+            if reserved:
+                whitelist_channels.release_reservation(member.id)
+            # Fim da sessão (ou falha antes dela): a vaga vai para o próximo da fila
+            if admitted:
+                admission.release(member.id)